@@ -0,0 +1 @@
+"""Performance benchmarks for the trainer engines and API."""
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEGACY_DIR = os.path.join(ROOT, "legacy")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+for path in (ROOT, LEGACY_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+# Shared equity caches would turn every round after the warmup into a
+# cache hit; cases time the computation, so they stay off here.
+os.environ["EQUITY_CACHE_PATH"] = ""
+os.environ["SIM_CACHE_PATH"] = ""
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[], Callable[[], object]]
+
+
+CASES: list[Case] = []
+
+
+def case(name: str) -> Callable:
+    def register(setup: Callable[[], Callable[[], object]]) -> Callable:
+        CASES.append(Case(name, setup))
+        return setup
+
+    return register
+
+
+def _legacy_cards(codes: list[str]) -> list:
+    from engine import create_deck
+
+    deck = {card.code: card for card in create_deck()}
+    return [deck[code] for code in codes]
+
+
+def _draw_module():
+    from server.main import MODULE_REGISTRY
+
+    return MODULE_REGISTRY["five_card_draw"].module
+
+
+LEGACY_WILD_HANDS = {
+    0: ["A♠", "K♥", "9♦", "9♣", "4♠"],
+    1: ["Q♠", "K♥", "9♦", "9♣", "4♠"],
+    2: ["Q♠", "Q♥", "9♦", "9♣", "4♠"],
+    3: ["Q♠", "Q♥", "Q♦", "9♣", "4♠"],
+    4: ["Q♠", "Q♥", "Q♦", "Q♣", "4♠"],
+}
+
+
+def _register_legacy_evaluators() -> None:
+    for wilds, codes in LEGACY_WILD_HANDS.items():
+
+        def setup_high(codes: list[str] = codes) -> Callable[[], object]:
+            from engine import evaluate_high_five
+
+            cards = _legacy_cards(codes)
+            return lambda: evaluate_high_five(cards, {"Q"})
+
+        def setup_low(codes: list[str] = codes) -> Callable[[], object]:
+            from engine import evaluate_low_five
+
+            cards = _legacy_cards(codes)
+            return lambda: evaluate_low_five(cards, {"Q"}, False)
+
+        case(f"legacy.evaluate_high_five[{wilds}_wild]")(setup_high)
+        case(f"legacy.evaluate_low_five[{wilds}_wild]")(setup_low)
+
+
+_register_legacy_evaluators()
+
+
+@case("legacy.best_hand_for_player")
+def _best_hand() -> Callable[[], object]:
+    from engine import best_hand_for_player, build_wild_ranks, create_deck
+
+    rng = random.Random(7)
+    deck = create_deck()
+    rng.shuffle(deck)
+    hand = deck[:5]
+    pairs = [deck[5 + i * 2 : 7 + i * 2] for i in range(5)]
+    community = [card for pair in pairs for card in pair]
+    wild_ranks = build_wild_ranks(pairs, 5)
+    return lambda: best_hand_for_player(hand, community, wild_ranks, True)
+
+
+@case("legacy.simulate_odds")
+def _simulate_odds() -> Callable[[], object]:
+    from engine import create_deck
+    from sim import simulate_odds
+
+    rng = random.Random(11)
+    deck = create_deck()
+    rng.shuffle(deck)
+    hand = deck[:5]
+    pairs = [deck[5 + i * 2 : 7 + i * 2] for i in range(5)]
+    return lambda: simulate_odds(
+        player_count=6,
+        hero_hand=hand,
+        community_pairs=pairs,
+        revealed_pairs=2,
+        iterations=200,
+        max_time_ms=8000,
+        high_low_enabled=True,
+        natural_low_enabled=True,
+    )
+
+
+@case("draw._evaluate_hand")
+def _evaluate_hand() -> Callable[[], object]:
+    module = _draw_module()
+    rng = random.Random(3)
+    hands = []
+    for _ in range(64):
+        deck = module._deck()
+        rng.shuffle(deck)
+        hands.append(deck[:5])
+
+    def run() -> None:
+        for hand in hands:
+            module._evaluate_hand(hand)
+
+    return run
+
+
+@case("draw._estimate_win_pct[4p,200it]")
+def _estimate_win_pct() -> Callable[[], object]:
+    module = _draw_module()
+    random.seed(5)
+    state = module._deal_new_hand(4, round_number=1, dealer_index=0, trainee_index=0)
+    return lambda: module._estimate_win_pct(state, 0, iterations=200, opponent_model="uniform")
+
+
+@case("draw._range_win_pct[4p,fresh pool]")
+def _range_win_pct() -> Callable[[], object]:
+    module = _draw_module()
+    random.seed(5)
+    state = module._deal_new_hand(4, round_number=1, dealer_index=0, trainee_index=0)
+    # The dealer acts last, so every opponent's range has been narrowed.
+    state = module._auto_play_until_trainee(state, 4)
+
+    def run() -> None:
+        # Dropping the pool times build_pool, not a reweighting hit.
+        state.pop("range_pool", None)
+        module._range_win_pct(state, 0)
+
+    return run
+
+
+@case("api.POST /sessions/{id}/action")
+def _api_action() -> Callable[[], object]:
+    from fastapi.testclient import TestClient
+
+    from server.main import app
+
+    client = TestClient(app)
+    session = client.post("/sessions", json={"module_id": "five_card_draw", "player_count": 4}).json()
+
+    def run() -> None:
+        nonlocal session
+        payload = session["payload"]
+        actions = payload["available_actions"]
+        if not actions:
+            session = client.post(
+                "/sessions", json={"module_id": "five_card_draw", "player_count": 4}
+            ).json()
+            return
+        action = next((a for a in actions if a in ("check", "call", "next_hand")), actions[0])
+        resp = client.post(
+            f"/sessions/{session['id']}/action",
+            json={"player_index": payload["current_actor"], "action": action},
+        )
+        session = resp.json()
+
+    return run
+
+
+def _measure(fn: Callable[[], object], min_time_s: float, min_rounds: int) -> list[float]:
+    fn()
+    samples: list[float] = []
+    deadline = time.perf_counter() + min_time_s
+    while len(samples) < min_rounds or time.perf_counter() < deadline:
+        start = time.perf_counter_ns()
+        fn()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    return samples
+
+
+def run_cases(pattern: str | None, min_time_s: float, min_rounds: int) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+    for bench in CASES:
+        if pattern and pattern not in bench.name:
+            continue
+        random.seed(0)
+        fn = bench.setup()
+        samples = sorted(_measure(fn, min_time_s, min_rounds))
+        results[bench.name] = {
+            "median_us": round(statistics.median(samples), 2),
+            "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+            "min_us": round(samples[0], 2),
+            "rounds": len(samples),
+        }
+        print(
+            f"{bench.name:<42} median {results[bench.name]['median_us']:>12.1f} us"
+            f"   p95 {results[bench.name]['p95_us']:>12.1f} us   n={len(samples)}"
+        )
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    regressions: list[str] = []
+    print("\nComparison against baseline (median):")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"  {name:<42} (no baseline)")
+            continue
+        ratio = current["median_us"] / base["median_us"] if base["median_us"] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<42} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Trainer performance benchmarks.")
+    parser.add_argument("-k", "--filter", help="Only run cases whose name contains this text.")
+    parser.add_argument("-o", "--output", help="Write results JSON to this path.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON path.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the baseline.")
+    parser.add_argument("--compare", action="store_true", help="Compare results with the baseline.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown before a case counts as a regression (0.25 = 25%%).",
+    )
+    parser.add_argument("--min-time", type=float, default=0.3, help="Seconds to sample each case.")
+    parser.add_argument("--min-rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    results = run_cases(args.filter, args.min_time, args.min_rounds)
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+
+    if args.compare:
+        if not os.path.isfile(args.baseline):
+            print(f"\nNo baseline at {args.baseline}; run with --save-baseline first.")
+            return 2
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed beyond {args.threshold:.0%}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, Callable, Collection, Iterator
+
+import fastjson
+
+KEEPALIVE_TIMEOUT_S = float(os.getenv("KEEPALIVE_TIMEOUT_S", "75"))
+# Once a request line arrives, its headers and body must follow within this.
+REQUEST_TIMEOUT_S = float(os.getenv("REQUEST_TIMEOUT_S", "30"))
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LEGACY_WORKERS", str(min(8, (os.cpu_count() or 1) + 2)))),
+    thread_name_prefix="legacy-worker",
+)
+
+
+class BadRequest(Exception):
+    status = HTTPStatus.BAD_REQUEST
+
+
+class RequestTimeout(BadRequest):
+    status = HTTPStatus.REQUEST_TIMEOUT
+
+
+@dataclass(frozen=True)
+class Routes:
+    # The app's dispatchers, handed over by the running app, so this module
+    # never imports a second copy of it (app.py runs as __main__).
+    get: Callable[..., Any]
+    post: Callable[..., Any]
+    stream: Callable[..., Any]
+    stream_paths: Collection[str]
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> tuple[str, str, str, dict[str, str], bytes] | None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        return None
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise BadRequest("Malformed request line.")
+    method, path, version = parts
+    try:
+        headers, body = await asyncio.wait_for(_read_head_and_body(reader), REQUEST_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        raise RequestTimeout("Request took too long.") from None
+    return method, path, version, headers, body
+
+
+async def _read_head_and_body(reader: asyncio.StreamReader) -> tuple[dict[str, str], bytes]:
+    headers: dict[str, str] = {}
+    header_bytes = 0
+    while True:
+        line = await reader.readline()
+        header_bytes += len(line)
+        if header_bytes > MAX_HEADER_BYTES:
+            raise BadRequest("Headers too large.")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", "0") or 0)
+    if length > MAX_BODY_BYTES:
+        raise BadRequest("Body too large.")
+    body = await reader.readexactly(length) if length else b""
+    return headers, body
+
+
+def _keep_alive(version: str, headers: dict[str, str]) -> bool:
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+def _encode_response(
+    status: int,
+    body: bytes,
+    content_type: str | None,
+    keep_alive: bool,
+    extra_headers: dict[str, str] | None = None,
+    framing: str = "length",
+    version: str = "HTTP/1.1",
+) -> bytes:
+    # framing: "length" sends Content-Length, "chunked" streams chunks
+    # (HTTP/1.1 only), "close" ends the body by closing the connection.
+    phrase = HTTPStatus(status).phrase
+    lines = [f"{'HTTP/1.0' if version == 'HTTP/1.0' else 'HTTP/1.1'} {status} {phrase}"]
+    if content_type:
+        lines.append(f"Content-Type: {content_type}")
+    if framing == "chunked":
+        lines.append("Transfer-Encoding: chunked")
+    elif framing == "length":
+        lines.append(f"Content-Length: {len(body)}")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    if keep_alive:
+        lines.append(f"Keep-Alive: timeout={int(KEEPALIVE_TIMEOUT_S)}")
+    for name, value in (extra_headers or {}).items():
+        lines.append(f"{name}: {value}")
+    head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head + body
+
+
+def _parse_body(body: bytes) -> dict:
+    try:
+        return json.loads(body.decode("utf-8")) if body else {}
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return {}
+
+
+def _handle_post(
+    routes: Routes, path: str, body: bytes, headers: dict[str, str]
+) -> tuple[int, bytes, dict[str, str]]:
+    result = routes.post(path, _parse_body(body), headers)
+    if result is None:
+        return HTTPStatus.NOT_FOUND, b'{"error": "Not found."}', {}
+    payload, status, response_headers = result
+    return status, fastjson.dumps(payload), response_headers
+
+
+async def _respond(
+    routes: Routes,
+    method: str,
+    path: str,
+    version: str,
+    headers: dict[str, str],
+    body: bytes,
+    keep_alive: bool,
+) -> bytes:
+    # Routes read files and stat them (profiles, dev assets), so even GETs
+    # run in the executor rather than on the event loop.
+    loop = asyncio.get_running_loop()
+    if method in ("GET", "HEAD"):
+        result = await loop.run_in_executor(
+            EXECUTOR,
+            routes.get,
+            path,
+            headers.get("accept-encoding", ""),
+            headers.get("if-none-match", ""),
+        )
+        if result is None:
+            return _encode_response(
+                HTTPStatus.NOT_FOUND,
+                b"Not found.",
+                "text/plain; charset=utf-8",
+                keep_alive,
+                version=version,
+            )
+        status, asset_headers, data = result
+        response = _encode_response(status, data, None, keep_alive, asset_headers, version=version)
+        if method == "HEAD":
+            return response[: len(response) - len(data)]
+        return response
+    if method == "POST":
+        status, data, response_headers = await loop.run_in_executor(
+            EXECUTOR, _handle_post, routes, path, body, headers
+        )
+        return _encode_response(
+            status, data, "application/json", keep_alive, response_headers, version=version
+        )
+    return _encode_response(
+        HTTPStatus.METHOD_NOT_ALLOWED,
+        b"Method not allowed.",
+        "text/plain; charset=utf-8",
+        keep_alive,
+        {"Allow": "GET, HEAD, POST"},
+        version=version,
+    )
+
+
+async def _stream_events(
+    writer: asyncio.StreamWriter, events: Iterator[bytes], keep_alive: bool, version: str
+) -> None:
+    # Each event is computed in the executor and sent as one chunk; an
+    # HTTP/1.0 client cannot take chunks, so it gets the raw events and the
+    # connection closes after the last. A client that disconnects makes
+    # drain() raise, and closing the generator then stops the simulation
+    # before its next step.
+    loop = asyncio.get_running_loop()
+    chunked = version != "HTTP/1.0"
+    writer.write(
+        _encode_response(
+            HTTPStatus.OK,
+            b"",
+            "text/event-stream",
+            keep_alive and chunked,
+            {"Cache-Control": "no-cache"},
+            framing="chunked" if chunked else "close",
+            version=version,
+        )
+    )
+    try:
+        while True:
+            event = await loop.run_in_executor(EXECUTOR, next, events, None)
+            if event is None:
+                break
+            writer.write(b"%x\r\n%s\r\n" % (len(event), event) if chunked else event)
+            await writer.drain()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+    finally:
+        try:
+            events.close()
+        except ValueError:
+            # Still running in the executor after a cancelled await.
+            pass
+
+
+async def _handle_connection(
+    routes: Routes, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except (BadRequest, ValueError, asyncio.LimitOverrunError) as exc:
+                status = getattr(exc, "status", HTTPStatus.BAD_REQUEST)
+                message = f"{status.phrase}.".encode("ascii")
+                writer.write(
+                    _encode_response(status, message, "text/plain; charset=utf-8", False)
+                )
+                await writer.drain()
+                return
+            if request is None:
+                return
+            method, path, version, headers, body = request
+            keep_alive = _keep_alive(version, headers)
+            stream = None
+            if method == "POST" and path.partition("?")[0] in routes.stream_paths:
+                stream = await asyncio.get_running_loop().run_in_executor(
+                    EXECUTOR, routes.stream, path, _parse_body(body)
+                )
+            if isinstance(stream, tuple):
+                payload, status = stream
+                writer.write(
+                    _encode_response(
+                        status,
+                        fastjson.dumps(payload),
+                        "application/json",
+                        keep_alive,
+                        version=version,
+                    )
+                )
+            elif stream is not None:
+                await _stream_events(writer, stream, keep_alive, version)
+                # Without chunks the body ends when the connection does.
+                keep_alive = keep_alive and version != "HTTP/1.0"
+            else:
+                writer.write(
+                    await _respond(routes, method, path, version, headers, body, keep_alive)
+                )
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.IncompleteReadError):
+        return
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def _serve(host: str, port: int, routes: Routes) -> None:
+    server = await asyncio.start_server(
+        functools.partial(_handle_connection, routes),
+        host,
+        port,
+        limit=MAX_HEADER_BYTES,
+        backlog=int(os.getenv("LEGACY_BACKLOG", "2048")),
+        reuse_address=True,
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def serve(host: str, port: int, routes: Routes) -> None:
+    try:
+        asyncio.run(_serve(host, port, routes))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        EXECUTOR.shutdown(wait=False, cancel_futures=True)
@@ -3,31 +3,74 @@ from __future__ import annotations
 import json
 import os
 import random
+import tempfile
+import threading
+import time
 from dataclasses import dataclass, field
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
-from typing import Any
+from typing import Any, Callable, Iterator, Mapping
+from urllib.parse import parse_qs
 
+from assets import AssetCache, static_routes
 from engine import (
     Card,
     build_wild_ranks,
     card_to_dict,
     create_deck,
     shuffle,
-    best_hand_for_player,
+    best_hand_on_board,
+    prepare_board,
     compare_high,
     compare_low,
 )
-from sim import compute_iterations, simulate_odds, estimate_player_odds
+import core_path  # noqa: F401
+import fastjson
+from server.core.profiling import ProfileStore, profile_request, profiling_requested
+from server.core.sampling import SAMPLING_MODES
+from server.core.scheduler import PRIORITY_NAMES, EquityScheduler
+from sim import (
+    _heuristic_odds,
+    cached_odds,
+    compute_iterations,
+    estimate_player_odds,
+    estimate_street_odds,
+    iter_simulation,
+    simulate_odds,
+)
 
 ALLOWED_BETS = [0.05, 0.10, 0.15, 0.20, 0.25]
 ANTE = 0.05
 MAX_RAISES = 3
 HERO_INDEX = 0
+SIM_MAX_TIME_MS = int(os.getenv("SIM_MAX_TIME_MS", "8000"))
+SIM_STREAM_INTERVAL_MS = int(os.getenv("SIM_STREAM_INTERVAL_MS", "250"))
+SIM_STREAM_MAX_ITERATIONS = int(os.getenv("SIM_STREAM_MAX_ITERATIONS", "20000"))
+SIM_SAMPLING = os.getenv("SIM_SAMPLING", "stratified")
+# Simulations wait in a priority queue for one of SIM_WORKERS threads;
+# whatever misses its SIM_MAX_TIME_MS deadline is answered from the last
+# result for the same street or the heuristic.
+SIM_SCHEDULER = EquityScheduler(
+    workers=int(os.getenv("SIM_WORKERS", "2")),
+    max_queue=int(os.getenv("SIM_MAX_QUEUE", "16")),
+)
+SIM_PRIORITIES = {name: priority for priority, name in PRIORITY_NAMES.items()}
+PROFILES = ProfileStore(
+    os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "tyler-trainer-profiles"))
+)
+SIM_METHOD_NOTES = {
+    "exact_board": "board runouts enumerated, sampled opponents",
+    "sampled": "sampled deals",
+}
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 STATIC_DIR = os.path.join(ROOT, "static")
 INDEX_PATH = os.path.join(ROOT, "index.html")
+ASSETS = AssetCache(
+    static_routes(INDEX_PATH, STATIC_DIR),
+    dev=os.getenv("LEGACY_DEV") == "1",
+    max_age=int(os.getenv("STATIC_MAX_AGE", "3600")),
+)
 
 
 @dataclass
@@ -51,9 +94,16 @@ class GameState:
     pending_players: list[int] = field(default_factory=list)
     game_over: bool = False
     message: str = ""
+    wild_cache: dict[int, set[str]] = field(default_factory=dict, repr=False)
+    street_odds: dict[int, float] = field(default_factory=dict, repr=False)
+    street_odds_key: tuple[int, int] | None = field(default=None, repr=False)
 
 
 STATE: GameState | None = None
+STATE_LOCK = threading.RLock()
+# Last completed /simulate result, answered again when a later request for
+# the same street misses its deadline.
+SIM_ODDS_CACHE: dict[tuple, dict] = {}
 
 
 def _active_players(state: GameState) -> list[int]:
@@ -90,12 +140,21 @@ def _deal_new_hand(state: GameState) -> None:
         state.community_pairs.append([deck.pop(), deck.pop()])
 
     state.revealed_pairs = 0
+    state.wild_cache = {}
     state.folded = [False for _ in range(state.player_count)]
     state.last_action = ["" for _ in range(state.player_count)]
     state.pot_total = round(ANTE * state.player_count, 2)
     _reset_betting_round(state)
 
 
+def _wild_ranks(state: GameState, revealed_pairs: int) -> set[str]:
+    wild_ranks = state.wild_cache.get(revealed_pairs)
+    if wild_ranks is None:
+        wild_ranks = build_wild_ranks(state.community_pairs, revealed_pairs)
+        state.wild_cache[revealed_pairs] = wild_ranks
+    return wild_ranks
+
+
 def _start_next_round(state: GameState) -> None:
     state.round_number += 1
     state.start_index = (state.start_index + 1) % state.player_count
@@ -114,19 +173,12 @@ def _end_game(state: GameState, message: str) -> None:
 
 
 def _showdown(state: GameState) -> tuple[list[int], list[int], bool]:
-    wild_ranks = build_wild_ranks(state.community_pairs, 5)
+    wild_ranks = _wild_ranks(state, 5)
     community = [card for pair in state.community_pairs for card in pair]
     active = _active_players(state)
 
-    bests = {
-        i: best_hand_for_player(
-            state.hands[i],
-            community,
-            wild_ranks,
-            state.natural_low_enabled,
-        )
-        for i in active
-    }
+    board = prepare_board(community, wild_ranks, state.natural_low_enabled)
+    bests = {i: best_hand_on_board(state.hands[i], board) for i in active}
 
     high_winners = []
     low_winners = []
@@ -183,16 +235,33 @@ def _finish_hand(state: GameState, reason: str) -> None:
         _start_next_round(state)
 
 
+def _street_odds(state: GameState) -> dict[int, float]:
+    key = (state.round_number, state.revealed_pairs)
+    if state.street_odds_key != key:
+        state.street_odds = estimate_street_odds(
+            player_count=state.player_count,
+            hands={idx: state.hands[idx] for idx in _active_players(state) if idx != HERO_INDEX},
+            community_pairs=state.community_pairs,
+            revealed_pairs=state.revealed_pairs,
+            high_low_enabled=state.high_low_enabled,
+            natural_low_enabled=state.natural_low_enabled,
+            wild_ranks=_wild_ranks(state, state.revealed_pairs),
+        )
+        state.street_odds_key = key
+    return state.street_odds
+
+
 def _ai_action_for_player(state: GameState, player_index: int) -> tuple[str, float]:
-    player_hand = state.hands[player_index]
-    odds = estimate_player_odds(
-        player_count=state.player_count,
-        hero_hand=player_hand,
-        community_pairs=state.community_pairs,
-        revealed_pairs=state.revealed_pairs,
-        high_low_enabled=state.high_low_enabled,
-        natural_low_enabled=state.natural_low_enabled,
-    )
+    odds = _street_odds(state).get(player_index)
+    if odds is None:
+        odds = estimate_player_odds(
+            player_count=state.player_count,
+            hero_hand=state.hands[player_index],
+            community_pairs=state.community_pairs,
+            revealed_pairs=state.revealed_pairs,
+            high_low_enabled=state.high_low_enabled,
+            natural_low_enabled=state.natural_low_enabled,
+        )
     roll = random.random()
 
     if state.current_bet == 0:
@@ -214,7 +283,7 @@ def _ai_action_for_player(state: GameState, player_index: int) -> tuple[str, flo
 
 
 def _serialize_state(state: GameState) -> dict[str, Any]:
-    wild_ranks = build_wild_ranks(state.community_pairs, state.revealed_pairs)
+    wild_ranks = _wild_ranks(state, state.revealed_pairs)
     return {
         "player_count": state.player_count,
         "dealer_index": state.dealer_index,
@@ -243,6 +312,12 @@ def _serialize_state(state: GameState) -> dict[str, Any]:
     }
 
 
+def _error_payload(state: GameState, message: str) -> dict[str, Any]:
+    payload = _serialize_state(state)
+    payload["error"] = message
+    return payload
+
+
 def _ensure_state() -> GameState:
     global STATE
     if STATE is None:
@@ -260,35 +335,57 @@ def _read_json(handler: BaseHTTPRequestHandler) -> dict:
         return {}
 
 
-def _send_json(handler: BaseHTTPRequestHandler, payload: dict, status: int = 200) -> None:
-    data = json.dumps(payload).encode("utf-8")
+def _send_json(
+    handler: BaseHTTPRequestHandler,
+    payload: dict,
+    status: int = 200,
+    headers: dict[str, str] | None = None,
+) -> None:
+    data = fastjson.dumps(payload)
     handler.send_response(status)
     handler.send_header("Content-Type", "application/json")
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
     handler.send_header("Content-Length", str(len(data)))
     handler.end_headers()
     handler.wfile.write(data)
 
 
-def _send_file(handler: BaseHTTPRequestHandler, path: str, content_type: str) -> None:
-    if not os.path.exists(path):
-        handler.send_error(HTTPStatus.NOT_FOUND)
-        return
-    with open(path, "rb") as f:
-        data = f.read()
+def _send_event_stream(handler: BaseHTTPRequestHandler, events: Iterator[bytes]) -> None:
+    # HTTP/1.0 handler: the stream is delimited by closing the connection.
     handler.send_response(HTTPStatus.OK)
-    handler.send_header("Content-Type", content_type)
-    handler.send_header("Content-Length", str(len(data)))
+    handler.send_header("Content-Type", "text/event-stream")
+    handler.send_header("Cache-Control", "no-cache")
     handler.end_headers()
-    handler.wfile.write(data)
+    handler.close_connection = True
+    try:
+        for event in events:
+            handler.wfile.write(event)
+            handler.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+        # The client cancelled; closing the generator stops the simulation.
+        pass
+    finally:
+        events.close()
 
 
-def _handle_action(state: GameState, player_index: int, action_type: str, amount: float) -> dict:
+def _send_asset(handler: BaseHTTPRequestHandler, status: int, headers: dict[str, str], body: bytes) -> None:
+    handler.send_response(status)
+    for name, value in headers.items():
+        handler.send_header(name, value)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    if handler.command != "HEAD":
+        handler.wfile.write(body)
+
+
+def _apply_action(state: GameState, player_index: int, action_type: str, amount: float) -> str | None:
     if state.game_over:
-        return {"error": "Game is over.", **_serialize_state(state)}
+        return "Game is over."
     if player_index != state.current_actor:
-        return {"error": "Not this player's turn.", **_serialize_state(state)}
+        return "Not this player's turn."
     if state.folded[player_index]:
-        return {"error": "Player already folded.", **_serialize_state(state)}
+        return "Player already folded."
 
     if action_type == "fold":
         state.folded[player_index] = True
@@ -304,9 +401,9 @@ def _handle_action(state: GameState, player_index: int, action_type: str, amount
             state.pending_players.remove(player_index)
     elif action_type == "raise":
         if amount not in ALLOWED_BETS:
-            return {"error": "Invalid raise amount.", **_serialize_state(state)}
+            return "Invalid raise amount."
         if state.raises_this_round >= MAX_RAISES:
-            return {"error": "Max raises reached.", **_serialize_state(state)}
+            return "Max raises reached."
         new_bet = state.current_bet + amount
         raise_amount = max(new_bet - state.contrib_this_round[player_index], 0.0)
         state.pot_total = round(state.pot_total + raise_amount, 2)
@@ -316,12 +413,12 @@ def _handle_action(state: GameState, player_index: int, action_type: str, amount
         state.last_action[player_index] = f"Raise {amount:.2f}"
         state.pending_players = [i for i in _active_players(state) if i != player_index]
     else:
-        return {"error": "Invalid action.", **_serialize_state(state)}
+        return "Invalid action."
 
     active_players = _active_players(state)
     if len(active_players) == 1:
         _finish_hand(state, "folded")
-        return _serialize_state(state)
+        return None
 
     if not state.pending_players:
         if state.revealed_pairs < 5:
@@ -330,176 +427,385 @@ def _handle_action(state: GameState, player_index: int, action_type: str, amount
             state.message = f"Reveal pair {state.revealed_pairs}."
         else:
             _finish_hand(state, "showdown")
-        return _serialize_state(state)
+        return None
 
     next_actor = _next_pending_player(state, player_index)
     state.current_actor = next_actor if next_actor is not None else state.start_index
+    return None
+
+
+def _handle_action(state: GameState, player_index: int, action_type: str, amount: float) -> dict:
+    error = _apply_action(state, player_index, action_type, amount)
+    if error:
+        return _error_payload(state, error)
     return _serialize_state(state)
 
 
+def _auto_play(state: GameState, max_steps: int = 50) -> list[dict[str, Any]]:
+    trace: list[dict[str, Any]] = []
+    steps = 0
+    while not state.game_over:
+        steps += 1
+        if steps > max_steps:
+            break
+        actor = state.current_actor
+        if actor == HERO_INDEX and not state.folded[HERO_INDEX]:
+            break
+        if state.folded[actor]:
+            if actor in state.pending_players:
+                state.pending_players.remove(actor)
+            state.current_actor = _next_pending_player(state, actor) or state.start_index
+            continue
+        round_number = state.round_number
+        revealed_pairs = state.revealed_pairs
+        action_type, amount = _ai_action_for_player(state, actor)
+        error = _apply_action(state, actor, action_type, amount)
+        if error:
+            break
+        trace.append(
+            {
+                "player_index": actor,
+                "action": action_type,
+                "amount": amount,
+                "label": state.last_action[actor] or action_type.capitalize(),
+                "round_number": round_number,
+                "revealed_pairs": revealed_pairs,
+            }
+        )
+    return trace
+
+
+def _route_new_game(data: dict) -> tuple[dict, int]:
+    global STATE
+    player_count = int(data.get("player_count", 4))
+    player_count = max(2, min(8, player_count))
+    high_low = bool(data.get("high_low", True))
+    natural_low = bool(data.get("natural_low", True))
+
+    start_index = 1 % player_count
+    STATE = GameState(
+        player_count=player_count,
+        dealer_index=0,
+        start_index=start_index,
+        current_actor=start_index,
+        high_low_enabled=high_low,
+        natural_low_enabled=natural_low,
+    )
+    _deal_new_hand(STATE)
+    STATE.message = "New game started."
+    return _serialize_state(STATE), 200
+
+
+def _route_reveal_next(data: dict) -> tuple[dict, int]:
+    state = _ensure_state()
+    if state.game_over:
+        return _error_payload(state, "Game is over."), 400
+    if state.revealed_pairs >= 5:
+        return _serialize_state(state), 200
+    state.revealed_pairs += 1
+    _reset_betting_round(state)
+    state.message = f"Reveal pair {state.revealed_pairs}."
+    return _serialize_state(state), 200
+
+
+def _route_action(data: dict) -> tuple[dict, int]:
+    state = _ensure_state()
+    player_index = int(data.get("player_index", -1))
+    action_type = data.get("action", "")
+    amount = float(data.get("amount", 0)) if data.get("amount") is not None else 0.0
+    payload = _handle_action(state, player_index, action_type, amount)
+    return payload, 400 if "error" in payload else 200
+
+
+def _route_opponent_action(data: dict) -> tuple[dict, int]:
+    state = _ensure_state()
+    if state.game_over:
+        return _error_payload(state, "Game is over."), 400
+    player_index = int(data.get("player_index", -1))
+    if player_index == HERO_INDEX:
+        return _error_payload(state, "Hero cannot use opponent action."), 400
+    if player_index != state.current_actor:
+        return _error_payload(state, "Not this player's turn."), 400
+    if state.folded[player_index]:
+        return _error_payload(state, "Player already folded."), 400
+    action_type, amount = _ai_action_for_player(state, player_index)
+    payload = _handle_action(state, player_index, action_type, amount)
+    return payload, 400 if "error" in payload else 200
+
+
+def _route_all_action(data: dict) -> tuple[dict, int]:
+    state = _ensure_state()
+    if state.game_over:
+        return _error_payload(state, "Game is over."), 400
+
+    trace = _auto_play(state)
+    payload = _serialize_state(state)
+    payload["action_trace"] = trace
+    return payload, 200
+
+
+def _recommendation(odds: dict, pot: float, call_cost: float, high_low_enabled: bool) -> dict:
+    split_win = (odds["high"] + odds["low"]) / 2 if high_low_enabled else odds["high"]
+    expected = pot * split_win - call_cost
+
+    decision = "Bet/Call" if expected >= 0 else "Check/Fold"
+    if odds["iterations_run"] == 0:
+        sim_note = " Heuristic estimate (no Monte Carlo iterations)."
+    else:
+        method = SIM_METHOD_NOTES.get(odds.get("method"), "sampled deals")
+        sim_note = (
+            f" Simulation ({method}) ran {odds['iterations_run']} iterations"
+            f" in {odds['elapsed_ms'] / 1000:.1f}s"
+            f"{' (time cap reached).' if odds['time_capped'] else '.'}"
+        )
+    return {
+        "decision": decision,
+        "ev": round(expected, 2),
+        "detail": f"EV uses split-pot odds and your call cost.{sim_note}",
+        "betting_constraints": (
+            f"Betting caps: max bet/raise $0.25, up to {MAX_RAISES} raises per round."
+        ),
+    }
+
+
+def _route_simulate(data: dict) -> tuple[dict | Callable[[], dict], int]:
+    # Inputs are captured under the state lock; the returned callable
+    # waits for the scheduler after dispatch_post has released it.
+    state = _ensure_state()
+    if state.game_over:
+        return _error_payload(state, "Game is over."), 400
+    sampling = data.get("sampling") or SIM_SAMPLING
+    if sampling not in SAMPLING_MODES:
+        return _error_payload(state, f"sampling must be one of {', '.join(SAMPLING_MODES)}."), 400
+    priority = SIM_PRIORITIES.get(data.get("priority") or "interactive")
+    if priority is None:
+        return _error_payload(state, "priority must be interactive or batch."), 400
+
+    inputs = {
+        "player_count": state.player_count,
+        "hero_hand": list(state.hands[HERO_INDEX]),
+        "community_pairs": [list(pair) for pair in state.community_pairs],
+        "revealed_pairs": state.revealed_pairs,
+        "high_low_enabled": state.high_low_enabled,
+        "natural_low_enabled": state.natural_low_enabled,
+    }
+    key = (
+        tuple(card.code for card in inputs["hero_hand"]),
+        tuple(card.code for pair in inputs["community_pairs"] for card in pair),
+        state.revealed_pairs,
+        state.player_count,
+        state.high_low_enabled,
+        state.natural_low_enabled,
+    )
+    iterations = compute_iterations(state.player_count, state.revealed_pairs)
+    call_cost = max(state.current_bet - state.contrib_this_round[HERO_INDEX], 0.0)
+    pot = state.pot_total
+    state_payload = _serialize_state(state)
+
+    def job(deadline: float) -> dict:
+        return simulate_odds(
+            **inputs,
+            iterations=iterations,
+            max_time_ms=max(int((deadline - time.perf_counter()) * 1000), 0),
+            sampling=sampling,
+        )
+
+    def fallback() -> dict:
+        cached = SIM_ODDS_CACHE.get(key)
+        if cached is not None:
+            return {**cached, "cached": True}
+        # Any other process's estimate beats the heuristic, however short.
+        shared = cached_odds(**inputs)
+        if shared is not None:
+            return {**shared, "elapsed_ms": 0, "cached": True}
+        return {
+            **_heuristic_odds(**inputs),
+            "elapsed_ms": 0,
+            "method": "heuristic",
+        }
+
+    def finish() -> dict:
+        odds, outcome = SIM_SCHEDULER.run(
+            job, fallback=fallback, timeout_ms=SIM_MAX_TIME_MS, priority=priority
+        )
+        if outcome == "computed" and odds.get("iterations_run"):
+            SIM_ODDS_CACHE.clear()
+            SIM_ODDS_CACHE[key] = odds
+        odds = {**odds, "scheduler": outcome}
+        return {
+            "odds": odds,
+            "recommendation": _recommendation(odds, pot, call_cost, inputs["high_low_enabled"]),
+            **state_payload,
+        }
+
+    return finish, 200
+
+
+def _sse_event(event: str, payload: dict) -> bytes:
+    return b"event: " + event.encode("ascii") + b"\ndata: " + fastjson.dumps(payload) + b"\n\n"
+
+
+def _simulation_events(
+    simulation: Iterator[dict], pot: float, call_cost: float, high_low_enabled: bool
+) -> Iterator[bytes]:
+    try:
+        for odds in simulation:
+            if not odds["done"]:
+                yield _sse_event("progress", odds)
+                continue
+            recommendation = _recommendation(odds, pot, call_cost, high_low_enabled)
+            yield _sse_event("done", {"odds": odds, "recommendation": recommendation})
+    finally:
+        simulation.close()
+
+
+def _stream_simulate(data: dict) -> tuple[dict, int] | Iterator[bytes]:
+    # Inputs are copied under the state lock; the simulation itself runs
+    # lock-free while the caller pulls events, and stops when it stops.
+    state = _ensure_state()
+    if state.game_over:
+        return _error_payload(state, "Game is over."), 400
+    try:
+        max_iterations = int(data.get("max_iterations") or SIM_STREAM_MAX_ITERATIONS)
+    except (TypeError, ValueError):
+        return _error_payload(state, "max_iterations must be a number."), 400
+    sampling = data.get("sampling") or SIM_SAMPLING
+    if sampling not in SAMPLING_MODES:
+        return _error_payload(state, f"sampling must be one of {', '.join(SAMPLING_MODES)}."), 400
+    simulation = iter_simulation(
+        player_count=state.player_count,
+        hero_hand=list(state.hands[HERO_INDEX]),
+        community_pairs=[list(pair) for pair in state.community_pairs],
+        revealed_pairs=state.revealed_pairs,
+        high_low_enabled=state.high_low_enabled,
+        natural_low_enabled=state.natural_low_enabled,
+        max_time_ms=SIM_MAX_TIME_MS,
+        max_iterations=max(1, min(max_iterations, SIM_STREAM_MAX_ITERATIONS)),
+        report_every_ms=SIM_STREAM_INTERVAL_MS,
+        sampling=sampling,
+    )
+    call_cost = max(state.current_bet - state.contrib_this_round[HERO_INDEX], 0.0)
+    return _simulation_events(simulation, state.pot_total, call_cost, state.high_low_enabled)
+
+
+POST_ROUTES = {
+    "/new_game": _route_new_game,
+    "/reveal_next": _route_reveal_next,
+    "/action": _route_action,
+    "/opponent_action": _route_opponent_action,
+    "/all_action": _route_all_action,
+    "/simulate": _route_simulate,
+}
+
+
+def dispatch_post(
+    path: str, data: dict, headers: Mapping[str, str] | None = None
+) -> tuple[dict, int, dict[str, str]] | None:
+    route_path, _, query = path.partition("?")
+    route = POST_ROUTES.get(route_path)
+    if route is None:
+        return None
+    query_params = {key: values[-1] for key, values in parse_qs(query).items()}
+    response_headers: dict[str, str] = {}
+    profiled = profiling_requested(headers or {}, query_params)
+    with profile_request(profiled, response_headers, store=PROFILES):
+        with STATE_LOCK:
+            payload, status = route(data)
+        # Routes that queue equity work hand back a callable so the wait
+        # happens outside the state lock.
+        if callable(payload):
+            payload = payload()
+    return payload, status, response_headers
+
+
+STREAM_ROUTES = {
+    "/simulate/stream": _stream_simulate,
+}
+
+
+def dispatch_stream(path: str, data: dict) -> tuple[dict, int] | Iterator[bytes] | None:
+    route = STREAM_ROUTES.get(path.partition("?")[0])
+    if route is None:
+        return None
+    with STATE_LOCK:
+        return route(data)
+
+
+def _render_metrics() -> str:
+    lines = [
+        "# HELP legacy_sim_jobs_total Scheduled simulations by priority and outcome.",
+        "# TYPE legacy_sim_jobs_total counter",
+    ]
+    for (priority, outcome), count in sorted(SIM_SCHEDULER.counts.items()):
+        lines.append(f'legacy_sim_jobs_total{{priority="{priority}",outcome="{outcome}"}} {count}')
+    lines += [
+        "# HELP legacy_sim_queue_depth Simulations waiting for a worker.",
+        "# TYPE legacy_sim_queue_depth gauge",
+        f"legacy_sim_queue_depth {SIM_SCHEDULER.queue_depth()}",
+        "# HELP legacy_sim_shed_rate Share of simulations answered by a fallback estimate.",
+        "# TYPE legacy_sim_shed_rate gauge",
+        f"legacy_sim_shed_rate {SIM_SCHEDULER.shed_rate()!r}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def dispatch_get(
+    path: str, accept_encoding: str = "", if_none_match: str = ""
+) -> tuple[int, dict[str, str], bytes] | None:
+    route_path = path.split("?", 1)[0]
+    if route_path == "/metrics":
+        return 200, {"Content-Type": "text/plain; version=0.0.4"}, _render_metrics().encode("utf-8")
+    if route_path.startswith("/profiles/"):
+        folded = PROFILES.load(route_path[len("/profiles/") :])
+        if folded is None:
+            return None
+        return 200, {"Content-Type": "text/plain; charset=utf-8"}, folded.encode("utf-8")
+    return ASSETS.respond(route_path, accept_encoding, if_none_match)
+
+
 class Handler(BaseHTTPRequestHandler):
     def do_GET(self) -> None:
-        if self.path == "/" or self.path == "/index.html":
-            _send_file(self, INDEX_PATH, "text/html; charset=utf-8")
-            return
-        if self.path.startswith("/static/"):
-            rel = self.path.replace("/static/", "", 1)
-            file_path = os.path.join(STATIC_DIR, rel)
-            if file_path.endswith(".css"):
-                content_type = "text/css; charset=utf-8"
-            elif file_path.endswith(".js"):
-                content_type = "text/javascript; charset=utf-8"
-            else:
-                content_type = "application/octet-stream"
-            _send_file(self, file_path, content_type)
+        result = dispatch_get(
+            self.path,
+            self.headers.get("Accept-Encoding", ""),
+            self.headers.get("If-None-Match", ""),
+        )
+        if result is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
             return
-        self.send_error(HTTPStatus.NOT_FOUND)
+        _send_asset(self, *result)
 
-    def do_POST(self) -> None:
-        if self.path == "/new_game":
-            data = _read_json(self)
-            player_count = int(data.get("player_count", 4))
-            player_count = max(2, min(8, player_count))
-            high_low = bool(data.get("high_low", True))
-            natural_low = bool(data.get("natural_low", True))
-
-            global STATE
-            start_index = 1 % player_count
-            STATE = GameState(
-                player_count=player_count,
-                dealer_index=0,
-                start_index=start_index,
-                current_actor=start_index,
-                high_low_enabled=high_low,
-                natural_low_enabled=natural_low,
-            )
-            _deal_new_hand(STATE)
-            STATE.message = "New game started."
-            _send_json(self, _serialize_state(STATE))
-            return
+    do_HEAD = do_GET
 
-        if self.path == "/reveal_next":
-            state = _ensure_state()
-            if state.game_over:
-                _send_json(self, {"error": "Game is over.", **_serialize_state(state)}, 400)
-                return
-            if state.revealed_pairs >= 5:
-                _send_json(self, _serialize_state(state))
-                return
-            state.revealed_pairs += 1
-            _reset_betting_round(state)
-            state.message = f"Reveal pair {state.revealed_pairs}."
-            _send_json(self, _serialize_state(state))
+    def do_POST(self) -> None:
+        data = _read_json(self)
+        stream = dispatch_stream(self.path, data)
+        if isinstance(stream, tuple):
+            _send_json(self, *stream)
             return
-
-        if self.path == "/action":
-            state = _ensure_state()
-            data = _read_json(self)
-            player_index = int(data.get("player_index", -1))
-            action_type = data.get("action", "")
-            amount = float(data.get("amount", 0)) if data.get("amount") is not None else 0.0
-            payload = _handle_action(state, player_index, action_type, amount)
-            status = 400 if "error" in payload else 200
-            _send_json(self, payload, status)
+        if stream is not None:
+            _send_event_stream(self, stream)
             return
-
-        if self.path == "/opponent_action":
-            state = _ensure_state()
-            if state.game_over:
-                _send_json(self, {"error": "Game is over.", **_serialize_state(state)}, 400)
-                return
-            data = _read_json(self)
-            player_index = int(data.get("player_index", -1))
-            if player_index == HERO_INDEX:
-                _send_json(self, {"error": "Hero cannot use opponent action.", **_serialize_state(state)}, 400)
-                return
-            if player_index != state.current_actor:
-                _send_json(self, {"error": "Not this player's turn.", **_serialize_state(state)}, 400)
-                return
-            if state.folded[player_index]:
-                _send_json(self, {"error": "Player already folded.", **_serialize_state(state)}, 400)
-                return
-            action_type, amount = _ai_action_for_player(state, player_index)
-            payload = _handle_action(state, player_index, action_type, amount)
-            status = 400 if "error" in payload else 200
-            _send_json(self, payload, status)
+        result = dispatch_post(self.path, data, self.headers)
+        if result is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
             return
+        _send_json(self, *result)
 
-        if self.path == "/all_action":
-            state = _ensure_state()
-            if state.game_over:
-                _send_json(self, {"error": "Game is over.", **_serialize_state(state)}, 400)
-                return
-
-            loop_guard = 0
-            while not state.game_over:
-                loop_guard += 1
-                if loop_guard > 50:
-                    break
-                if state.current_actor == HERO_INDEX and not state.folded[HERO_INDEX]:
-                    break
-                if state.folded[state.current_actor]:
-                    if state.current_actor in state.pending_players:
-                        state.pending_players.remove(state.current_actor)
-                    state.current_actor = _next_pending_player(state, state.current_actor) or state.start_index
-                    continue
-                action_type, amount = _ai_action_for_player(state, state.current_actor)
-                _handle_action(state, state.current_actor, action_type, amount)
-            _send_json(self, _serialize_state(state))
-            return
 
-        if self.path == "/simulate":
-            state = _ensure_state()
-            if state.game_over:
-                _send_json(self, {"error": "Game is over.", **_serialize_state(state)}, 400)
-                return
-
-            hero_hand = state.hands[HERO_INDEX]
-            iterations = compute_iterations(state.player_count, state.revealed_pairs)
-            odds = simulate_odds(
-                player_count=state.player_count,
-                hero_hand=hero_hand,
-                community_pairs=state.community_pairs,
-                revealed_pairs=state.revealed_pairs,
-                iterations=iterations,
-                max_time_ms=int(os.getenv("SIM_MAX_TIME_MS", "8000")),
-                high_low_enabled=state.high_low_enabled,
-                natural_low_enabled=state.natural_low_enabled,
-            )
+def main() -> None:
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", "3000"))
+    if os.getenv("LEGACY_SERVER", "threading") == "asyncio":
+        from aio_server import Routes, serve
 
-            call_cost = max(state.current_bet - state.contrib_this_round[HERO_INDEX], 0.0)
-            pot = state.pot_total
-            split_win = (odds["high"] + odds["low"]) / 2 if state.high_low_enabled else odds["high"]
-            expected = pot * split_win - call_cost
-
-            decision = "Bet/Call" if expected >= 0 else "Check/Fold"
-            if odds["iterations_run"] == 0:
-                sim_note = " Heuristic estimate (no Monte Carlo iterations)."
-            else:
-                sim_note = (
-                    f" Simulation ran {odds['iterations_run']} iterations in {odds['elapsed_ms'] / 1000:.1f}s"
-                    f"{' (time cap reached).' if odds['time_capped'] else '.'}"
-                )
-
-            payload = {
-                "odds": odds,
-                "recommendation": {
-                    "decision": decision,
-                    "ev": round(expected, 2),
-                    "detail": f"EV uses split-pot odds and your call cost.{sim_note}",
-                    "betting_constraints": (
-                        f"Betting caps: max bet/raise $0.25, up to {MAX_RAISES} raises per round."
-                    ),
-                },
-                **_serialize_state(state),
-            }
-            _send_json(self, payload)
-            return
-
-        self.send_error(HTTPStatus.NOT_FOUND)
+        print(f"Tyler trainer (asyncio) running at http://localhost:{port}")
+        serve(host, port, Routes(dispatch_get, dispatch_post, dispatch_stream, STREAM_ROUTES))
+        return
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Tyler trainer running at http://localhost:{port}")
+    server.serve_forever()
 
 
 if __name__ == "__main__":
-    server = ThreadingHTTPServer(("0.0.0.0", 3000), Handler)
-    print("Tyler trainer running at http://localhost:3000")
-    server.serve_forever()
+    main()
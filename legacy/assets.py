@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import threading
+from dataclasses import dataclass, field
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".ico": "image/x-icon",
+}
+COMPRESSIBLE_PREFIXES = ("text/", "application/json", "image/svg+xml")
+MIN_COMPRESS_BYTES = 256
+
+
+@dataclass
+class Asset:
+    path: str
+    content_type: str
+    cache_control: str
+    mtime_ns: int
+    etag: str
+    bodies: dict[str, bytes] = field(default_factory=dict)
+
+
+def _content_type(path: str) -> str:
+    return CONTENT_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+
+def _load_asset(path: str, cache_control: str) -> Asset:
+    stat = os.stat(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    content_type = _content_type(path)
+    digest = hashlib.sha1(data).hexdigest()[:20]
+    bodies = {"identity": data}
+    if content_type.startswith(COMPRESSIBLE_PREFIXES) and len(data) >= MIN_COMPRESS_BYTES:
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            bodies["gzip"] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                bodies["br"] = compressed
+    return Asset(
+        path=path,
+        content_type=content_type,
+        cache_control=cache_control,
+        mtime_ns=stat.st_mtime_ns,
+        etag=digest,
+        bodies=bodies,
+    )
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted: set[str] = set()
+    for token in accept_encoding.split(","):
+        name, _, params = token.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if quality > 0:
+            accepted.add(name)
+    return accepted
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        # Encoded representations carry a suffix; any of them validates the same bytes.
+        if candidate.split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+class AssetCache:
+    def __init__(self, routes: dict[str, str], *, dev: bool = False, max_age: int = 3600) -> None:
+        self.dev = dev
+        self.max_age = max_age
+        self._routes = dict(routes)
+        self._assets: dict[str, Asset] = {}
+        self._lock = threading.Lock()
+        for url_path, path in self._routes.items():
+            if os.path.isfile(path):
+                self._assets[url_path] = _load_asset(path, self._cache_control(path))
+
+    def _cache_control(self, path: str) -> str:
+        if self.dev or path.endswith(".html"):
+            return "no-cache"
+        return f"public, max-age={self.max_age}"
+
+    def get(self, url_path: str) -> Asset | None:
+        asset = self._assets.get(url_path)
+        if not self.dev:
+            return asset
+        path = asset.path if asset else self._routes.get(url_path)
+        if path is None or not os.path.isfile(path):
+            return None
+        if asset is None or os.stat(path).st_mtime_ns != asset.mtime_ns:
+            with self._lock:
+                asset = _load_asset(path, self._cache_control(path))
+                self._assets[url_path] = asset
+        return asset
+
+    def respond(
+        self, url_path: str, accept_encoding: str = "", if_none_match: str = ""
+    ) -> tuple[int, dict[str, str], bytes] | None:
+        asset = self.get(url_path)
+        if asset is None:
+            return None
+
+        accepted = _accepted_encodings(accept_encoding)
+        encoding = "identity"
+        for candidate in ("br", "gzip"):
+            if candidate in asset.bodies and candidate in accepted:
+                encoding = candidate
+                break
+        etag = asset.etag if encoding == "identity" else f"{asset.etag}-{encoding}"
+        headers = {
+            "Content-Type": asset.content_type,
+            "Cache-Control": asset.cache_control,
+            "ETag": f'"{etag}"',
+            "Vary": "Accept-Encoding",
+        }
+        if if_none_match and _etag_matches(if_none_match, asset.etag):
+            return 304, headers, b""
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return 200, headers, asset.bodies[encoding]
+
+
+def static_routes(index_path: str, static_dir: str) -> dict[str, str]:
+    routes = {"/": index_path, "/index.html": index_path}
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, static_dir).replace(os.sep, "/")
+            routes[f"/static/{rel}"] = path
+    return routes
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+import os
+import sys
+
+# The legacy server runs from this directory but shares server/core with
+# the module server. Importing this puts the repository root on sys.path.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
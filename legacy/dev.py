@@ -9,16 +9,21 @@ import threading
 import time
 
 try:
-    from watchfiles import watch
+    from watchfiles import Change, watch
 except ImportError:  # pragma: no cover
     print("Missing dependency: watchfiles. Run: pip install -r requirements-dev.txt")
     sys.exit(1)
 
 
+ASSET_PATHS = [
+    os.path.join(os.getcwd(), "index.html"),
+    os.path.join(os.getcwd(), "static"),
+]
 WATCH_PATHS = [
     os.path.join(os.getcwd(), "app.py"),
     os.path.join(os.getcwd(), "engine.py"),
     os.path.join(os.getcwd(), "sim.py"),
+    os.path.join(os.path.dirname(os.getcwd()), "server", "core"),
     os.path.join(os.getcwd(), "index.html"),
     os.path.join(os.getcwd(), "static"),
 ]
@@ -31,7 +36,8 @@ class Runner:
         self.stop_event = threading.Event()
 
     def start(self) -> None:
-        self.process = subprocess.Popen([sys.executable, "app.py"])
+        env = {**os.environ, "LEGACY_DEV": "1"}
+        self.process = subprocess.Popen([sys.executable, "app.py"], env=env)
 
     def stop(self) -> None:
         if not self.process:
@@ -57,8 +63,18 @@ class Runner:
                 self.restart()
 
 
+def _is_asset_edit(change: Change, path: str) -> bool:
+    # The dev asset cache reloads edited files by mtime; only new or removed
+    # assets need a restart to refresh the route table.
+    return change == Change.modified and any(
+        os.path.abspath(path).startswith(asset) for asset in ASSET_PATHS
+    )
+
+
 def _watch_files(runner: Runner) -> None:
-    for _ in watch(*WATCH_PATHS):
+    for changes in watch(*WATCH_PATHS):
+        if all(_is_asset_edit(change, path) for change, path in changes):
+            continue
         runner.restart_event.set()
 
 
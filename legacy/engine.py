@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from itertools import combinations
+from functools import lru_cache
+from itertools import combinations, combinations_with_replacement
+import json
 import random
 from typing import Iterable
 
@@ -9,6 +11,8 @@ SUITS = ["♠", "♥", "♦", "♣"]
 RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
 RANK_VALUES = {rank: index + 2 for index, rank in enumerate(RANKS)}
 ACE_LOW_VALUE = 1
+WILD_HIGH_VALUES = tuple(RANK_VALUES[rank] for rank in RANKS)
+WILD_LOW_VALUES = tuple(range(1, 14))
 HAND_COMBOS = list(combinations(range(5), 3))
 COMM_COMBOS = list(combinations(range(10), 2))
 
@@ -71,30 +75,19 @@ def compare_low(a: list[int], b: list[int]) -> int:
 
 
 def evaluate_high_five(cards: list[Card], wild_ranks: set[str]) -> list[int]:
-    wild_cards = [card for card in cards if card.rank in wild_ranks]
-    base_cards = [card for card in cards if card.rank not in wild_ranks]
-    wild_count = len(wild_cards)
+    base_values = tuple(sorted(rank_value(card.rank) for card in cards if card.rank not in wild_ranks))
     flush_possible = is_flush_possible(cards, wild_ranks)
+    return list(_best_high(base_values, len(cards) - len(base_values), flush_possible))
 
-    rank_assignments: list[list[int]] = [[]]
-    if wild_count:
-        rank_assignments = []
-
-        def dfs(depth: int, current: list[int]) -> None:
-            if depth == wild_count:
-                rank_assignments.append(current[:])
-                return
-            for rank in RANKS:
-                current.append(rank_value(rank))
-                dfs(depth + 1, current)
-                current.pop()
-
-        dfs(0, [])
 
+@lru_cache(maxsize=65536)
+def _best_high(base_values: tuple[int, ...], wild_count: int, flush_possible: bool) -> tuple[int, ...]:
+    # The score only depends on which ranks the wilds become, not their
+    # order, so wilds are assigned as rank multisets.
     best: list[int] | None = None
 
-    for assignment in rank_assignments:
-        ranks = [rank_value(card.rank) for card in base_cards] + assignment
+    for assignment in combinations_with_replacement(WILD_HIGH_VALUES, wild_count):
+        ranks = [*base_values, *assignment]
         counts: dict[int, int] = {}
         for value in ranks:
             counts[value] = counts.get(value, 0) + 1
@@ -133,40 +126,91 @@ def evaluate_high_five(cards: list[Card], wild_ranks: set[str]) -> list[int]:
         if best is None or compare_high(score, best) > 0:
             best = score
 
-    return best or [0]
+    return tuple(best or [0])
 
 
 def evaluate_low_five(cards: list[Card], wild_ranks: set[str], natural_low_enabled: bool) -> list[int]:
     if natural_low_enabled:
         return sorted(rank_value_low(card.rank) for card in cards)
+    base_values = tuple(sorted(rank_value_low(card.rank) for card in cards if card.rank not in wild_ranks))
+    return list(_best_low(base_values, len(cards) - len(base_values)))
 
-    wild_cards = [card for card in cards if card.rank in wild_ranks]
-    base_cards = [card for card in cards if card.rank not in wild_ranks]
-    wild_count = len(wild_cards)
-    base_values = [rank_value_low(card.rank) for card in base_cards]
-    low_values = list(range(1, 14))
-
-    assignments: list[list[int]] = [[]]
-    if wild_count:
-        assignments = []
-
-        def dfs(depth: int, current: list[int]) -> None:
-            if depth == wild_count:
-                assignments.append(current[:])
-                return
-            for value in low_values:
-                current.append(value)
-                dfs(depth + 1, current)
-                current.pop()
-
-        dfs(0, [])
 
+@lru_cache(maxsize=65536)
+def _best_low(base_values: tuple[int, ...], wild_count: int) -> tuple[int, ...]:
     best: list[int] | None = None
-    for assignment in assignments:
+    for assignment in combinations_with_replacement(WILD_LOW_VALUES, wild_count):
         ranks = sorted(base_values + assignment)
         if best is None or compare_low(ranks, best) > 0:
             best = ranks
-    return best or sorted(base_values)
+    return tuple(best or base_values)
+
+
+# (high values, low values, wild count, suit) for a group of cards. Wilds
+# are left out of the values unless natural low keeps them; suit is the
+# shared suit of the non-wild cards, None when there are none, MIXED_SUITS
+# when they differ.
+CardGroup = tuple[tuple[int, ...], tuple[int, ...], int, "str | None"]
+MIXED_SUITS = ""
+
+
+@dataclass(frozen=True)
+class Board:
+    # Everything about the ten community cards that every player shares:
+    # the distinct summaries of the 45 community pairs.
+    wild_ranks: frozenset[str]
+    natural_low_enabled: bool
+    groups: tuple[CardGroup, ...]
+
+
+def _card_group(cards: Iterable[Card], wild_ranks: Iterable[str], natural_low_enabled: bool) -> CardGroup:
+    non_wild = [card for card in cards if card.rank not in wild_ranks]
+    low_cards = cards if natural_low_enabled else non_wild
+    suits = {card.suit for card in non_wild}
+    return (
+        tuple(sorted(rank_value(card.rank) for card in non_wild)),
+        tuple(sorted(rank_value_low(card.rank) for card in low_cards)),
+        len(cards) - len(non_wild),
+        suits.pop() if len(suits) == 1 else (None if not suits else MIXED_SUITS),
+    )
+
+
+def prepare_board(
+    community_cards: list[Card], wild_ranks: set[str], natural_low_enabled: bool
+) -> Board:
+    groups = {
+        _card_group([community_cards[i] for i in comm_idxs], wild_ranks, natural_low_enabled)
+        for comm_idxs in COMM_COMBOS
+    }
+    return Board(frozenset(wild_ranks), natural_low_enabled, tuple(groups))
+
+
+def best_hand_on_board(hand: list[Card], board: Board) -> dict[str, list[int]]:
+    # Same result as scoring all 450 five-card combinations, but each
+    # distinct (hand triple, community pair) summary is scored once.
+    # Scores of one category have one length, so tuple order matches
+    # compare_high and compare_low.
+    hand_groups = {
+        _card_group([hand[i] for i in hand_idxs], board.wild_ranks, board.natural_low_enabled)
+        for hand_idxs in HAND_COMBOS
+    }
+    best_high: tuple[int, ...] | None = None
+    best_low: tuple[int, ...] | None = None
+    for hand_high, hand_low, hand_wild, hand_suit in hand_groups:
+        for comm_high, comm_low, comm_wild, comm_suit in board.groups:
+            wild_count = hand_wild + comm_wild
+            flush_possible = (
+                hand_suit is None or comm_suit is None or hand_suit == comm_suit
+            ) and MIXED_SUITS not in (hand_suit, comm_suit)
+            high_score = _best_high(tuple(sorted(hand_high + comm_high)), wild_count, flush_possible)
+            low_values = tuple(sorted(hand_low + comm_low))
+            low_score = low_values if board.natural_low_enabled else _best_low(low_values, wild_count)
+            if best_high is None or high_score > best_high:
+                best_high = high_score
+            if best_low is None or low_score < best_low:
+                best_low = low_score
+
+    return {"best_high": list(best_high or [0]), "best_low": list(best_low or [0])}
 
 
 def best_hand_for_player(
@@ -175,21 +219,7 @@ def best_hand_for_player(
     wild_ranks: set[str],
     natural_low_enabled: bool,
 ) -> dict[str, list[int]]:
-    best_high: list[int] | None = None
-    best_low: list[int] | None = None
-    for hand_idxs in HAND_COMBOS:
-        hand_combo = [hand[i] for i in hand_idxs]
-        for comm_idxs in COMM_COMBOS:
-            community_combo = [community_cards[i] for i in comm_idxs]
-            cards = hand_combo + community_combo
-            high_score = evaluate_high_five(cards, wild_ranks)
-            low_score = evaluate_low_five(cards, wild_ranks, natural_low_enabled)
-            if best_high is None or compare_high(high_score, best_high) > 0:
-                best_high = high_score
-            if best_low is None or compare_low(low_score, best_low) > 0:
-                best_low = low_score
-
-    return {"best_high": best_high or [0], "best_low": best_low or [0]}
+    return best_hand_on_board(hand, prepare_board(community_cards, wild_ranks, natural_low_enabled))
 
 
 def build_wild_ranks(community_pairs: list[list[Card]], revealed_pairs: int) -> set[str]:
@@ -208,9 +238,19 @@ def build_wild_ranks(community_pairs: list[list[Card]], revealed_pairs: int) ->
     return wild_ranks
 
 
-def card_to_dict(card: Card) -> dict:
+def _card_dict(card: Card) -> dict:
     return {"rank": card.rank, "suit": card.suit, "code": card.code}
 
 
+# Shared per-card payloads; callers must treat these dicts as read-only.
+CARD_DICTS = {card.code: _card_dict(card) for card in create_deck()}
+CARD_JSON = {code: json.dumps(data, separators=(",", ":")) for code, data in CARD_DICTS.items()}
+
+
+def card_to_dict(card: Card) -> dict:
+    cached = CARD_DICTS.get(card.code)
+    return cached if cached is not None else _card_dict(card)
+
+
 def card_from_dict(data: dict) -> Card:
     return Card(rank=data["rank"], suit=data["suit"], code=data["code"])
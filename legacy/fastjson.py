@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from engine import CARD_JSON
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+CARD_GROUP_KEYS = ("hands", "community_pairs")
+_encode = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def _card_json(card: dict) -> str:
+    return CARD_JSON.get(card["code"]) or _encode(card)
+
+
+def _card_groups_json(groups: list[list[dict]]) -> str:
+    return "[" + ",".join("[" + ",".join([_card_json(card) for card in group]) + "]" for group in groups) + "]"
+
+
+def _dumps_stdlib(payload: dict[str, Any]) -> bytes:
+    spliced = [key for key in CARD_GROUP_KEYS if isinstance(payload.get(key), list)]
+    if not spliced:
+        return _encode(payload).encode("utf-8")
+    rest = {key: value for key, value in payload.items() if key not in spliced}
+    parts = [_encode(rest)[:-1]]
+    for key in spliced:
+        parts.append(f'"{key}":{_card_groups_json(payload[key])}')
+    separator = "," if rest else ""
+    return (parts[0] + separator + ",".join(parts[1:]) + "}").encode("utf-8")
+
+
+def dumps(payload: dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return _dumps_stdlib(payload)
@@ -1,13 +1,28 @@
 from __future__ import annotations
 
 import math
+import os
+import random
 import time
+from functools import lru_cache
+from itertools import permutations
+from typing import Iterator
 
+import core_path  # noqa: F401
 from engine import (
+    SUITS,
     Card,
+    best_hand_on_board,
     build_wild_ranks,
+    compare_high,
+    compare_low,
+    create_deck,
     evaluate_high_five,
+    prepare_board,
 )
+from server.core.canonical import canonical_key
+from server.core.sampling import SampleStats, iter_deals
+from server.core.shared_cache import open_shared_cache
 
 LOW_RANK_VALUES = {
     "A": 1,
@@ -26,6 +41,23 @@ LOW_RANK_VALUES = {
 }
 
 
+Z_95 = 1.96
+OUTCOMES = ("high", "low", "scoop", "any")
+# Runouts are ordered because wild Queens depend on deal order. Up to
+# SIM_EXACT_BOARDS of them are walked in full passes, with opponents
+# sampled per runout, when the iteration budget covers a pass. Opponent
+# hands are never enumerated: even one opponent has C(37, 5) = 435,897
+# hands on the river.
+SIM_EXACT_BOARDS = int(os.getenv("SIM_EXACT_BOARDS", "2000"))
+# Simulated odds shared by every server process. Off unless SIM_CACHE_PATH
+# names a file, ideally on a RAM-backed runtime directory such as /dev/shm.
+SIM_CACHE = open_shared_cache(
+    os.getenv("SIM_CACHE_PATH", ""),
+    int(os.getenv("SIM_CACHE_SLOTS", "65536")),
+)
+METHOD_TAGS = {"exact_board": 2, "sampled": 3}
+
+
 def compute_iterations(player_count: int, revealed_pairs: int) -> int:
     unknown_pairs = 5 - revealed_pairs
     base = 200
@@ -35,13 +67,22 @@ def compute_iterations(player_count: int, revealed_pairs: int) -> int:
     return min(300, max(80, round(raw)))
 
 
+# Every draw here is at most ten cards from at most 52.
+COMB_TABLE = [[math.comb(n, k) for k in range(11)] for n in range(53)]
+
+
 def _comb(n: int, k: int) -> int:
     if k < 0 or k > n:
         return 0
+    if k <= 10:
+        return COMB_TABLE[n][k]
     return math.comb(n, k)
 
 
-def _low_pair_distribution(counts: list[int], draw_count: int) -> dict[tuple[int, int], float]:
+@lru_cache(maxsize=4096)
+def _low_pair_distribution(counts: tuple[int, ...], draw_count: int) -> dict[tuple[int, int], float]:
+    # Memoised per (remaining rank counts, draw count); callers must treat
+    # the returned dict as read-only.
     total = sum(counts)
     if draw_count <= 0 or total <= 0 or draw_count > total:
         return {}
@@ -50,44 +91,46 @@ def _low_pair_distribution(counts: list[int], draw_count: int) -> dict[tuple[int
     if denom == 0:
         return {}
 
+    below = [0] * 15
+    for rank in range(1, 14):
+        below[rank + 1] = below[rank] + counts[rank]
+
     distribution: dict[tuple[int, int], float] = {}
 
     for r1 in range(1, 14):
         c1 = counts[r1]
         if c1 == 0:
             continue
-        lower = sum(counts[1:r1])
+        lower = below[r1]
 
-        # r1 == r2 (need at least two of r1, and no lower ranks drawn)
-        ways_same = 0
+        # r1 == r2 (need at least two of r1, and no lower ranks drawn):
+        # all draws above `lower`, minus those with zero or one r1.
         rest_same = total - lower - c1
-        for k1 in range(2, min(c1, draw_count) + 1):
-            ways_same += _comb(c1, k1) * _comb(rest_same, draw_count - k1)
+        ways_same = (
+            _comb(c1 + rest_same, draw_count)
+            - _comb(rest_same, draw_count)
+            - c1 * _comb(rest_same, draw_count - 1)
+        )
         if ways_same:
-            distribution[(r1, r1)] = distribution.get((r1, r1), 0) + ways_same / denom
+            distribution[(r1, r1)] = ways_same / denom
 
         # r1 < r2
         for r2 in range(r1 + 1, 14):
             c2 = counts[r2]
             if c2 == 0:
                 continue
-            mid = sum(counts[r1 + 1 : r2])
-            rest = total - lower - mid - c1 - c2
-            if rest < 0:
-                continue
-            ways = 0
-            max_k1 = min(c1, draw_count - 1)
-            for k1 in range(1, max_k1 + 1):
-                max_k2 = min(c2, draw_count - k1)
-                for k2 in range(1, max_k2 + 1):
-                    ways += _comb(c1, k1) * _comb(c2, k2) * _comb(rest, draw_count - k1 - k2)
+            # Exactly one r1 (a second would make the pair (r1, r1)), at
+            # least one r2, and nothing lower or in between.
+            rest = total - below[r2 + 1]
+            ways = c1 * (_comb(c2 + rest, draw_count - 1) - _comb(rest, draw_count - 1))
             if ways:
-                distribution[(r1, r2)] = distribution.get((r1, r2), 0) + ways / denom
+                distribution[(r1, r2)] = ways / denom
 
     return distribution
 
 
-def _low_strength_to_prob(values: list[int]) -> float:
+@lru_cache(maxsize=8192)
+def _low_strength_to_prob(values: tuple[int, ...]) -> float:
     high = values[-1]
     total = sum(values)
     if high <= 6:
@@ -146,17 +189,17 @@ def _estimate_low_odds(
     unknown_count = (5 - revealed_pairs) * 2
     if unknown_count <= 0:
         community_vals = (revealed_vals + [13, 13])[:2]
-        low_values = sorted(hand_low_vals + community_vals)
+        low_values = tuple(sorted(hand_low_vals + community_vals))
         return _low_strength_to_prob(low_values) * dup_factor
 
-    distribution = _low_pair_distribution(counts, unknown_count)
+    distribution = _low_pair_distribution(tuple(counts), unknown_count)
     if not distribution:
         return 0.0
 
     odds = 0.0
     for (r1, r2), prob in distribution.items():
         community_vals = sorted(revealed_vals + [r1, r2])[:2]
-        low_values = sorted(hand_low_vals + community_vals)
+        low_values = tuple(sorted(hand_low_vals + community_vals))
         odds += prob * _low_strength_to_prob(low_values) * dup_factor
 
     if not natural_low_enabled:
@@ -174,8 +217,10 @@ def _heuristic_odds(
     revealed_pairs: int,
     high_low_enabled: bool,
     natural_low_enabled: bool,
+    wild_ranks: set[str] | None = None,
 ) -> dict:
-    wild_ranks = build_wild_ranks(community_pairs, revealed_pairs)
+    if wild_ranks is None:
+        wild_ranks = build_wild_ranks(community_pairs, revealed_pairs)
     high_score = evaluate_high_five(hero_hand, wild_ranks)
     high_rank = max(0, min(9, high_score[0]))
 
@@ -214,6 +259,56 @@ def _heuristic_odds(
     }
 
 
+def _odds_key(
+    *,
+    player_count: int,
+    hero_hand: list[Card],
+    community_pairs: list[list[Card]],
+    revealed_pairs: int,
+    high_low_enabled: bool,
+    natural_low_enabled: bool,
+) -> tuple:
+    # Ranks made wild by a revealed Queen stay wild, so their suits drop
+    # out of the key. A trailing Queen only matters for what comes next.
+    revealed = [card for pair in community_pairs[:revealed_pairs] for card in pair]
+    wild_ranks = {card.rank for previous, card in zip(revealed, revealed[1:]) if previous.rank == "Q"}
+    return (
+        "legacy",
+        canonical_key(hero_hand, revealed, wild_ranks=wild_ranks, suits=SUITS),
+        tuple(sorted(wild_ranks)),
+        bool(revealed) and revealed[-1].rank == "Q",
+        player_count,
+        high_low_enabled,
+        natural_low_enabled,
+    )
+
+
+def cached_odds(*, min_iterations: int = 0, **inputs) -> dict | None:
+    # Shared-cache odds for a spot, if any process has simulated at least
+    # `min_iterations` deals of it.
+    if SIM_CACHE is None:
+        return None
+    entry = SIM_CACHE.get(_odds_key(**inputs))
+    if entry is None:
+        return None
+    count, tag, values = entry
+    method = next((name for name, value in METHOD_TAGS.items() if value == tag), "sampled")
+    if count < min_iterations:
+        return None
+    odds: dict = dict(zip(OUTCOMES, values))
+    odds.update(
+        {
+            "confidence": {name: _interval(odds[name], count) for name in OUTCOMES},
+            "iterations_run": count,
+            "time_capped": False,
+            "done": True,
+            "method": method,
+            "cache": "shared",
+        }
+    )
+    return odds
+
+
 def simulate_odds(
     *,
     player_count: int,
@@ -224,25 +319,231 @@ def simulate_odds(
     max_time_ms: int,
     high_low_enabled: bool,
     natural_low_enabled: bool,
-    hero_index: int = 0,
-    min_iterations: int | None = None,
     max_iterations: int | None = None,
+    sampling: str = "plain",
 ) -> dict:
+    # Reads through the shared cache.
     start = time.time()
-    odds = _heuristic_odds(
-        player_count=player_count,
-        hero_hand=hero_hand,
-        community_pairs=community_pairs,
-        revealed_pairs=revealed_pairs,
-        high_low_enabled=high_low_enabled,
-        natural_low_enabled=natural_low_enabled,
-    )
+    inputs = {
+        "player_count": player_count,
+        "hero_hand": hero_hand,
+        "community_pairs": community_pairs,
+        "revealed_pairs": revealed_pairs,
+        "high_low_enabled": high_low_enabled,
+        "natural_low_enabled": natural_low_enabled,
+    }
+    target = max_iterations or iterations
+    odds: dict | None = cached_odds(min_iterations=target, **inputs)
+    if odds is not None:
+        return {**odds, "elapsed_ms": int((time.time() - start) * 1000)}
+    odds = {}
+    for odds in iter_simulation(
+        **inputs,
+        max_time_ms=max_time_ms,
+        max_iterations=target,
+        report_every_ms=max_time_ms,
+        sampling=sampling,
+    ):
+        pass
+    if SIM_CACHE is not None and odds.get("iterations_run"):
+        SIM_CACHE.put(
+            _odds_key(**inputs),
+            odds["iterations_run"],
+            METHOD_TAGS[odds["method"]],
+            [odds[name] for name in OUTCOMES],
+        )
+    if not odds.get("iterations_run"):
+        odds = {
+            **_heuristic_odds(
+                player_count=player_count,
+                hero_hand=hero_hand,
+                community_pairs=community_pairs,
+                revealed_pairs=revealed_pairs,
+                high_low_enabled=high_low_enabled,
+                natural_low_enabled=natural_low_enabled,
+            ),
+            "time_capped": odds.get("time_capped", False),
+            "method": "heuristic",
+        }
     return {
         **odds,
         "elapsed_ms": int((time.time() - start) * 1000),
     }
 
 
+def _showdown_shares(
+    bests: list[dict[str, list[int]]], high_low_enabled: bool
+) -> tuple[float, float, float, float]:
+    # Hero is bests[0]; split pots count as a fractional share.
+    high_winners = [0]
+    for idx in range(1, len(bests)):
+        result = compare_high(bests[idx]["best_high"], bests[high_winners[0]]["best_high"])
+        if result > 0:
+            high_winners = [idx]
+        elif result == 0:
+            high_winners.append(idx)
+    high = 1 / len(high_winners) if 0 in high_winners else 0.0
+    if not high_low_enabled:
+        return high, 0.0, 0.0, 1.0 if high else 0.0
+
+    low_winners = [0]
+    for idx in range(1, len(bests)):
+        result = compare_low(bests[idx]["best_low"], bests[low_winners[0]]["best_low"])
+        if result > 0:
+            low_winners = [idx]
+        elif result == 0:
+            low_winners.append(idx)
+    low = 1 / len(low_winners) if 0 in low_winners else 0.0
+    scoop = 1.0 if high_winners == [0] and low_winners == [0] else 0.0
+    return high, low, scoop, 1.0 if high or low else 0.0
+
+
+def _interval(p: float, count: float) -> list[float]:
+    # Wilson score interval; it stays sensible at 0 or 100% and is
+    # conservative for split-pot shares, whose variance is at most p(1-p).
+    # Variance-reduced runs pass their effective count.
+    if count == 0:
+        return [0.0, 1.0]
+    z2 = Z_95 * Z_95
+    scale = 1 + z2 / count
+    center = (p + z2 / (2 * count)) / scale
+    half = Z_95 * math.sqrt(p * (1 - p) / count + z2 / (4 * count * count)) / scale
+    return [round(max(0.0, center - half), 4), round(min(1.0, center + half), 4)]
+
+
+def _snapshot(
+    stats: SampleStats, start: float, *, method: str, done: bool, time_capped: bool
+) -> dict:
+    means = stats.means()
+    snapshot: dict = {name: means[i] for i, name in enumerate(OUTCOMES)}
+    snapshot.update(
+        {
+            "confidence": {
+                name: _interval(means[i], stats.effective_count(i))
+                for i, name in enumerate(OUTCOMES)
+            },
+            "variance_per_iteration": dict(
+                zip(OUTCOMES, (round(value, 6) for value in stats.variance_per_iteration()))
+            ),
+            "iterations_run": stats.count,
+            "elapsed_ms": int((time.perf_counter() - start) * 1000),
+            "time_capped": time_capped,
+            "done": done,
+            "method": method,
+            "sampling": stats.mode,
+        }
+    )
+    return snapshot
+
+
+def simulation_method(revealed_pairs: int, max_iterations: int) -> tuple[str, int]:
+    # Returns the method and the runouts in one pass (0 when sampled).
+    # Board runouts are enumerated only when a full pass fits in
+    # max_iterations; opponent hands are always sampled.
+    unseen = 52 - 5 - revealed_pairs * 2
+    unknown = (5 - revealed_pairs) * 2
+    boards = math.perm(unseen, unknown)
+    if boards <= min(SIM_EXACT_BOARDS, max_iterations):
+        return "exact_board", boards
+    return "sampled", 0
+
+
+def _deals(
+    method: str,
+    deck: list[Card],
+    unknown: int,
+    opponents: int,
+    rng: random.Random,
+    sampling: str = "plain",
+) -> Iterator[tuple[tuple[Card, ...], list[list[Card]], object]]:
+    # Yields (runout, opponent hands, sampling group). Sampling never ends
+    # on its own; exact_board walks shuffled passes over every runout, so
+    # a partial pass samples runouts without replacement and each full
+    # pass weighs them equally. `sampling` only shapes sampled deals, where
+    # the first card dealt is the first unknown community card.
+    if method == "exact_board":
+        runouts = list(permutations(deck, unknown))
+        while True:
+            rng.shuffle(runouts)
+            for runout in runouts:
+                rest = [card for card in deck if card not in runout]
+                drawn = rng.sample(rest, opponents * 5)
+                yield runout, [drawn[i : i + 5] for i in range(0, opponents * 5, 5)], None
+    for drawn, group in iter_deals(deck, unknown + opponents * 5, sampling, rng):
+        runout = tuple(drawn[:unknown])
+        yield runout, [drawn[i : i + 5] for i in range(unknown, len(drawn), 5)], group
+
+
+def iter_simulation(
+    *,
+    player_count: int,
+    hero_hand: list[Card],
+    community_pairs: list[list[Card]],
+    revealed_pairs: int,
+    high_low_enabled: bool,
+    natural_low_enabled: bool,
+    max_time_ms: int,
+    max_iterations: int,
+    report_every_ms: int = 250,
+    rng: random.Random | None = None,
+    sampling: str = "plain",
+) -> Iterator[dict]:
+    # Equity over the unseen opponent hands and community pairs; board
+    # runouts are enumerated or sampled per simulation_method. Enumeration
+    # stops on whole passes, and is reported as sampled until the first
+    # pass completes. Work only happens while the caller pulls snapshots,
+    # so closing the generator cancels the simulation. Wild-heavy deals
+    # can take a while to evaluate, so the clock is checked after every
+    # seat.
+    rng = rng or random.Random()
+    revealed = [list(pair) for pair in community_pairs[:revealed_pairs]]
+    known = {card.code for card in hero_hand} | {card.code for pair in revealed for card in pair}
+    deck = [card for card in create_deck() if card.code not in known]
+    unknown = (5 - revealed_pairs) * 2
+    method, pass_size = simulation_method(revealed_pairs, max_iterations)
+    if method != "sampled":
+        sampling = "plain"
+        max_iterations -= max_iterations % pass_size
+    # Hero's best hand depends only on the runout, which enumeration revisits.
+    hero_bests: dict[tuple[Card, ...], tuple] = {}
+
+    stats = SampleStats(sampling, outcomes=len(OUTCOMES))
+    start = time.perf_counter()
+    deadline = start + max_time_ms / 1000
+    interval = report_every_ms / 1000
+    next_report = start + interval
+    time_capped = False
+    deals = _deals(method, deck, unknown, player_count - 1, rng, sampling)
+    while stats.count < max_iterations and not time_capped:
+        runout, hands, group = next(deals)
+        cached = hero_bests.get(runout) if method != "sampled" else None
+        if cached is None:
+            pairs = revealed + [list(runout[i : i + 2]) for i in range(0, unknown, 2)]
+            community = [card for pair in pairs for card in pair]
+            board = prepare_board(community, build_wild_ranks(pairs, 5), natural_low_enabled)
+            hero_best = best_hand_on_board(hero_hand, board)
+            if method != "sampled":
+                hero_bests[runout] = (board, hero_best)
+        else:
+            board, hero_best = cached
+        bests = [hero_best]
+        for hand in hands:
+            bests.append(best_hand_on_board(hand, board))
+            now = time.perf_counter()
+            if now >= deadline:
+                time_capped = True
+                break
+            if now >= next_report:
+                reported = method if stats.count >= pass_size else "sampled"
+                yield _snapshot(stats, start, method=reported, done=False, time_capped=False)
+                next_report = time.perf_counter() + interval
+        if time_capped:
+            break
+        stats.add(_showdown_shares(bests, high_low_enabled), group)
+    reported = method if stats.count >= pass_size else "sampled"
+    yield _snapshot(stats, start, method=reported, done=True, time_capped=time_capped)
+
+
 def estimate_player_odds(
     *,
     player_count: int,
@@ -253,16 +554,43 @@ def estimate_player_odds(
     natural_low_enabled: bool,
     iterations: int = 60,
 ) -> float:
-    odds = simulate_odds(
+    # Bots act on the heuristic; simulating for every seat would stall
+    # the table.
+    odds = _heuristic_odds(
         player_count=player_count,
         hero_hand=hero_hand,
         community_pairs=community_pairs,
         revealed_pairs=revealed_pairs,
-        iterations=iterations,
-        max_time_ms=3000,
         high_low_enabled=high_low_enabled,
         natural_low_enabled=natural_low_enabled,
-        min_iterations=iterations,
-        max_iterations=iterations,
     )
     return odds["any"] if high_low_enabled else odds["high"]
+
+
+def estimate_street_odds(
+    *,
+    player_count: int,
+    hands: dict[int, list[Card]],
+    community_pairs: list[list[Card]],
+    revealed_pairs: int,
+    high_low_enabled: bool,
+    natural_low_enabled: bool,
+    wild_ranks: set[str] | None = None,
+) -> dict[int, float]:
+    # One pass over every seat for a street: wild ranks are built once and
+    # the low-draw tables are shared through the memoised helpers.
+    if wild_ranks is None:
+        wild_ranks = build_wild_ranks(community_pairs, revealed_pairs)
+    street: dict[int, float] = {}
+    for idx, hand in hands.items():
+        odds = _heuristic_odds(
+            player_count=player_count,
+            hero_hand=hand,
+            community_pairs=community_pairs,
+            revealed_pairs=revealed_pairs,
+            high_low_enabled=high_low_enabled,
+            natural_low_enabled=natural_low_enabled,
+            wild_ranks=wild_ranks,
+        )
+        street[idx] = odds["any"] if high_low_enabled else odds["high"]
+    return street
@@ -1,5 +1,6 @@
 const state = {
   data: null,
+  simulation: null,
 };
 
 const el = (id) => document.getElementById(id);
@@ -193,6 +194,8 @@ const renderTrainer = (data) => {
 };
 
 const renderState = (data) => {
+  // Any state change makes a running simulation stale.
+  stopSimulation();
   state.data = data;
   updateSettingsLock(true);
   renderHand(data.hands[data.hero_index], data.wild_ranks);
@@ -231,19 +234,92 @@ const handleNewGame = async () => {
 };
 
 
+const renderProgress = (odds) => {
+  highWinEl.textContent = formatPercent(odds.high);
+  lowWinEl.textContent = formatPercent(odds.low);
+  scoopWinEl.textContent = formatPercent(odds.scoop);
+  anyWinEl.textContent = formatPercent(odds.any);
+  const [low, high] = odds.confidence.any;
+  evDetailEl.textContent =
+    `Simulating: ${odds.iterations_run} iterations in ${(odds.elapsed_ms / 1000).toFixed(1)}s, ` +
+    `win ${formatPercent(low)}-${formatPercent(high)} (95%).`;
+};
+
+const readEvents = async (res, onEvent) => {
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += decoder.decode(value, { stream: true });
+    let split;
+    while ((split = buffer.indexOf("\n\n")) >= 0) {
+      const block = buffer.slice(0, split);
+      buffer = buffer.slice(split + 2);
+      const fields = {};
+      block.split("\n").forEach((line) => {
+        const colon = line.indexOf(":");
+        fields[line.slice(0, colon)] = line.slice(colon + 1).trim();
+      });
+      onEvent(fields.event, JSON.parse(fields.data));
+    }
+  }
+};
+
+const stopSimulation = () => {
+  if (state.simulation) state.simulation.abort();
+};
+
 const handleSimulate = async () => {
   if (!state.data) return;
-  await runWithLog("Simulate odds", async () => {
-    const data = await postJson("/simulate", {});
-    renderState(data);
-    renderTrainer(data);
-  });
+  if (state.simulation) {
+    stopSimulation();
+    return;
+  }
+  const controller = new AbortController();
+  state.simulation = controller;
+  simulateButton.textContent = "Stop simulation";
+  let latest = null;
+  try {
+    const res = await fetch("/simulate/stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: "{}",
+      signal: controller.signal,
+    });
+    if (!res.ok) throw await res.json();
+    await readEvents(res, (event, data) => {
+      if (event === "progress") {
+        latest = data;
+        renderProgress(data);
+      } else if (event === "done") {
+        latest = null;
+        renderTrainer(data);
+      }
+    });
+  } catch (err) {
+    if (err.name !== "AbortError") {
+      messageEl.textContent = err.error || "Simulation failed.";
+    } else if (latest) {
+      renderProgress(latest);
+      evDetailEl.textContent += " Stopped early.";
+    }
+  } finally {
+    state.simulation = null;
+    simulateButton.textContent = "Simulate odds";
+  }
 };
 
 const handleAllAction = async () => {
   await runWithLog("All action", async () => {
     const data = await postJson("/all_action", {});
     renderState(data);
+    if (data.action_trace?.length) {
+      showActionLog(
+        data.action_trace.map((step) => `Player ${step.player_index + 1}: ${step.label}`)
+      );
+    }
   });
 };
 
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+SUITS = ("S", "H", "D", "C")
+RANKS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A")
+RANK_ORDER = {rank: index for index, rank in enumerate(RANKS)}
+# Wild cards never decide a flush, so their suit is dropped from the key.
+WILD_SUIT = "*"
+
+CardPair = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Canonical:
+    # groups: each input group relabelled and sorted high to low.
+    # suit_map: original suit -> canonical suit, shared by every group.
+    # multiplicity: distinct suit relabellings of the canonical groups,
+    # i.e. how many concrete inputs this class stands for.
+    groups: tuple[tuple[CardPair, ...], ...]
+    suit_map: dict[str, str]
+    multiplicity: int
+
+    def __hash__(self) -> int:
+        return hash(self.groups)
+
+
+def _pair(card: Any) -> CardPair:
+    if isinstance(card, tuple):
+        return card
+    return (card.rank, card.suit)
+
+
+def _signature(groups: list[list[CardPair]], suit: str, wild: set[str]) -> tuple:
+    return tuple(
+        tuple(
+            sorted(
+                (RANK_ORDER[rank] for rank, card_suit in group if card_suit == suit and rank not in wild),
+                reverse=True,
+            )
+        )
+        for group in groups
+    )
+
+
+def canonicalize(
+    groups: Sequence[Iterable[Any]], wild_ranks: Iterable[str] = (), suits: Sequence[str] = SUITS
+) -> Canonical:
+    # suits: the deck's suit labels, e.g. the legacy engine's symbols.
+    wild = set(wild_ranks)
+    pairs = [[_pair(card) for card in group] for group in groups]
+    signatures = {suit: _signature(pairs, suit, wild) for suit in suits}
+    # Suits with equal signatures are interchangeable, so any tie order
+    # yields the same canonical groups.
+    order = sorted(
+        suits, key=lambda suit: (sum(map(len, signatures[suit])), signatures[suit]), reverse=True
+    )
+    suit_map = {suit: suits[index] for index, suit in enumerate(order)}
+    canonical_groups = tuple(
+        tuple(
+            sorted(
+                (
+                    (rank, WILD_SUIT if rank in wild else suit_map[suit])
+                    for rank, suit in group
+                ),
+                key=lambda card: (-RANK_ORDER[card[0]], card[1]),
+            )
+        )
+        for group in pairs
+    )
+    stabilizer = math.prod(math.factorial(n) for n in Counter(signatures.values()).values())
+    return Canonical(canonical_groups, suit_map, math.factorial(len(suits)) // stabilizer)
+
+
+def canonical_key(
+    *groups: Iterable[Any], wild_ranks: Iterable[str] = (), suits: Sequence[str] = SUITS
+) -> tuple:
+    return canonicalize(groups, wild_ranks, suits).groups
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Iterable[tuple[str, str]] = ()) -> str:
+    pairs = [*key, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help = help_text
+        self._values: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+
+    def drain(self) -> list[tuple[LabelKey, float]]:
+        # Takes what was counted since the last drain and starts again.
+        with self._lock:
+            items, self._values = list(self._values.items()), {}
+        return items
+
+    def merge(self, items: Iterable[tuple[LabelKey, float]]) -> None:
+        with self._lock:
+            for key, amount in items:
+                self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        super().__init__(name, help_text)
+        self._callbacks: list[tuple[LabelKey, Callable[[], float]]] = []
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def set_function(self, fn: Callable[[], float], **labels: str) -> None:
+        self._callbacks.append((_label_key(labels), fn))
+
+    def render(self) -> list[str]:
+        self._refresh()
+        return super().render()
+
+    def _refresh(self) -> None:
+        for key, fn in self._callbacks:
+            with self._lock:
+                self._values[key] = fn()
+
+    def drain(self) -> list[tuple[LabelKey, float]]:
+        # Gauges are readings, not totals: they are read, never reset.
+        self._refresh()
+        with self._lock:
+            return list(self._values.items())
+
+    def merge(self, items: Iterable[tuple[LabelKey, float]]) -> None:
+        with self._lock:
+            self._values.update(items)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[LabelKey, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts, then the +Inf overflow, then count and sum.
+                series = [0] * (len(self.buckets) + 1) + [0, 0.0]
+                self._series[key] = series
+            series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(_label_key(labels))
+        return int(series[-2]) if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines: list[str] = []
+        for key, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), series):
+                cumulative += bucket_count
+                labels = _format_labels(key, [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {int(series[-2])}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-1])}")
+        return lines
+
+    def drain(self) -> list[tuple[LabelKey, list[float]]]:
+        with self._lock:
+            items, self._series = list(self._series.items()), {}
+        return items
+
+    def merge(self, items: Iterable[tuple[LabelKey, list[float]]]) -> None:
+        with self._lock:
+            for key, series in items:
+                current = self._series.get(key)
+                if current is None:
+                    self._series[key] = list(series)
+                else:
+                    for index, value in enumerate(series):
+                        current[index] += value
+
+
+class Span:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: dict[str, str]) -> None:
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> Span:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Counter | Histogram) -> Counter | Histogram:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge(name, help_text))
+
+    def histogram(
+        self, name: str, help_text: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def drain(self) -> list[tuple[str, str, str, tuple[float, ...], list]]:
+        # What this process recorded since its last drain, for another
+        # process to merge: (name, kind, help, buckets, series) per metric.
+        drained = []
+        for metric in list(self._metrics.values()):
+            items = metric.drain()
+            if items:
+                buckets = getattr(metric, "buckets", ())
+                drained.append((metric.name, metric.kind, metric.help, buckets, items))
+        return drained
+
+    def merge(self, drained: Iterable[tuple[str, str, str, tuple[float, ...], list]], **labels: str) -> None:
+        # Counters and histograms add up across processes. Gauges are each
+        # process's own reading, so theirs keep separate series told apart
+        # by `labels`.
+        extra = _label_key(labels)
+        for name, kind, help_text, buckets, items in drained:
+            if kind == "histogram":
+                self.histogram(name, help_text, tuple(buckets)).merge(items)
+            elif kind == "gauge":
+                self.gauge(name, help_text).merge(
+                    (tuple(sorted(key + extra)), value) for key, value in items
+                )
+            else:
+                self.counter(name, help_text).merge(items)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+REQUEST_SECONDS = METRICS.histogram(
+    "trainer_request_seconds", "HTTP request latency by route, method and status."
+)
+HOOK_SECONDS = METRICS.histogram(
+    "trainer_hook_seconds", "Time spent in module hooks and their hot paths."
+)
+ACTION_SECONDS = METRICS.histogram(
+    "trainer_action_seconds", "apply_action latency by module and action type."
+)
+SESSIONS_CREATED = METRICS.counter("trainer_sessions_created_total", "Sessions created by module.")
+SESSIONS_ACTIVE = METRICS.gauge("trainer_sessions_active", "Sessions currently held in memory.")
+ACTION_CONFLICTS = METRICS.counter(
+    "trainer_action_conflicts_total", "Actions refused for a stale session version, by module."
+)
+CACHE_HITS = METRICS.counter("trainer_cache_hits_total", "Cache hits by cache name.")
+CACHE_MISSES = METRICS.counter("trainer_cache_misses_total", "Cache misses by cache name.")
+MODULE_WORKER_RESTARTS = METRICS.counter(
+    "trainer_module_worker_restarts_total", "Module worker processes lost or killed, by module."
+)
+EQUITY_JOBS = METRICS.counter(
+    "trainer_equity_jobs_total", "Scheduled equity jobs by priority and outcome."
+)
+EQUITY_QUEUE_DEPTH = METRICS.gauge("trainer_equity_queue_depth", "Equity jobs waiting for a worker.")
+EQUITY_SHED_RATE = METRICS.gauge(
+    "trainer_equity_shed_rate", "Share of equity jobs answered by a fallback estimate."
+)
+
+
+def span(module: str, hook: str) -> Span:
+    return Span(HOOK_SECONDS, {"module": module, "hook": hook})
+
+
+def timed(module: str, hook: str) -> Callable:
+    def decorate(fn: Callable) -> Callable:
+        labels = {"module": module, "hook": hook}
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                HOOK_SECONDS.observe(time.perf_counter() - start, **labels)
+
+        return wrapper
+
+    return decorate
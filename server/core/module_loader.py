@@ -15,6 +15,7 @@ from .defaults import (
     DEFAULT_MAX_RAISES,
 )
 from .types import ModuleConfig
+from .workers import ModuleWorkerPool, worker_count
 
 
 @dataclass
@@ -24,8 +25,11 @@ class LoadedModule:
 
 
 def _load_python_module(module_path: str, module_id: str) -> Any:
+    # Load module.py as a package so it can import sibling files relatively.
     spec = importlib.util.spec_from_file_location(
-        f"modules.{module_id}", os.path.join(module_path, "module.py")
+        f"modules.{module_id}",
+        os.path.join(module_path, "module.py"),
+        submodule_search_locations=[module_path],
     )
     if spec is None or spec.loader is None:
         raise RuntimeError(f"Could not load module.py for {module_id}")
@@ -63,9 +67,13 @@ def load_modules(modules_root: str) -> list[LoadedModule]:
         )
         config = ModuleConfig.model_validate(raw)
 
-        module = _load_python_module(module_path, config.id)
-        if hasattr(module, "configure"):
-            module.configure(config.model_dump())
+        workers = worker_count(config.id)
+        if workers > 0:
+            module = ModuleWorkerPool(module_path, config.id, config.model_dump(), workers)
+        else:
+            module = _load_python_module(module_path, config.id)
+            if hasattr(module, "configure"):
+                module.configure(config.model_dump())
         loaded.append(LoadedModule(config=config, module=module))
 
     return loaded
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, Mapping, TypeVar
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "trainer-profiles"))
+PROFILE_INTERVAL_S = float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000
+MAX_PROFILES = int(os.getenv("PROFILE_MAX_STORED", "200"))
+PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+TRUTHY = {"1", "true", "yes", "on"}
+T = TypeVar("T")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    # Samples the request's thread, plus any thread doing work on its
+    # behalf while it does (see follow); those stacks are rooted at a
+    # "thread <name>" frame.
+    def __init__(self, thread_id: int | None = None, interval: float = PROFILE_INTERVAL_S) -> None:
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.elapsed_s = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+        self._followed: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = [(self.thread_id, None), *self._followed.items()]
+            for thread_id, root in threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if root is not None:
+                    labels.append(root)
+                with self._lock:
+                    self.stacks[";".join(reversed(labels))] += 1
+                    self.samples += 1
+
+    @contextmanager
+    def follow(self, thread: threading.Thread) -> Iterator[None]:
+        with self._lock:
+            self._followed[thread.ident] = f"thread {thread.name}"
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._followed.pop(thread.ident, None)
+
+    def add_folded(self, folded: str, root: str) -> None:
+        # Merges stacks sampled elsewhere, e.g. in a module worker process.
+        for line in folded.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            with self._lock:
+                self.stacks[f"{root};{stack}"] += int(count)
+                self.samples += int(count)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed_s = time.perf_counter() - self._started
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    def __init__(self, directory: str = PROFILE_DIR, max_profiles: int = MAX_PROFILES) -> None:
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.folded")
+
+    def save(self, profiler: SamplingProfiler) -> str:
+        profile_id = uuid.uuid4().hex
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile_id), "w", encoding="utf-8") as f:
+            f.write(profiler.folded())
+        self._evict()
+        return profile_id
+
+    def load(self, profile_id: str) -> str | None:
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        try:
+            with open(self._path(profile_id), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".folded")
+            ]
+            if len(entries) <= self.max_profiles:
+                return
+            entries.sort(key=os.path.getmtime)
+            for path in entries[: len(entries) - self.max_profiles]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+PROFILES = ProfileStore()
+# The profiler of the request being handled, if it asked for one.
+ACTIVE_PROFILER: ContextVar[SamplingProfiler | None] = ContextVar("active_profiler", default=None)
+
+
+def follow_profile(fn: Callable[..., T]) -> Callable[..., T]:
+    # fn as handed off by the current request: whichever thread runs it is
+    # sampled by the request's profiler for as long as it does.
+    profiler = ACTIVE_PROFILER.get()
+    if profiler is None:
+        return fn
+
+    def run(*args, **kwargs) -> T:
+        with profiler.follow(threading.current_thread()):
+            return fn(*args, **kwargs)
+
+    return run
+
+
+def profiling_requested(headers: Mapping[str, str], query: Mapping[str, str]) -> bool:
+    flag = headers.get("x-profile") or query.get("profile") or ""
+    return flag.lower() in TRUTHY
+
+
+@contextmanager
+def profiling(enabled: bool = True) -> Iterator[SamplingProfiler | None]:
+    # Samples the calling thread, and work it hands off, for the block.
+    if not enabled:
+        yield None
+        return
+    profiler = SamplingProfiler()
+    token = ACTIVE_PROFILER.set(profiler)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        ACTIVE_PROFILER.reset(token)
+
+
+@contextmanager
+def profile_request(
+    enabled: bool, headers: dict[str, str], store: ProfileStore | None = None
+) -> Iterator[None]:
+    profiler = None
+    try:
+        with profiling(enabled) as profiler:
+            yield
+    finally:
+        if profiler is not None:
+            headers["X-Profile-Id"] = (store or PROFILES).save(profiler)
+            headers["X-Profile-Samples"] = str(profiler.samples)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+from typing import Any, Hashable, Iterator, Sequence
+
+SAMPLING_MODES = ("plain", "stratified")
+
+
+def _rank(card: Any) -> str:
+    return card[0] if isinstance(card, tuple) else card.rank
+
+
+def iter_deals(
+    deck: Sequence[Any], count: int, mode: str = "plain", rng: random.Random | None = None
+) -> Iterator[tuple[list[Any], Hashable]]:
+    # Endless (cards, group) deals of `count` cards from `deck`. The group
+    # is what SampleStats needs to measure the variance: the rank of the
+    # first card for stratified deals, which walk shuffled passes so every
+    # card leads equally often.
+    rng = rng or random.Random()
+    if mode == "stratified":
+        order = list(range(len(deck)))
+        while True:
+            rng.shuffle(order)
+            for first in order:
+                rest = rng.sample([*deck[:first], *deck[first + 1 :]], count - 1)
+                yield [deck[first], *rest], _rank(deck[first])
+    elif mode == "plain":
+        while True:
+            yield rng.sample(deck, count), None
+    else:
+        raise ValueError(f"Unknown sampling mode: {mode}")
+
+
+class SampleStats:
+    # Running means of per-deal outcome vectors, plus the variance of one
+    # deal's contribution under the sampling design: Var(mean) * count.
+    # Comparing it across modes shows how many iterations each one needs
+    # for the same confidence.
+    def __init__(self, mode: str, outcomes: int = 1) -> None:
+        self.mode = mode
+        self.count = 0
+        self.sums = [0.0] * outcomes
+        # group -> [n, sums, sums of squares].
+        self._groups: dict[Hashable, list] = {}
+
+    def add(self, values: Sequence[float], group: Hashable = None) -> None:
+        self.count += 1
+        for i, value in enumerate(values):
+            self.sums[i] += value
+        self._accumulate(group if self.mode == "stratified" else None, values)
+
+    def _accumulate(self, group: Hashable, values: Sequence[float]) -> None:
+        entry = self._groups.get(group)
+        if entry is None:
+            entry = self._groups[group] = [0, [0.0] * len(values), [0.0] * len(values)]
+        entry[0] += 1
+        for i, value in enumerate(values):
+            entry[1][i] += value
+            entry[2][i] += value * value
+
+    def means(self) -> list[float]:
+        return [total / self.count if self.count else 0.0 for total in self.sums]
+
+    def variance_per_iteration(self) -> list[float]:
+        units = sum(entry[0] for entry in self._groups.values())
+        within = [0.0] * len(self.sums)
+        for n, sums, squares in self._groups.values():
+            if n < 2:
+                continue
+            for i in range(len(sums)):
+                variance = max(squares[i] - sums[i] * sums[i] / n, 0.0) / (n - 1)
+                # Proportional allocation: each stratum weighs in by share.
+                within[i] += variance * n / units
+        return within
+
+    def effective_count(self, index: int = 0) -> float:
+        # Plain-sampling iterations worth the same confidence, for
+        # binomial-style intervals.
+        mean = self.means()[index]
+        variance = self.variance_per_iteration()[index]
+        if variance <= 0 or self.count < 2:
+            return float(self.count)
+        return self.count * mean * (1 - mean) / variance if 0 < mean < 1 else float(self.count)
+
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from .metrics import EQUITY_JOBS, EQUITY_QUEUE_DEPTH, EQUITY_SHED_RATE
+from .profiling import follow_profile
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+# computed: the job answered in time. shed: it never ran, because the
+# queue was full or its deadline could not be met by the time a worker
+# was free. expired: it was still running (or answered nothing) at the
+# deadline. Shed and expired jobs are answered by the caller's fallback.
+OUTCOMES = ("computed", "shed", "expired")
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    deadline: float = field(compare=False)
+    fn: Callable[[float], Any] = field(compare=False)
+    done: threading.Event = field(compare=False, default_factory=threading.Event)
+    result: Any = field(compare=False, default=None)
+    error: BaseException | None = field(compare=False, default=None)
+    shed: bool = field(compare=False, default=False)
+
+
+class EquityScheduler:
+    # Runs equity jobs on a few worker threads, highest priority first.
+    # Every job gets an absolute deadline, which is also passed to the job
+    # so it can stop sampling in time; callers never wait past it.
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 32,
+        min_budget_ms: float = 10,
+        grace_ms: float = 50,
+        on_outcome: Callable[[str, str], None] | None = None,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.min_budget = min_budget_ms / 1000
+        self.grace = grace_ms / 1000
+        self.on_outcome = on_outcome
+        self.counts = {
+            (PRIORITY_NAMES[priority], outcome): 0
+            for priority in PRIORITY_NAMES
+            for outcome in OUTCOMES
+        }
+        self._queue: list[_Job] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def shed_rate(self) -> float:
+        total = sum(self.counts.values())
+        shed = sum(count for (_, outcome), count in self.counts.items() if outcome != "computed")
+        return shed / total if total else 0.0
+
+    def run(
+        self,
+        fn: Callable[[float], Any],
+        *,
+        fallback: Callable[[], Any],
+        timeout_ms: float,
+        priority: int = INTERACTIVE,
+    ) -> tuple[Any, str]:
+        # Returns (result, outcome). A job that returns None counts as
+        # expired; fn receives the perf_counter deadline.
+        job = _Job(
+            priority, next(self._seq), time.perf_counter() + timeout_ms / 1000, follow_profile(fn)
+        )
+        evicted = None
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                victim = max(self._queue)
+                if victim.priority <= priority:
+                    evicted = job
+                else:
+                    self._queue.remove(victim)
+                    heapq.heapify(self._queue)
+                    evicted = victim
+            if evicted is not job:
+                heapq.heappush(self._queue, job)
+                self._start_workers()
+                self._cond.notify()
+        if evicted is not None:
+            evicted.shed = True
+            evicted.done.set()
+            if evicted is job:
+                return self._fallback(job, "shed", fallback)
+
+        job.done.wait(max(job.deadline - time.perf_counter(), 0) + self.grace)
+        if job.shed:
+            return self._fallback(job, "shed", fallback)
+        if job.done.is_set() and job.error is not None:
+            raise job.error
+        if not job.done.is_set() or job.result is None:
+            return self._fallback(job, "expired", fallback)
+        self._record(job, "computed")
+        return job.result, "computed"
+
+    def _fallback(self, job: _Job, outcome: str, fallback: Callable[[], Any]) -> tuple[Any, str]:
+        self._record(job, outcome)
+        return fallback(), outcome
+
+    def _record(self, job: _Job, outcome: str) -> None:
+        name = PRIORITY_NAMES.get(job.priority, str(job.priority))
+        with self._cond:
+            self.counts[(name, outcome)] = self.counts.get((name, outcome), 0) + 1
+        if self.on_outcome is not None:
+            self.on_outcome(name, outcome)
+
+    def _start_workers(self) -> None:
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name="equity-worker", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                job = heapq.heappop(self._queue)
+            if job.shed:
+                continue
+            if job.deadline - time.perf_counter() < self.min_budget:
+                job.shed = True
+                job.done.set()
+                continue
+            try:
+                job.result = job.fn(job.deadline)
+            except BaseException as exc:  # handed to the waiting caller
+                job.error = exc
+            job.done.set()
+
+
+SCHEDULER = EquityScheduler(
+    workers=int(os.getenv("EQUITY_WORKERS", "2")),
+    max_queue=int(os.getenv("EQUITY_MAX_QUEUE", "32")),
+    on_outcome=lambda priority, outcome: EQUITY_JOBS.inc(priority=priority, outcome=outcome),
+)
+EQUITY_QUEUE_DEPTH.set_function(SCHEDULER.queue_depth)
+EQUITY_SHED_RATE.set_function(SCHEDULER.shed_rate)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from typing import Sequence
+
+try:
+    import fcntl
+except ImportError:  # no advisory locks, so no shared cache
+    fcntl = None
+
+CACHE_MAGIC = b"EQCH"
+CACHE_VERSION = 1
+VALUE_COUNT = 4
+PROBE_LIMIT = 8
+# magic, version, slot_count, write clock
+HEADER = struct.Struct("<4sIII")
+# digest, seqlock version, last-write clock, sample count, tag, values
+SLOT = struct.Struct(f"<16sIIIi{VALUE_COUNT}d")
+SLOT_SIZE = 64
+SEQUENCE = struct.Struct("<I")
+EMPTY = bytes(16)
+
+
+def cache_digest(key: tuple) -> bytes:
+    # Keys are tuples of strings, numbers and nested tuples (canonical card
+    # groups), whose repr is stable across processes.
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).digest()
+
+
+class SharedEquityCache:
+    # An open-addressed hash table in a memory-mapped file, shared by every
+    # process that maps it. Reads take no lock: each slot carries a
+    # seqlock version that writers make odd while they write, and readers
+    # retry or miss if it changed underneath them. Writers serialise on an
+    # flock across processes and a lock within one (threads share the
+    # flock). A full probe window evicts its least recently written slot.
+    def __init__(self, path: str, slot_count: int) -> None:
+        if fcntl is None:
+            raise OSError("shared equity cache needs fcntl")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = HEADER.size + slot_count * SLOT_SIZE
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, HEADER.pack(CACHE_MAGIC, CACHE_VERSION, slot_count, 0), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, 0)
+        magic, version, stored_slots, _ = HEADER.unpack_from(self._map)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or len(self._map) != size:
+            self.close()
+            raise ValueError(f"{path} is not a compatible equity cache")
+        self.path = path
+        self.slot_count = stored_slots
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    def _offsets(self, digest: bytes) -> list[int]:
+        start = int.from_bytes(digest[:8], "little") % self.slot_count
+        return [
+            HEADER.size + ((start + step) % self.slot_count) * SLOT_SIZE
+            for step in range(min(PROBE_LIMIT, self.slot_count))
+        ]
+
+    def get(self, key: tuple) -> tuple[int, int, tuple[float, ...]] | None:
+        # Returns (count, tag, values) for the key, or None.
+        digest = cache_digest(key)
+        for offset in self._offsets(digest):
+            for _ in range(3):
+                before = SEQUENCE.unpack_from(self._map, offset + 16)[0]
+                stored, _, _, count, tag, *values = SLOT.unpack_from(self._map, offset)
+                if before % 2 == 0 and SEQUENCE.unpack_from(self._map, offset + 16)[0] == before:
+                    break
+            else:
+                return None
+            if stored == digest:
+                return count, tag, tuple(values)
+            if stored == EMPTY:
+                return None
+        return None
+
+    def put(self, key: tuple, count: int, tag: int, values: Sequence[float]) -> bool:
+        # Stores the entry unless one with at least as many samples is
+        # already there. Returns whether it was written.
+        digest = cache_digest(key)
+        padded = [*values, *[0.0] * (VALUE_COUNT - len(values))][:VALUE_COUNT]
+        with self._lock:
+            return self._put(digest, count, tag, padded)
+
+    def _put(self, digest: bytes, count: int, tag: int, padded: list[float]) -> bool:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            target = None
+            oldest = None
+            for offset in self._offsets(digest):
+                stored, _, stamp, stored_count, _, *_ = SLOT.unpack_from(self._map, offset)
+                if stored == digest:
+                    if stored_count >= count:
+                        return False
+                    target = offset
+                    break
+                if stored == EMPTY:
+                    target = offset
+                    break
+                if oldest is None or stamp < oldest[0]:
+                    oldest = (stamp, offset)
+            if target is None:
+                target = oldest[1]
+            magic, version, slot_count, clock = HEADER.unpack_from(self._map)
+            clock = (clock + 1) % 2**32
+            HEADER.pack_into(self._map, 0, magic, version, slot_count, clock)
+            sequence = SEQUENCE.unpack_from(self._map, target + 16)[0]
+            SEQUENCE.pack_into(self._map, target + 16, (sequence + 1) % 2**32)
+            SLOT.pack_into(
+                self._map, target, digest, (sequence + 1) % 2**32, clock, count, tag, *padded
+            )
+            SEQUENCE.pack_into(self._map, target + 16, (sequence + 2) % 2**32)
+            return True
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+def open_shared_cache(path: str, slot_count: int) -> SharedEquityCache | None:
+    if not path or slot_count <= 0:
+        return None
+    try:
+        return SharedEquityCache(path, slot_count)
+    except (OSError, ValueError, struct.error):
+        return None
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -19,15 +19,26 @@ class ModuleConfig(BaseModel):
     betting_rules: dict[str, Any] = Field(default_factory=dict)
 
 
+class DrillFilters(BaseModel):
+    # None matches any spot.
+    category: int | None = None
+    position: int | None = None
+    difficulty: Literal["easy", "medium", "hard"] | None = None
+
+
 class SessionCreateRequest(BaseModel):
     module_id: str
     player_count: int
+    # "drill" serves pre-solved spots instead of dealing hands to play out.
+    mode: Literal["play", "drill"] = "play"
+    drill: DrillFilters = Field(default_factory=DrillFilters)
 
 
 class SessionState(BaseModel):
     id: str
     module_id: str
     player_count: int
+    version: int = 0
     payload: dict[str, Any] = Field(default_factory=dict)
 
 
@@ -35,3 +46,9 @@ class ActionRequest(BaseModel):
     player_index: int
     action: str
     amount: float | None = None
+    discards: list[str] | None = None
+    expected_version: int | None = None
+
+
+class WhatIfRequest(BaseModel):
+    iterations: int | None = Field(default=None, ge=1, le=20000)
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import ast
+import multiprocessing
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+from typing import Any
+
+from .metrics import METRICS, MODULE_WORKER_RESTARTS
+from .profiling import ACTIVE_PROFILER, profiling
+
+# 0 runs modules inside the web process. MODULE_WORKERS_<ID> overrides it
+# per module, e.g. MODULE_WORKERS_FIVE_CARD_DRAW=4.
+MODULE_WORKERS = int(os.getenv("MODULE_WORKERS", "0"))
+MODULE_HOOK_TIMEOUT_S = float(os.getenv("MODULE_HOOK_TIMEOUT_S", "30"))
+# Hooks a module may leave out; the pool only offers the ones it defines.
+OPTIONAL_HOOKS = ("init_drill", "action_values", "discard_state")
+# Ops that need the session's state to still be in the worker.
+STATE_OPS = ("apply", "render", "action_values")
+
+
+class ModuleWorkerError(RuntimeError):
+    pass
+
+
+class ModuleSessionLost(ModuleWorkerError):
+    # The worker holding a session's state died or was restarted.
+    pass
+
+
+def worker_count(module_id: str) -> int:
+    return int(os.getenv(f"MODULE_WORKERS_{module_id.upper()}", str(MODULE_WORKERS)))
+
+
+@dataclass(frozen=True)
+class RemoteState:
+    # What a session holds in place of its state: the worker that owns
+    # the state and its key there.
+    worker: int
+    key: str
+
+
+@dataclass
+class _Worker:
+    index: int
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    process: multiprocessing.process.BaseProcess | None = None
+    conn: Connection | None = None
+    sessions: int = 0
+
+
+def _module_hooks(module_path: str) -> set[str]:
+    # Names bound at the top level of module.py, read without importing
+    # it: the module itself only ever runs in the workers.
+    with open(os.path.join(module_path, "module.py"), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names: set[str] = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names.update(target.id for target in targets if isinstance(target, ast.Name))
+    return names
+
+
+def _serve(conn: Connection, module_path: str, module_id: str, config: dict) -> None:
+    # Worker process main loop: one request, one reply, states kept here.
+    # Every reply carries the metrics recorded here since the last one,
+    # and the hook's stacks when the calling request is being profiled.
+    from .module_loader import _load_python_module
+
+    module = _load_python_module(module_path, module_id)
+    if hasattr(module, "configure"):
+        module.configure(config)
+    states: dict[str, Any] = {}
+    while True:
+        try:
+            op, key, args, profile = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        with profiling(profile) as profiler:
+            try:
+                if op in STATE_OPS and key not in states:
+                    status, reply = "lost", None
+                else:
+                    status, reply = "ok", _run_hook(module, states, op, key, args)
+            except Exception as exc:
+                status, reply = "error", f"{type(exc).__name__}: {exc}"
+        folded = profiler.folded() if profiler is not None else None
+        conn.send((status, reply, METRICS.drain(), folded))
+
+
+def _run_hook(module: Any, states: dict[str, Any], op: str, key: str, args: tuple) -> Any:
+    if op == "init":
+        states[key] = module.init_state(*args)
+    elif op == "init_drill":
+        state = module.init_drill(*args)
+        if state is not None:
+            states[key] = state
+        return state is not None
+    elif op == "apply":
+        states[key] = module.apply_action(states[key], *args)
+    elif op == "render":
+        return module.render_payload(states[key], *args)
+    elif op == "action_values":
+        return module.action_values(states[key], *args)
+    elif op == "discard":
+        state = states.pop(key, None)
+        if state is not None and hasattr(module, "discard_state"):
+            module.discard_state(state)
+    else:
+        raise ValueError(f"unknown op {op!r}")
+    return None
+
+
+class ModuleWorkerPool:
+    # Stands in for a loaded module: the same hooks, run in a pool of
+    # worker processes over pipes. Each session is pinned to the worker
+    # that created its state, and the state never leaves that worker, so
+    # calls only carry actions and payloads. A worker that dies or
+    # overruns MODULE_HOOK_TIMEOUT_S is killed and restarted; calls on the
+    # sessions pinned to it then raise ModuleSessionLost. Optional hooks
+    # exist only when the module defines them, so capability checks on
+    # the pool answer as they would for the module. release_state always
+    # frees a session's state, whether or not the module has discard_state.
+    # Workers' metrics are merged into this process's /metrics with each
+    # reply (gauges labelled by worker), and their hooks show up in
+    # request profiles.
+    def __init__(self, module_path: str, module_id: str, config: dict, workers: int) -> None:
+        self.module_path = module_path
+        self.module_id = module_id
+        self.config = config
+        self.timeout = MODULE_HOOK_TIMEOUT_S
+        self._workers = [_Worker(index) for index in range(max(1, workers))]
+        self._pin_lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+        hooks = _module_hooks(module_path)
+        for name in OPTIONAL_HOOKS:
+            if name in hooks:
+                setattr(self, name, getattr(self, f"_{name}"))
+
+    def init_state(self, player_count: int) -> RemoteState:
+        worker = self._pin()
+        state = RemoteState(worker.index, uuid.uuid4().hex)
+        self._call(worker, "init", state.key, player_count)
+        return state
+
+    def _init_drill(self, player_count: int, filters: dict) -> RemoteState | None:
+        worker = self._pin()
+        state = RemoteState(worker.index, uuid.uuid4().hex)
+        if not self._call(worker, "init_drill", state.key, player_count, filters):
+            with self._pin_lock:
+                worker.sessions = max(worker.sessions - 1, 0)
+            return None
+        return state
+
+    def apply_action(self, state: RemoteState, action: dict, player_count: int) -> RemoteState:
+        self._call(self._workers[state.worker], "apply", state.key, action, player_count)
+        return state
+
+    def render_payload(self, state: RemoteState, player_count: int) -> dict:
+        return self._call(self._workers[state.worker], "render", state.key, player_count)
+
+    def _action_values(
+        self, state: RemoteState, player_count: int, iterations: int | None = None
+    ) -> dict:
+        return self._call(
+            self._workers[state.worker], "action_values", state.key, player_count, iterations
+        )
+
+    def release_state(self, state: RemoteState) -> None:
+        worker = self._workers[state.worker]
+        self._call(worker, "discard", state.key)
+        with self._pin_lock:
+            worker.sessions = max(worker.sessions - 1, 0)
+
+    _discard_state = release_state
+
+    def _pin(self) -> _Worker:
+        with self._pin_lock:
+            worker = min(self._workers, key=lambda entry: entry.sessions)
+            worker.sessions += 1
+        return worker
+
+    def close(self) -> None:
+        for worker in self._workers:
+            with worker.lock:
+                self._stop(worker)
+
+    def _call(self, worker: _Worker, op: str, key: str, *args: Any) -> Any:
+        profiler = ACTIVE_PROFILER.get()
+        with worker.lock:
+            if worker.process is None:
+                self._start(worker)
+            try:
+                worker.conn.send((op, key, args, profiler is not None))
+                if not worker.conn.poll(self.timeout):
+                    raise TimeoutError(f"no reply in {self.timeout:g}s")
+                status, reply, metrics, folded = worker.conn.recv()
+            except (OSError, EOFError, TimeoutError) as exc:
+                self._stop(worker)
+                MODULE_WORKER_RESTARTS.inc(module=self.module_id)
+                # Every state the worker held went with it.
+                error = ModuleSessionLost if op in STATE_OPS else ModuleWorkerError
+                raise error(
+                    f"{self.module_id} worker {worker.index} failed during {op}: {exc}"
+                ) from exc
+        METRICS.merge(metrics, worker=f"{self.module_id}/{worker.index}")
+        if folded and profiler is not None:
+            profiler.add_folded(folded, f"process {self.module_id}-worker-{worker.index}")
+        if status == "error":
+            raise ModuleWorkerError(f"{self.module_id} {op} failed: {reply}")
+        if status == "lost":
+            raise ModuleSessionLost(f"{self.module_id} worker {worker.index} lost this session")
+        return reply
+
+    def _start(self, worker: _Worker) -> None:
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=_serve,
+            args=(child, self.module_path, self.module_id, self.config),
+            name=f"{self.module_id}-worker-{worker.index}",
+            daemon=True,
+        )
+        process.start()
+        child.close()
+        worker.process, worker.conn = process, parent
+
+    def _stop(self, worker: _Worker) -> None:
+        if worker.process is None:
+            return
+        worker.conn.close()
+        worker.process.kill()
+        worker.process.join(5)
+        worker.process, worker.conn = None, None
+        with self._pin_lock:
+            worker.sessions = 0
@@ -1,14 +1,27 @@
 from __future__ import annotations
 
 import os
+import time
 import uuid
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-
-from server.core.module_loader import build_registry
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from server.core.metrics import (
+    ACTION_CONFLICTS,
+    ACTION_SECONDS,
+    METRICS,
+    REQUEST_SECONDS,
+    SESSIONS_ACTIVE,
+    SESSIONS_CREATED,
+    span,
+)
+from server.core.module_loader import LoadedModule, build_registry
+from server.core.profiling import PROFILES, profile_request, profiling_requested
 from server.core.session_store import Session, SessionStore
-from server.core.types import ActionRequest, SessionCreateRequest, SessionState
+from server.core.types import ActionRequest, SessionCreateRequest, SessionState, WhatIfRequest
+from server.core.workers import ModuleSessionLost, ModuleWorkerError
 
 
 app = FastAPI(title="Trainer Backend")
@@ -16,6 +29,7 @@ app = FastAPI(title="Trainer Backend")
 MODULES_ROOT = os.path.join(os.path.dirname(__file__), "modules")
 MODULE_REGISTRY = build_registry(MODULES_ROOT)
 SESSIONS = SessionStore()
+SESSIONS_ACTIVE.set_function(lambda: len(SESSIONS))
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,9 +37,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Profile-Id", "X-Profile-Samples"],
 )
 
 
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        route=getattr(route, "path", "unmatched"),
+        method=request.method,
+        status=str(response.status_code),
+    )
+    return response
+
+
+@app.exception_handler(ModuleWorkerError)
+async def module_worker_failed(request: Request, exc: ModuleWorkerError) -> JSONResponse:
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.exception_handler(ModuleSessionLost)
+async def module_session_lost(request: Request, exc: ModuleSessionLost) -> JSONResponse:
+    # The worker that held the state is gone; the client has to start over.
+    SESSIONS.remove(request.path_params.get("session_id", ""))
+    return JSONResponse(status_code=410, content={"detail": f"Session lost: {exc}"})
+
+
 @app.get("/health")
 def health() -> dict:
     return {"ok": True}
@@ -36,8 +77,19 @@ def list_modules() -> list[dict]:
     return [module.config.model_dump() for module in MODULE_REGISTRY.values()]
 
 
+def _wants_profile(http_request: Request) -> bool:
+    return profiling_requested(http_request.headers, http_request.query_params)
+
+
 @app.post("/sessions", response_model=SessionState)
-def create_session(request: SessionCreateRequest) -> SessionState:
+def create_session(
+    request: SessionCreateRequest, http_request: Request, response: Response
+) -> SessionState:
+    with profile_request(_wants_profile(http_request), response.headers):
+        return _create_session(request)
+
+
+def _create_session(request: SessionCreateRequest) -> SessionState:
     module = MODULE_REGISTRY.get(request.module_id)
     if not module:
         raise HTTPException(status_code=404, detail="Module not found.")
@@ -46,7 +98,16 @@ def create_session(request: SessionCreateRequest) -> SessionState:
     if request.player_count < limits.min or request.player_count > limits.max:
         raise HTTPException(status_code=400, detail="Invalid player count.")
 
-    state = module.module.init_state(request.player_count)
+    if request.mode == "drill":
+        if not hasattr(module.module, "init_drill"):
+            raise HTTPException(status_code=400, detail="Module has no drills.")
+        with span(request.module_id, "init_drill"):
+            state = module.module.init_drill(request.player_count, request.drill.model_dump())
+        if state is None:
+            raise HTTPException(status_code=404, detail="No drill spots match.")
+    else:
+        with span(request.module_id, "init_state"):
+            state = module.module.init_state(request.player_count)
     session_id = str(uuid.uuid4())
     session = Session(
         id=session_id,
@@ -55,18 +116,19 @@ def create_session(request: SessionCreateRequest) -> SessionState:
         state=state,
     )
     SESSIONS.add(session)
+    SESSIONS_CREATED.inc(module=request.module_id)
 
-    payload = module.module.render_payload(state, request.player_count)
-    return SessionState(
-        id=session_id,
-        module_id=request.module_id,
-        player_count=request.player_count,
-        payload=payload,
-    )
+    with session.lock:
+        return _render_session(session, module)
 
 
 @app.get("/sessions/{session_id}", response_model=SessionState)
-def get_session(session_id: str) -> SessionState:
+def get_session(session_id: str, http_request: Request, response: Response) -> SessionState:
+    with profile_request(_wants_profile(http_request), response.headers):
+        return _get_session(session_id)
+
+
+def _get_session(session_id: str) -> SessionState:
     session = SESSIONS.get(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found.")
@@ -75,17 +137,19 @@ def get_session(session_id: str) -> SessionState:
     if not module:
         raise HTTPException(status_code=404, detail="Module not found.")
 
-    payload = module.module.render_payload(session.state, session.player_count)
-    return SessionState(
-        id=session.id,
-        module_id=session.module_id,
-        player_count=session.player_count,
-        payload=payload,
-    )
+    with session.lock:
+        return _render_session(session, module)
 
 
 @app.post("/sessions/{session_id}/action", response_model=SessionState)
-def apply_action(session_id: str, request: ActionRequest) -> SessionState:
+def apply_action(
+    session_id: str, request: ActionRequest, http_request: Request, response: Response
+) -> SessionState:
+    with profile_request(_wants_profile(http_request), response.headers):
+        return _apply_action(session_id, request)
+
+
+def _apply_action(session_id: str, request: ActionRequest) -> SessionState:
     session = SESSIONS.get(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found.")
@@ -94,14 +158,98 @@ def apply_action(session_id: str, request: ActionRequest) -> SessionState:
     if not module:
         raise HTTPException(status_code=404, detail="Module not found.")
 
-    session.state = module.module.apply_action(
-        session.state, request.model_dump(), session.player_count
-    )
-    payload = module.module.render_payload(session.state, session.player_count)
-    return SessionState(
-        id=session.id,
-        module_id=session.module_id,
-        player_count=session.player_count,
-        payload=payload,
+    # A double click or retry already carries a stale version: refuse it
+    # up front, and again once the action ahead of it has finished.
+    _check_version(session, request.expected_version)
+    with session.lock:
+        _check_version(session, request.expected_version)
+        start = time.perf_counter()
+        try:
+            session.state = module.module.apply_action(
+                session.state, request.model_dump(exclude={"expected_version"}), session.player_count
+            )
+        finally:
+            # Modules mutate state in place, so even a failed action moves it on.
+            session.version += 1
+        ACTION_SECONDS.observe(
+            time.perf_counter() - start, module=session.module_id, action=request.action or "none"
+        )
+        return _render_session(session, module)
+
+
+@app.post("/sessions/{session_id}/what_if")
+def what_if(
+    session_id: str, request: WhatIfRequest, http_request: Request, response: Response
+) -> dict:
+    with profile_request(_wants_profile(http_request), response.headers):
+        return _what_if(session_id, request)
+
+
+def _what_if(session_id: str, request: WhatIfRequest) -> dict:
+    session = SESSIONS.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found.")
+
+    module = MODULE_REGISTRY.get(session.module_id)
+    if not module or not hasattr(module.module, "action_values"):
+        raise HTTPException(status_code=404, detail="Module has no what-if values.")
+
+    with session.lock, span(session.module_id, "action_values"):
+        values = module.module.action_values(
+            session.state, session.player_count, request.iterations
+        )
+        return {**values, "version": session.version}
+
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str) -> dict:
+    session = SESSIONS.remove(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    module = MODULE_REGISTRY.get(session.module_id)
+    # Modules that prepare work in the background get to cancel it, and
+    # worker pools free the state they hold.
+    discard = module and (
+        getattr(module.module, "discard_state", None)
+        or getattr(module.module, "release_state", None)
     )
+    if discard:
+        with session.lock:
+            discard(session.state)
+    return {"ok": True}
+
 
+def _check_version(session: Session, expected: int | None) -> None:
+    if expected is not None and expected != session.version:
+        ACTION_CONFLICTS.inc(module=session.module_id)
+        raise HTTPException(
+            status_code=409,
+            detail=f"Session is at version {session.version}, not {expected}; reload it.",
+        )
+
+
+def _render_session(session: Session, module: LoadedModule) -> SessionState:
+    # Callers hold session.lock.
+    with span(session.module_id, "render_payload"):
+        payload = module.module.render_payload(session.state, session.player_count)
+    with span(session.module_id, "build_response"):
+        return SessionState(
+            id=session.id,
+            module_id=session.module_id,
+            player_count=session.player_count,
+            version=session.version,
+            payload=payload,
+        )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile(profile_id: str) -> PlainTextResponse:
+    folded = PROFILES.load(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return PlainTextResponse(folded)
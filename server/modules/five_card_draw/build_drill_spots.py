@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from . import module as draw
+from .drill_store import DIFFICULTIES, STORE_PATH, write_spot_store
+
+MODULE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "module.json")
+# Gap between the best answer and the best different one, at or above
+# which a spot is easy, then medium; below both it is hard. Betting gaps
+# are in chips per chip in the pot, draw gaps in win-chance points.
+DIFFICULTY_EDGES = {"bet": (0.5, 0.15), "draw": (5.0, 1.5)}
+
+
+def _configure() -> None:
+    with open(MODULE_CONFIG, "r", encoding="utf-8") as f:
+        draw.configure(json.load(f))
+
+
+def difficulty(kind: str, gap: float) -> str:
+    easy, medium = DIFFICULTY_EDGES[kind]
+    if gap >= easy:
+        return DIFFICULTIES[0]
+    return DIFFICULTIES[1] if gap >= medium else DIFFICULTIES[2]
+
+
+def play_to_spot(players: int, rng: random.Random) -> dict | None:
+    # Deals a hand, plays it with the bot policy in every seat and returns
+    # one of the trainee's decisions in it, picked at random.
+    state = draw._deal_new_hand(
+        players,
+        round_number=1,
+        dealer_index=rng.randrange(players),
+        trainee_index=rng.randrange(players),
+        rng=rng,
+    )
+    trainee = state["trainee_index"]
+    state = draw._auto_play_until_trainee(state, players, rng)
+    decisions = []
+    for _ in range(players * (draw.MAX_RAISES + 2) * 3):
+        if state["phase"] not in ("betting", "draw") or not draw.available_actions(state, players):
+            break
+        snapshot = draw._fork(state)
+        snapshot["action_log"] = list(state["action_log"])
+        decisions.append(snapshot)
+        if state["phase"] == "draw":
+            discards = draw._choose_opponent_discards(state, trainee)
+            state = draw._apply_draw(state, trainee, discards, rng)
+        else:
+            action, amount = draw._choose_opponent_action(state, trainee, rng)
+            state = draw._apply_player_action(state, trainee, action, amount or 0.0, players)
+        state = draw._auto_play_until_trainee(state, players, rng)
+    return rng.choice(decisions) if decisions else None
+
+
+def solve_spot(state: dict, players: int, iterations: int, rng: random.Random) -> dict:
+    trainee = state["trainee_index"]
+    if state["phase"] == "draw":
+        kind = "draw"
+        hand = state["hands"][trainee]
+        options = draw.draw_options(hand, len(draw._active_players(state)) - 1)
+        solution = {
+            "options": [
+                {
+                    "discards": [hand[i].code for i in option.discards],
+                    "win_pct": round(option.win_estimate * 100, 1),
+                }
+                for option in options
+            ]
+        }
+        gap = solution["options"][0]["win_pct"] - solution["options"][1]["win_pct"]
+        advice = draw._draw_advice(state)
+    else:
+        kind = "bet"
+        candidates = draw._candidate_actions(state, players)
+        stats = draw._action_rollouts(state, players, candidates, iterations, rng=rng)
+        actions = []
+        for (action, amount), mean, variance in zip(
+            candidates, stats.means(), stats.variance_per_iteration()
+        ):
+            half_width = 1.96 * math.sqrt(variance / stats.count)
+            actions.append(
+                {
+                    "action": action,
+                    "amount": amount,
+                    "ev": round(mean, 3),
+                    "ci95": [round(mean - half_width, 3), round(mean + half_width, 3)],
+                }
+            )
+        best = max(actions, key=lambda entry: entry["ev"])
+        # Bet sizes are one answer for grading difficulty: the gap is to
+        # the best action of another kind.
+        other = max(
+            (entry["ev"] for entry in actions if entry["action"] != best["action"]),
+            default=best["ev"],
+        )
+        gap = (best["ev"] - other) / state["pot_total"]
+        solution = {"actions": actions, "iterations": stats.count}
+        advice = {
+            "win_pct": draw._estimate_win_pct(state, trainee, iterations=iterations),
+            "recommended_action": best["action"],
+            "recommended_amount": best["amount"],
+            "notes": f"Solved over {stats.count} rollouts: {draw._describe_bet(best)} "
+            f"is worth {best['ev']:+.2f}.",
+            "action_values": actions,
+            "estimate": "solved",
+        }
+    # The spot is rendered once, here, with its solved advice in place.
+    state["prepared_advice"] = (draw._advice_key(state), advice)
+    payload = draw.render_payload(state, players)
+    del state["prepared_advice"]
+    return {
+        "players": players,
+        "category": draw._evaluate_hand(state["hands"][trainee])[0],
+        "position": (trainee - state["dealer_index"] - 1) % players,
+        "difficulty": difficulty(kind, gap),
+        "kind": kind,
+        "gap": round(gap, 4),
+        "payload": payload,
+        "solution": solution,
+    }
+
+
+def build_part(players: int, count: int, iterations: int, seed: int) -> list[dict]:
+    _configure()
+    # A local generator: reseeding the global one would reset the dice of
+    # everything else sharing this process.
+    rng = random.Random(seed)
+    spots = []
+    while len(spots) < count:
+        state = play_to_spot(players, rng)
+        if state is not None:
+            spots.append(solve_spot(state, players, iterations, rng))
+    return spots
+
+
+def build_spots(
+    players: list[int], count: int, iterations: int, workers: int, chunk: int, seed: int
+) -> list[dict]:
+    parts = [
+        (table, min(chunk, count - start), iterations, seed * 1_000_003 + table * 10_007 + start)
+        for table in players
+        for start in range(0, count, chunk)
+    ]
+    if workers <= 1:
+        return [spot for part in parts for spot in build_part(*part)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(build_part, *part) for part in parts]
+        return [spot for future in futures for spot in future.result()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Generate and solve five-card-draw training spots for drill sessions."
+    )
+    parser.add_argument("-o", "--output", default=STORE_PATH, help="Store path to write.")
+    parser.add_argument("-n", "--spots", type=int, default=2000, help="Spots per table size.")
+    parser.add_argument("-p", "--players", type=int, nargs="+", default=[2, 3, 4, 5, 6])
+    parser.add_argument("--iterations", type=int, default=1000, help="Rollouts per betting spot.")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk", type=int, default=50, help="Spots per worker task.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    _configure()
+    spots = build_spots(
+        args.players, args.spots, args.iterations, args.workers, args.chunk, args.seed
+    )
+    written = write_spot_store(args.output, spots, draw.ALLOWED_BETS, draw.MAX_RAISES)
+    elapsed = time.perf_counter() - started
+    mix = Counter(spot["difficulty"] for spot in spots)
+    print(
+        f"Wrote {written} spots ({', '.join(f'{mix[d]} {d}' for d in DIFFICULTIES)}) "
+        f"to {args.output} in {elapsed:.1f}s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .equity_table import MAX_OPPONENTS, TABLE_PATH, write_equity_table
+from .hand_table import CLASS_COUNT, FLUSH_CLASSES, PLAIN_CLASSES, RANKS, RANK_PRIMES
+
+SUITS = ["S", "H", "D", "C"]
+DECK = [(rank, suit) for suit in SUITS for rank in RANKS]
+Row = list[tuple[float, float]]
+
+
+CLASS_KEYS = {
+    entry[0]: (key, is_flush)
+    for classes, is_flush in ((PLAIN_CLASSES, False), (FLUSH_CLASSES, True))
+    for key, entry in classes.items()
+}
+
+
+def representative_hand(class_rank: int) -> list[tuple[str, str]]:
+    key, is_flush = CLASS_KEYS[class_rank]
+    ranks = []
+    for rank in reversed(RANKS):
+        while key % RANK_PRIMES[rank] == 0:
+            ranks.append(rank)
+            key //= RANK_PRIMES[rank]
+    if is_flush:
+        return [(rank, "S") for rank in ranks]
+    # Cycling suits keeps paired ranks distinct and never makes a flush.
+    return [(rank, SUITS[i % len(SUITS)]) for i, rank in enumerate(ranks)]
+
+
+def _score(cards: list[tuple[str, str]]) -> int:
+    key = 1
+    for rank, _ in cards:
+        key *= RANK_PRIMES[rank]
+    suit = cards[0][1]
+    if all(card_suit == suit for _, card_suit in cards):
+        return FLUSH_CLASSES[key][0]
+    return PLAIN_CLASSES[key][0]
+
+
+def class_equity(class_rank: int, iterations: int, seed: int) -> Row:
+    # Same model as the live sampler: opponents hold random five-card hands
+    # and ties count once per tied showdown.
+    hand = representative_hand(class_rank)
+    hero = _score(hand)
+    deck = [card for card in DECK if card not in hand]
+    rng = random.Random(seed * 1_000_003 + class_rank)
+    wins = [0] * MAX_OPPONENTS
+    ties = [0] * MAX_OPPONENTS
+    for _ in range(iterations):
+        cards = rng.sample(deck, 5 * MAX_OPPONENTS)
+        best = -1
+        for opponent in range(MAX_OPPONENTS):
+            score = _score(cards[opponent * 5 : opponent * 5 + 5])
+            if score > best:
+                best = score
+            if best > hero:
+                break
+            if best == hero:
+                ties[opponent] += 1
+            else:
+                wins[opponent] += 1
+    return [(wins[i] / iterations, ties[i] / iterations) for i in range(MAX_OPPONENTS)]
+
+
+def _chunk_equity(class_ranks: range, iterations: int, seed: int) -> list[Row]:
+    return [class_equity(class_rank, iterations, seed) for class_rank in class_ranks]
+
+
+def build_rows(iterations: int, workers: int, seed: int = 0, chunk_size: int = 64) -> list[Row]:
+    chunks = [
+        range(start, min(start + chunk_size, CLASS_COUNT))
+        for start in range(0, CLASS_COUNT, chunk_size)
+    ]
+    if workers <= 1:
+        return [row for chunk in chunks for row in _chunk_equity(chunk, iterations, seed)]
+    rows: list[Row] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_chunk_equity, chunk, iterations, seed) for chunk in chunks]
+        for future in futures:
+            rows.extend(future.result())
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Build the five-card-draw preflop equity table."
+    )
+    parser.add_argument("-o", "--output", default=TABLE_PATH, help="Table path to write.")
+    parser.add_argument(
+        "-n", "--iterations", type=int, default=2000, help="Deals sampled per hand class."
+    )
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rows = build_rows(args.iterations, args.workers, args.seed)
+    write_equity_table(args.output, rows, args.iterations)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {len(rows)} classes x {MAX_OPPONENTS} opponent counts to {args.output} in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
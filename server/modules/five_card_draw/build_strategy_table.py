@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from .draw_engine import _reference_hold
+from .hand_table import CACHE_DIR, RANKS, load_json_cache, lookup, store_json_cache
+from .strategy_table import BUCKET_COUNT, TABLE_PATH, node_key, write_strategy_table
+
+SUITS = ["S", "H", "D", "C"]
+DECK = [(rank, suit) for suit in SUITS for rank in RANKS]
+CHECKPOINT_VERSION = 1
+CHECKPOINT_DIR = os.path.join(CACHE_DIR, "cfr")
+MODULE_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "module.json")
+Matrix = list[list[float]]
+
+
+@dataclass(frozen=True)
+class Node:
+    key: str
+    # None at terminal nodes, which carry the round's contributions instead.
+    actor: int | None
+    actions: tuple[str, ...] = ()
+    children: tuple[int, ...] = ()
+    contribs: tuple[float, ...] = ()
+    folded: tuple[bool, ...] = ()
+
+
+@dataclass(frozen=True)
+class Game:
+    # One betting round with `players` seats in acting order. Hands are
+    # hand-category buckets; at the end of the round the pot is shared by
+    # the bucket equity matrix (after the draw for round 1, at showdown
+    # for round 2). Everything is measured from the start of the round.
+    players: int
+    betting_round: int
+    bets: tuple[float, ...]
+    max_raises: int
+    pot: float
+    prior: tuple[float, ...]
+    equity: tuple[tuple[float, ...], ...]
+
+
+def betting_rules(path: str = MODULE_CONFIG) -> tuple[list[float], int, float]:
+    # The module's own limits, worked out the way module.configure does.
+    with open(path, "r", encoding="utf-8") as f:
+        rules = json.load(f).get("betting_rules", {})
+    max_bet = rules.get("max_bet")
+    bets = [d for d in rules["denominations"] if max_bet is None or d <= max_bet]
+    return bets, int(rules["max_raises"]), float(rules["ante_per_player"])
+
+
+def build_tree(players: int, betting_round: int, bets: tuple[float, ...], max_raises: int) -> list[Node]:
+    # Mirrors _apply_player_action: a bet opens at its amount, a raise adds
+    # its amount and counts towards max_raises, and either reopens the
+    # action for every live seat. Folding when checking is free is left
+    # out: it is dominated, and the bots never do it.
+    nodes: list[Node] = []
+
+    def expand(history, contribs, current_bet, raises, pending, folded, actor) -> int:
+        index = len(nodes)
+        nodes.append(None)
+        key = node_key(players, betting_round, history)
+        alive = [seat for seat in range(players) if not folded[seat]]
+        if len(alive) == 1 or not pending:
+            nodes[index] = Node(key, None, contribs=tuple(contribs), folded=tuple(folded))
+            return index
+        codes = ["k"] if current_bet == 0 else ["f", "c"]
+        if raises < max_raises:
+            codes += [f"{'b' if current_bet == 0 else 'r'}{i}" for i in range(len(bets))]
+        children = []
+        for code in codes:
+            next_contribs, next_folded = list(contribs), list(folded)
+            next_bet, next_raises, next_pending = current_bet, raises, set(pending) - {actor}
+            if code == "f":
+                next_folded[actor] = True
+            elif code in ("k", "c"):
+                next_contribs[actor] = current_bet
+            else:
+                amount = bets[int(code[1:])]
+                next_bet = current_bet + amount if current_bet else amount
+                next_raises += code[0] == "r"
+                next_contribs[actor] = next_bet
+                next_pending = {seat for seat in range(players) if not next_folded[seat]} - {actor}
+            next_actor = next(
+                (
+                    (actor + offset) % players
+                    for offset in range(1, players + 1)
+                    if (actor + offset) % players in next_pending
+                    and not next_folded[(actor + offset) % players]
+                ),
+                actor,
+            )
+            children.append(
+                expand(
+                    [*history, code],
+                    next_contribs,
+                    next_bet,
+                    next_raises,
+                    next_pending,
+                    next_folded,
+                    next_actor,
+                )
+            )
+        nodes[index] = Node(key, actor, tuple(codes), tuple(children))
+        return index
+
+    expand([], [0.0] * players, 0.0, 0, set(range(players)), [False] * players, 0)
+    return nodes
+
+
+def _sample_matchups(samples: int, seed: int) -> list:
+    # Heads-up outcomes by bucket, before and after the draw, with both
+    # seats drawing like the reference opponent.
+    rng = random.Random(seed)
+    size = BUCKET_COUNT
+    tallies = [[[0.0] * size for _ in range(size)] for _ in range(4)]
+    priors = [[0] * size, [0] * size]
+    for _ in range(samples):
+        cards = rng.sample(DECK, 20)
+        hands = [cards[:5], cards[5:10]]
+        stock = cards[10:]
+        before, after, scores = [], [], []
+        for hand in hands:
+            held = _reference_hold(hand)
+            final = held + [stock.pop() for _ in range(5 - len(held))]
+            before.append(lookup(hand)[1])
+            score, category = lookup(final)[:2]
+            after.append(category)
+            scores.append(score)
+        result = 1.0 if scores[0] > scores[1] else 0.5 if scores[0] == scores[1] else 0.0
+        for wins, counts, buckets in ((tallies[0], tallies[1], before), (tallies[2], tallies[3], after)):
+            a, b = buckets
+            wins[a][b] += result
+            wins[b][a] += 1 - result
+            counts[a][b] += 1
+            counts[b][a] += 1
+        for prior, buckets in ((priors[0], before), (priors[1], after)):
+            for bucket in buckets:
+                prior[bucket] += 1
+    return [tallies, priors]
+
+
+def bucket_equities(
+    samples: int, workers: int, seed: int = 0
+) -> dict[int, tuple[tuple[float, ...], Matrix]]:
+    # Betting round -> (bucket prior, heads-up win matrix). Buckets too
+    # rare to meet in the sample fall back to category order.
+    chunks = [samples // workers + (i < samples % workers) for i in range(workers)]
+    if workers <= 1:
+        parts = [_sample_matchups(samples, seed)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_sample_matchups, chunks, [seed * 1000 + i for i in range(workers)]))
+    size = BUCKET_COUNT
+    result = {}
+    for betting_round, offset in ((1, 0), (2, 2)):
+        prior = [sum(part[1][betting_round - 1][b] for part in parts) for b in range(size)]
+        total = sum(prior)
+        matrix = []
+        for a in range(size):
+            row = []
+            for b in range(size):
+                wins = sum(part[0][offset][a][b] for part in parts)
+                count = sum(part[0][offset + 1][a][b] for part in parts)
+                row.append(wins / count if count else 1.0 if a > b else 0.0 if a < b else 0.5)
+            matrix.append(row)
+        result[betting_round] = (tuple(max(p, 1) / total for p in prior), matrix)
+    return result
+
+
+def _shares(game: Game, buckets: list[int], folded: tuple[bool, ...]) -> list[float]:
+    # Multiway pot shares from heads-up equities: each live seat's chance
+    # of beating every other live seat, normalised.
+    alive = [seat for seat in range(game.players) if not folded[seat]]
+    strength = [
+        math.prod(game.equity[buckets[seat]][buckets[other]] for other in alive if other != seat)
+        if not folded[seat]
+        else 0.0
+        for seat in range(game.players)
+    ]
+    total = sum(strength)
+    if not total:
+        return [1 / len(alive) if not folded[seat] else 0.0 for seat in range(game.players)]
+    return [value / total for value in strength]
+
+
+class Solver:
+    # External-sampling MCCFR. The traverser's own bucket is drawn
+    # uniformly (regret matching is unchanged by a per-infoset scale, and
+    # rare strong hands get visited); opponents' buckets follow the prior.
+    # The average strategy is accumulated on the traverser's own nodes,
+    # weighted by its own reach.
+    def __init__(self, game: Game, regrets: dict | None = None, averages: dict | None = None) -> None:
+        self.game = game
+        self.nodes = build_tree(game.players, game.betting_round, game.bets, game.max_raises)
+        self.regrets: dict[int, list[float]] = regrets or {}
+        self.averages: dict[int, list[float]] = averages or {}
+
+    def _table(self, store: dict, index: int) -> list[float]:
+        row = store.get(index)
+        if row is None:
+            row = store[index] = [0.0] * (BUCKET_COUNT * len(self.nodes[index].actions))
+        return row
+
+    def _strategy(self, index: int, bucket: int) -> list[float]:
+        width = len(self.nodes[index].actions)
+        regrets = self._table(self.regrets, index)[bucket * width : (bucket + 1) * width]
+        positive = [max(value, 0.0) for value in regrets]
+        total = sum(positive)
+        return [value / total for value in positive] if total else [1 / width] * width
+
+    def run(self, iterations: int, rng: random.Random) -> None:
+        game = self.game
+        for _ in range(iterations):
+            for traverser in range(game.players):
+                buckets = [
+                    rng.randrange(BUCKET_COUNT)
+                    if seat == traverser
+                    else rng.choices(range(BUCKET_COUNT), game.prior)[0]
+                    for seat in range(game.players)
+                ]
+                self._walk(0, traverser, buckets, 1.0, rng)
+
+    def _walk(self, index: int, traverser: int, buckets: list[int], reach: float, rng: random.Random) -> float:
+        node = self.nodes[index]
+        if node.actor is None:
+            pot = self.game.pot + sum(node.contribs)
+            share = _shares(self.game, buckets, node.folded)[traverser]
+            return share * pot - node.contribs[traverser]
+        bucket = buckets[node.actor]
+        strategy = self._strategy(index, bucket)
+        if node.actor != traverser:
+            choice = rng.choices(range(len(strategy)), strategy)[0]
+            return self._walk(node.children[choice], traverser, buckets, reach, rng)
+        values = [
+            self._walk(child, traverser, buckets, reach * prob, rng)
+            for child, prob in zip(node.children, strategy)
+        ]
+        value = sum(prob * child_value for prob, child_value in zip(strategy, values))
+        width = len(node.actions)
+        regrets = self._table(self.regrets, index)
+        averages = self._table(self.averages, index)
+        for action in range(width):
+            regrets[bucket * width + action] += values[action] - value
+            averages[bucket * width + action] += reach * strategy[action]
+        return value
+
+
+def _checkpoint_path(directory: str, game: Game, part: int) -> str:
+    return os.path.join(directory, f"{game.players}p_round{game.betting_round}_part{part}.json")
+
+
+def solve_part(game: Game, iterations: int, seed: int, part: int, directory: str, every: int) -> tuple[dict, int]:
+    # One independent MCCFR run, resumed from and saved to its checkpoint
+    # every `every` iterations. Returns (average strategy sums, iterations).
+    path = _checkpoint_path(directory, game, part)
+    saved = load_json_cache(path, CHECKPOINT_VERSION)
+    done = 0
+    solver = Solver(game)
+    if saved is not None and saved["game"] == repr(game):
+        done = saved["done"]
+        solver.regrets = {int(k): v for k, v in saved["regrets"].items()}
+        solver.averages = {int(k): v for k, v in saved["averages"].items()}
+    rng = random.Random(f"{seed}/{part}/{done}")
+    while done < iterations:
+        step = min(every, iterations - done)
+        solver.run(step, rng)
+        done += step
+        store_json_cache(
+            path,
+            CHECKPOINT_VERSION,
+            {"game": repr(game), "done": done, "regrets": solver.regrets, "averages": solver.averages},
+        )
+    return solver.averages, done
+
+
+def solve(
+    games: list[Game], iterations: int, workers: int, seed: int, directory: str, every: int
+) -> list[tuple[str, tuple[str, ...], list[list[float]]]]:
+    # Each game is split into `workers` independent runs whose average
+    # strategy sums are added up; the runs spread across cores.
+    parts = max(1, workers)
+    per_part = math.ceil(iterations / parts)
+    jobs = [(game, per_part, seed, part, directory, every) for game in games for part in range(parts)]
+    if workers <= 1:
+        results = [solve_part(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(solve_part, *zip(*jobs)))
+    rows = []
+    for number, game in enumerate(games):
+        nodes = build_tree(game.players, game.betting_round, game.bets, game.max_raises)
+        sums: dict[int, list[float]] = {}
+        for averages, _ in results[number * parts : (number + 1) * parts]:
+            for index, values in averages.items():
+                total = sums.setdefault(int(index), [0.0] * len(values))
+                for i, value in enumerate(values):
+                    total[i] += value
+        for index, node in enumerate(nodes):
+            if node.actor is None:
+                continue
+            width = len(node.actions)
+            values = sums.get(index, [0.0] * (BUCKET_COUNT * width))
+            buckets = []
+            for bucket in range(BUCKET_COUNT):
+                weights = values[bucket * width : (bucket + 1) * width]
+                total = sum(weights)
+                buckets.append([w / total for w in weights] if total else [1 / width] * width)
+            rows.append((node.key, node.actions, buckets))
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    bets, max_raises, ante = betting_rules()
+    parser = argparse.ArgumentParser(
+        description="Solve five-card-draw betting rounds with CFR and write the strategy table."
+    )
+    parser.add_argument("-o", "--output", default=TABLE_PATH, help="Table path to write.")
+    parser.add_argument("-n", "--iterations", type=int, default=20000, help="CFR iterations per game.")
+    parser.add_argument("-p", "--max-players", type=int, default=3, help="Largest table solved.")
+    parser.add_argument("--samples", type=int, default=200000, help="Deals for the bucket equities.")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    parser.add_argument("--checkpoint-every", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    equities = bucket_equities(args.samples, args.workers, args.seed)
+    games = [
+        Game(
+            players,
+            betting_round,
+            tuple(bets),
+            max_raises,
+            round(ante * players, 2),
+            equities[betting_round][0],
+            tuple(tuple(row) for row in equities[betting_round][1]),
+        )
+        for players in range(2, args.max_players + 1)
+        for betting_round in (1, 2)
+    ]
+    rows = solve(
+        games, args.iterations, args.workers, args.seed, args.checkpoint_dir, args.checkpoint_every
+    )
+    write_strategy_table(args.output, rows, bets, max_raises, args.iterations)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {len(rows)} decision nodes for {len(games)} games to {args.output} in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
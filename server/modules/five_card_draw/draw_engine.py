@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from itertools import combinations
+from typing import Sequence
+
+from server.core.canonical import canonicalize
+
+from .hand_table import (
+    CACHE_DIR,
+    CATEGORY_LABELS,
+    CLASS_CATEGORY,
+    CLASS_COUNT,
+    FLUSH_CLASSES,
+    PLAIN_CLASSES,
+    RANK_PRIMES,
+    RANK_VALUES,
+    RANKS,
+    load_json_cache,
+    lookup,
+    store_json_cache,
+)
+
+SUITS = ["S", "H", "D", "C"]
+HOLD_MASKS = list(range(32))
+REFERENCE_VERSION = 1
+REFERENCE_SAMPLES = 40000
+REFERENCE_PATH = os.path.join(CACHE_DIR, "draw_reference.json")
+
+
+@dataclass(frozen=True)
+class DrawOption:
+    discards: tuple[int, ...]
+    category_probs: tuple[float, ...]
+    win_estimate: float
+
+    @property
+    def draw_count(self) -> int:
+        return len(self.discards)
+
+    def to_dict(self, hand: Sequence) -> dict:
+        return {
+            "discards": [f"{hand[i].rank}{hand[i].suit}" for i in self.discards],
+            "draw_count": self.draw_count,
+            "win_estimate": round(self.win_estimate * 100, 1),
+            "categories": {
+                CATEGORY_LABELS[category]: round(prob * 100, 1)
+                for category, prob in enumerate(self.category_probs)
+                if prob > 0
+            },
+        }
+
+
+def _reference_hold(hand: list[tuple[str, str]]) -> list[tuple[str, str]]:
+    category = lookup(hand)[1]
+    if category >= 4:
+        return hand
+    values = [RANK_VALUES[rank] for rank, _ in hand]
+    if category >= 1:
+        return [card for card, value in zip(hand, values) if values.count(value) >= 2]
+    for suit in SUITS:
+        suited = [card for card in hand if card[1] == suit]
+        if len(suited) == 4:
+            return suited
+    top = max(values)
+    return [card for card, value in zip(hand, values) if value == top]
+
+
+@lru_cache(maxsize=1)
+def reference_percentiles() -> tuple[float, ...]:
+    # Final hands are ranked against what a sensible opponent holds after
+    # the draw, not against undrawn random hands, which undervalue draws.
+    cached = load_json_cache(REFERENCE_PATH, REFERENCE_VERSION)
+    if cached is not None and len(cached) == CLASS_COUNT:
+        return tuple(cached)
+    rng = random.Random(0)
+    deck = [(rank, suit) for suit in SUITS for rank in RANKS]
+    counts = [0] * CLASS_COUNT
+    for _ in range(REFERENCE_SAMPLES):
+        cards = rng.sample(deck, 10)
+        held = _reference_hold(cards[:5])
+        counts[lookup(held + cards[5 : 10 - len(held)])[0]] += 1
+    percentiles = []
+    below = 0
+    for count in counts:
+        percentiles.append((below + count / 2) / REFERENCE_SAMPLES)
+        below += count
+    store_json_cache(REFERENCE_PATH, REFERENCE_VERSION, percentiles)
+    return tuple(percentiles)
+
+
+def _draw_multisets(available: list[tuple[int, int]], draw_count: int) -> list[tuple[int, int]]:
+    # Every rank multiset of the drawn cards, as (prime product, number of card combinations).
+    results: list[tuple[int, int]] = []
+    suffix = [0] * (len(available) + 1)
+    for i in range(len(available) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + available[i][1]
+
+    def walk(i: int, remaining: int, product: int, ways: int) -> None:
+        if remaining == 0:
+            results.append((product, ways))
+            return
+        if suffix[i] < remaining:
+            return
+        prime, count = available[i]
+        for take in range(min(count, remaining) + 1):
+            walk(i + 1, remaining - take, product * prime**take, ways * math.comb(count, take))
+
+    walk(0, draw_count, 1, 1)
+    return results
+
+
+@lru_cache(maxsize=4096)
+def _options(cards: tuple[tuple[str, str], ...], opponents: int) -> tuple[DrawOption, ...]:
+    in_hand = set(cards)
+    available = [
+        (RANK_PRIMES[rank], sum(1 for suit in SUITS if (rank, suit) not in in_hand))
+        for rank in RANKS
+    ]
+    multisets = {k: _draw_multisets(available, k) for k in range(1, 6)}
+    unknown = 52 - len(cards)
+    exponent = max(1, opponents)
+    percentiles = reference_percentiles()
+
+    options: list[DrawOption] = []
+    for mask in HOLD_MASKS:
+        held = [cards[i] for i in range(5) if mask & (1 << i)]
+        discards = tuple(i for i in range(5) if not mask & (1 << i))
+        draw_count = len(discards)
+        held_product = math.prod(RANK_PRIMES[rank] for rank, _ in held)
+
+        weights: dict[int, int] = {}
+        if draw_count == 0:
+            flush = len({suit for _, suit in held}) == 1
+            entry = (FLUSH_CLASSES if flush else PLAIN_CLASSES)[held_product]
+            weights[entry[0]] = 1
+        else:
+            for product, ways in multisets[draw_count]:
+                class_rank = PLAIN_CLASSES[held_product * product][0]
+                weights[class_rank] = weights.get(class_rank, 0) + ways
+            held_suits = {suit for _, suit in held}
+            flush_suits = held_suits if len(held_suits) == 1 else (SUITS if not held else [])
+            for suit in flush_suits:
+                # Drawing only this suit makes a flush; move those exact combos
+                # from their plain class to the flush class.
+                ranks = [rank for rank in RANKS if (rank, suit) not in in_hand]
+                for drawn in combinations(ranks, draw_count):
+                    key = held_product * math.prod(RANK_PRIMES[rank] for rank in drawn)
+                    plain_rank = PLAIN_CLASSES[key][0]
+                    weights[plain_rank] -= 1
+                    flush_rank = FLUSH_CLASSES[key][0]
+                    weights[flush_rank] = weights.get(flush_rank, 0) + 1
+
+        total = math.comb(unknown, draw_count)
+        category_weights = [0] * len(CATEGORY_LABELS)
+        win = 0.0
+        for class_rank, weight in weights.items():
+            if weight:
+                category_weights[CLASS_CATEGORY[class_rank]] += weight
+                win += weight * percentiles[class_rank] ** exponent
+        options.append(
+            DrawOption(
+                discards=discards,
+                category_probs=tuple(weight / total for weight in category_weights),
+                win_estimate=win / total,
+            )
+        )
+
+    options.sort(key=lambda option: (-option.win_estimate, option.draw_count))
+    return tuple(options)
+
+
+def draw_options(hand: Sequence, opponents: int) -> tuple[DrawOption, ...]:
+    # Options are memoised per suit-isomorphism class, up to 24x fewer
+    # entries; discard indices are mapped back to the caller's order.
+    canonical = canonicalize([hand])
+    cards = canonical.groups[0]
+    position = {card: index for index, card in enumerate(cards)}
+    to_hand = [0] * len(cards)
+    for index, card in enumerate(hand):
+        to_hand[position[(card.rank, canonical.suit_map[card.suit])]] = index
+    return tuple(
+        replace(option, discards=tuple(sorted(to_hand[i] for i in option.discards)))
+        for option in _options(cards, opponents)
+    )
+
+
+def best_draw(hand: Sequence, opponents: int) -> DrawOption:
+    return draw_options(hand, opponents)[0]
+
+
+def reference_discards(hand: Sequence) -> tuple[int, ...]:
+    # The reference opponent's draw (made hands, four-flushes, else the top
+    # rank): a few microseconds against best_draw's tens of milliseconds
+    # for an uncached class, so rollouts use it.
+    cards = [(card.rank, card.suit) for card in hand]
+    held = set(_reference_hold(cards))
+    return tuple(i for i, card in enumerate(cards) if card not in held)
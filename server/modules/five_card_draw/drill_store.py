@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import random
+import struct
+from typing import Iterable
+
+STORE_MAGIC = b"DRIL"
+STORE_VERSION = 1
+# magic, version, spot count, index length in bytes
+HEADER = struct.Struct("<4sIII")
+STORE_PATH = os.getenv(
+    "DRAW_DRILL_SPOTS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "drill_spots.bin"),
+)
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def group_key(players: int, category: int, position: int, difficulty: str) -> str:
+    # position: seats between the dealer and the trainee, 0 acting first.
+    return f"{players}/{category}/{position}/{difficulty}"
+
+
+class SpotStore:
+    # Pre-solved training spots, grouped by table size, hand category,
+    # position and difficulty. Each spot is a JSON record read in place
+    # from a memory-mapped file, so serving one is an index lookup and a
+    # slice; only the group index is parsed at load.
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, spot_count, index_size = HEADER.unpack_from(self._map)
+            if magic != STORE_MAGIC or version != STORE_VERSION:
+                raise ValueError(f"{path} is not a compatible drill store")
+            index = json.loads(self._map[HEADER.size : HEADER.size + index_size])
+        except (ValueError, struct.error):
+            self._map.close()
+            raise
+        self.path = path
+        self.bets = tuple(index["bets"])
+        self.max_raises = index["max_raises"]
+        base = HEADER.size + index_size
+        self._groups: dict[tuple[int, int, int, str], list[tuple[int, int]]] = {}
+        end = base
+        for key, spans in index["groups"].items():
+            players, category, position, difficulty = key.split("/")
+            self._groups[(int(players), int(category), int(position), difficulty)] = [
+                (base + offset, length) for offset, length in spans
+            ]
+            end = max([end] + [base + offset + length for offset, length in spans])
+        if sum(len(spans) for spans in self._groups.values()) != spot_count or end > len(self._map):
+            self._map.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self) -> int:
+        return sum(len(spans) for spans in self._groups.values())
+
+    def matches(self, bets: Iterable[float], max_raises: int) -> bool:
+        return self.bets == tuple(bets) and self.max_raises == max_raises
+
+    def counts(self, players: int) -> dict[str, int]:
+        return {
+            group_key(*key): len(spans) for key, spans in self._groups.items() if key[0] == players
+        }
+
+    def sample(
+        self,
+        players: int,
+        category: int | None = None,
+        position: int | None = None,
+        difficulty: str | None = None,
+        rng: random.Random | None = None,
+    ) -> dict | None:
+        # A uniformly random spot among those matching the filters (None
+        # matches anything), or None when no spot does.
+        rng = rng or random
+        groups = [
+            spans
+            for (group_players, group_category, group_position, group_difficulty), spans in self._groups.items()
+            if group_players == players
+            and category in (None, group_category)
+            and position in (None, group_position)
+            and difficulty in (None, group_difficulty)
+        ]
+        total = sum(len(spans) for spans in groups)
+        if not total:
+            return None
+        pick = rng.randrange(total)
+        for spans in groups:
+            if pick < len(spans):
+                offset, length = spans[pick]
+                return json.loads(self._map[offset : offset + length])
+            pick -= len(spans)
+        return None
+
+
+def load_spot_store(path: str = STORE_PATH) -> SpotStore | None:
+    try:
+        return SpotStore(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def write_spot_store(
+    path: str, spots: Iterable[dict], bets: Iterable[float], max_raises: int
+) -> int:
+    # spots: records carrying players, category, position and difficulty.
+    groups: dict[str, list[list[int]]] = {}
+    data = bytearray()
+    for spot in spots:
+        record = json.dumps(spot, separators=(",", ":")).encode("utf-8")
+        key = group_key(spot["players"], spot["category"], spot["position"], spot["difficulty"])
+        groups.setdefault(key, []).append([len(data), len(record)])
+        data.extend(record)
+    index = json.dumps(
+        {"bets": list(bets), "max_raises": max_raises, "groups": groups},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    spot_count = sum(len(spans) for spans in groups.values())
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(STORE_MAGIC, STORE_VERSION, spot_count, len(index)))
+        f.write(index)
+        f.write(data)
+    os.replace(tmp_path, path)
+    return spot_count
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from array import array
+from typing import Sequence
+
+TABLE_MAGIC = b"PFEQ"
+TABLE_VERSION = 1
+MAX_OPPONENTS = 7
+# magic, version, class_count, max_opponents, iterations per class
+HEADER = struct.Struct("<4sIIII")
+ENTRY = struct.Struct("<ff")
+TABLE_PATH = os.getenv(
+    "PREFLOP_EQUITY_TABLE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "preflop_equity.bin"),
+)
+
+
+class EquityTable:
+    # (win, tie) fractions per hand class and opponent count, read in place
+    # from a memory-mapped file so every worker process shares the pages.
+    def __init__(self, path: str, class_count: int) -> None:
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, stored_classes, max_opponents, iterations = HEADER.unpack_from(self._map)
+        expected_size = HEADER.size + stored_classes * max_opponents * ENTRY.size
+        if (
+            magic != TABLE_MAGIC
+            or version != TABLE_VERSION
+            or stored_classes != class_count
+            or len(self._map) != expected_size
+        ):
+            self._map.close()
+            raise ValueError(f"{path} is not a compatible preflop equity table")
+        self.path = path
+        self.max_opponents = max_opponents
+        self.iterations = iterations
+
+    def lookup(self, class_rank: int, opponents: int) -> tuple[float, float] | None:
+        if not 1 <= opponents <= self.max_opponents:
+            return None
+        offset = HEADER.size + (class_rank * self.max_opponents + opponents - 1) * ENTRY.size
+        return ENTRY.unpack_from(self._map, offset)
+
+
+def load_equity_table(class_count: int, path: str = TABLE_PATH) -> EquityTable | None:
+    try:
+        return EquityTable(path, class_count)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def write_equity_table(
+    path: str, rows: Sequence[Sequence[tuple[float, float]]], iterations: int
+) -> None:
+    values = array("f", (value for row in rows for entry in row for value in entry))
+    if values.itemsize != 4:
+        raise RuntimeError("float32 arrays are required to write the equity table")
+    if struct.pack("=f", 1.0) != struct.pack("<f", 1.0):
+        values.byteswap()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(TABLE_MAGIC, TABLE_VERSION, len(rows), MAX_OPPONENTS, iterations))
+        values.tofile(f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from itertools import combinations_with_replacement
+from typing import Any, Sequence
+
+TABLE_VERSION = 2
+RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+RANK_VALUES = {rank: index + 2 for index, rank in enumerate(RANKS)}
+PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]
+# A hand's rank multiset maps to the product of its rank primes, so keys
+# need no sorting.
+RANK_PRIMES = {rank: PRIMES[index] for index, rank in enumerate(RANKS)}
+VALUE_PRIMES = {index + 2: prime for index, prime in enumerate(PRIMES)}
+CATEGORY_LABELS = [
+    "High Card",
+    "One Pair",
+    "Two Pair",
+    "Three of a Kind",
+    "Straight",
+    "Flush",
+    "Full House",
+    "Four of a Kind",
+    "Straight Flush",
+]
+CACHE_DIR = os.getenv(
+    "HAND_TABLE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+CACHE_PATH = os.path.join(CACHE_DIR, "hand_classes.json")
+
+# (class_rank, category, tiebreakers, label, combos); class_rank 0 is the
+# weakest class and 7461 the strongest.
+HandClass = tuple[int, int, list[int], str, int]
+
+
+def classify(values: tuple[int, ...], is_flush: bool) -> tuple[int, list[int], str]:
+    ranks_sorted = sorted(values, reverse=True)
+    counts: dict[int, int] = {}
+    for r in values:
+        counts[r] = counts.get(r, 0) + 1
+    count_list = sorted(counts.items(), key=lambda x: (-x[1], -x[0]))
+    count_values = [c for _, c in count_list]
+    unique_ranks = [r for r, _ in count_list]
+
+    unique_sorted = sorted(set(values))
+    is_straight = len(unique_sorted) == 5 and unique_sorted[-1] - unique_sorted[0] == 4
+    is_wheel = unique_sorted == [2, 3, 4, 5, 14]
+    if is_wheel:
+        is_straight = True
+        straight_high = 5
+    else:
+        straight_high = unique_sorted[-1] if is_straight else 0
+
+    if is_straight and is_flush:
+        return (8, [straight_high], "Straight Flush")
+    if count_values[0] == 4:
+        return (7, [unique_ranks[0], unique_ranks[1]], "Four of a Kind")
+    if count_values[0] == 3 and count_values[1] == 2:
+        return (6, [unique_ranks[0], unique_ranks[1]], "Full House")
+    if is_flush:
+        return (5, ranks_sorted, "Flush")
+    if is_straight:
+        return (4, [straight_high], "Straight")
+    if count_values[0] == 3:
+        kickers = sorted(unique_ranks[1:], reverse=True)
+        return (3, [unique_ranks[0], *kickers], "Three of a Kind")
+    if count_values[0] == 2 and count_values[1] == 2:
+        pair_ranks = sorted(unique_ranks[:2], reverse=True)
+        return (2, [pair_ranks[0], pair_ranks[1], unique_ranks[2]], "Two Pair")
+    if count_values[0] == 2:
+        kickers = sorted(unique_ranks[1:], reverse=True)
+        return (1, [unique_ranks[0], *kickers], "One Pair")
+    return (0, ranks_sorted, "High Card")
+
+
+def _build_rows() -> list[list]:
+    entries = []
+    for values in combinations_with_replacement(range(2, 15), 5):
+        counts = [values.count(v) for v in set(values)]
+        if max(counts) > 4:
+            continue
+        key = math.prod(VALUE_PRIMES[v] for v in values)
+        if len(counts) == 5:
+            category, tiebreakers, label = classify(values, False)
+            entries.append((category, tiebreakers, key, False, label, 4**5 - 4))
+            category, tiebreakers, label = classify(values, True)
+            entries.append((category, tiebreakers, key, True, label, 4))
+        else:
+            category, tiebreakers, label = classify(values, False)
+            combos = math.prod(math.comb(4, c) for c in counts)
+            entries.append((category, tiebreakers, key, False, label, combos))
+    entries.sort(key=lambda entry: (entry[0], entry[1]))
+    return [
+        [key, is_flush, class_rank, category, tiebreakers, label, combos]
+        for class_rank, (category, tiebreakers, key, is_flush, label, combos) in enumerate(entries)
+    ]
+
+
+def load_json_cache(path: str, version: int) -> Any | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if raw.get("version") != version:
+        return None
+    return raw.get("data")
+
+
+def store_json_cache(path: str, version: int, data: Any) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "data": data}, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def load_tables(path: str = CACHE_PATH) -> tuple[dict[int, HandClass], dict[int, HandClass]]:
+    rows = load_json_cache(path, TABLE_VERSION)
+    if rows is None:
+        rows = _build_rows()
+        store_json_cache(path, TABLE_VERSION, rows)
+    plain: dict[int, HandClass] = {}
+    flush: dict[int, HandClass] = {}
+    for key, is_flush, class_rank, category, tiebreakers, label, combos in rows:
+        target = flush if is_flush else plain
+        target[key] = (class_rank, category, tiebreakers, label, combos)
+    return plain, flush
+
+
+PLAIN_CLASSES, FLUSH_CLASSES = load_tables()
+CLASS_COUNT = len(PLAIN_CLASSES) + len(FLUSH_CLASSES)
+
+
+def lookup(cards: Sequence[tuple[str, str]]) -> HandClass:
+    key = 1
+    for rank, _ in cards:
+        key *= RANK_PRIMES[rank]
+    suit = cards[0][1]
+    if all(card_suit == suit for _, card_suit in cards):
+        return FLUSH_CLASSES[key]
+    return PLAIN_CLASSES[key]
+
+
+def _class_summaries() -> tuple[list[int], list[float]]:
+    by_rank = sorted([*PLAIN_CLASSES.values(), *FLUSH_CLASSES.values()])
+    total = sum(entry[4] for entry in by_rank)
+    categories: list[int] = []
+    percentiles: list[float] = []
+    weaker = 0
+    for _, category, _, _, combos in by_rank:
+        categories.append(category)
+        # Ties count half so the percentile is a fair heads-up share.
+        percentiles.append((weaker + combos / 2) / total)
+        weaker += combos
+    return categories, percentiles
+
+
+CLASS_CATEGORY, CLASS_PERCENTILE = _class_summaries()
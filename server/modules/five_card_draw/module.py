@@ -1,8 +1,40 @@
 from __future__ import annotations
 
+import math
+import os
 import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
+from server.core.canonical import canonical_key
+from server.core.metrics import CACHE_HITS, CACHE_MISSES, timed
+from server.core.profiling import follow_profile
+from server.core.sampling import SampleStats, iter_deals
+from server.core.scheduler import BATCH, INTERACTIVE, SCHEDULER
+from server.core.shared_cache import open_shared_cache
+
+from .draw_engine import best_draw, draw_options, reference_discards
+from .drill_store import load_spot_store
+from .equity_table import load_equity_table
+from .hand_table import (
+    CATEGORY_LABELS,
+    CLASS_COUNT,
+    CLASS_PERCENTILE,
+    FLUSH_CLASSES,
+    PLAIN_CLASSES,
+    RANK_PRIMES,
+    HandClass,
+)
+from .strategy_table import action_code, decode_action, load_strategy_table, node_key
+from .opponent_range import (
+    MIN_EFFECTIVE_SAMPLES,
+    UNIFORM,
+    CategoryWeights,
+    build_pool,
+    weighted_equity,
+)
+
 
 SUITS = ["S", "H", "D", "C"]
 RANKS = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
@@ -11,6 +43,41 @@ ANTE_PER_PLAYER = 0.05
 ANTE_PAYER = "dealer_total_once_per_game"
 RANK_VALUES = {rank: index + 2 for index, rank in enumerate(RANKS)}
 MAX_RAISES = 2
+MAX_DISCARDS = 5
+PREFLOP_EQUITY = load_equity_table(CLASS_COUNT)
+# CFR strategies by hand category (build_strategy_table.py). Where it
+# covers a spot, bots play it and advice reads it; elsewhere, and when the
+# file is missing or built for other limits, the heuristic policy stands.
+STRATEGY = load_strategy_table()
+# Pre-solved training spots (build_drill_spots.py) served by drill sessions.
+DRILL_SPOTS = load_spot_store()
+# "range" conditions opponents' hands on their betting; "uniform" treats
+# them as random hands.
+OPPONENT_MODEL = os.getenv("DRAW_OPPONENT_MODEL", "range")
+# plain or stratified; see server.core.sampling.
+SAMPLING_MODE = os.getenv("DRAW_SAMPLING", "stratified")
+# Advice that cannot be computed within this budget falls back to the last
+# estimate for the street or the class-percentile heuristic.
+ADVICE_DEADLINE_MS = float(os.getenv("DRAW_ADVICE_DEADLINE_MS", "300"))
+# While a showdown is on screen the next hand, the bots' play up to the
+# trainee and the trainee's advice are prepared in the background.
+PREDEAL = os.getenv("DRAW_PREDEAL", "1") == "1"
+PREDEAL_DEADLINE_MS = float(os.getenv("DRAW_PREDEAL_DEADLINE_MS", "2000"))
+PREDEAL_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DRAW_PREDEAL_WORKERS", "2")), thread_name_prefix="draw-predeal"
+)
+# What-if rollouts per candidate action, and their time budget.
+WHAT_IF_ITERATIONS = int(os.getenv("DRAW_WHAT_IF_ITERATIONS", "1000"))
+WHAT_IF_DEADLINE_MS = float(os.getenv("DRAW_WHAT_IF_DEADLINE_MS", "1500"))
+# Win-chance points a drill draw may give up and still count as right.
+DRILL_DRAW_TOLERANCE = float(os.getenv("DRAW_DRILL_DRAW_TOLERANCE", "0.5"))
+# Sampled equities shared by every worker process. Off unless
+# EQUITY_CACHE_PATH names a file, ideally on a RAM-backed runtime
+# directory such as /dev/shm or $XDG_RUNTIME_DIR.
+SHARED_EQUITY = open_shared_cache(
+    os.getenv("EQUITY_CACHE_PATH", ""),
+    int(os.getenv("EQUITY_CACHE_SLOTS", "65536")),
+)
 
 
 def configure(config: dict) -> None:
@@ -32,8 +99,12 @@ class Card:
     rank: str
     suit: str
 
+    @property
+    def code(self) -> str:
+        return f"{self.rank}{self.suit}"
+
     def to_dict(self) -> dict:
-        return {"rank": self.rank, "suit": self.suit, "code": f"{self.rank}{self.suit}"}
+        return {"rank": self.rank, "suit": self.suit, "code": self.code}
 
 
 def _deck() -> list[Card]:
@@ -53,9 +124,10 @@ def _deal_new_hand(
     round_number: int,
     dealer_index: int,
     trainee_index: int,
+    rng: random.Random | None = None,
 ) -> dict:
     deck = _deck()
-    random.shuffle(deck)
+    (rng or random).shuffle(deck)
     hands: list[list[Card]] = []
     for _ in range(player_count):
         hand = [deck.pop() for _ in range(5)]
@@ -69,8 +141,11 @@ def _deal_new_hand(
 
     return {
         "hands": hands,
+        "deck": deck,
+        "muck": [],
         "deck_count": len(deck),
         "phase": "betting",
+        "betting_round": 1,
         "current_actor": start_index,
         "dealer_index": dealer_index,
         "trainee_index": trainee_index,
@@ -78,6 +153,7 @@ def _deal_new_hand(
         "folded": [False for _ in range(player_count)],
         "last_action": ["" for _ in range(player_count)],
         "action_log": [],
+        "betting_history": [],
         "pot_total": pot_total,
         "contrib_this_round": contrib,
         "current_bet": 0.0,
@@ -89,10 +165,13 @@ def _deal_new_hand(
 
 
 def render_payload(state: dict, player_count: int) -> dict:
+    if "drill" in state:
+        return _render_drill(state)
     trainee_index = state["trainee_index"]
     reveal = state["phase"] == "showdown"
     return {
         "phase": state["phase"],
+        "betting_round": state["betting_round"],
         "deck_count": state["deck_count"],
         "hands": [
             _render_hand(hand, idx, trainee_index, reveal)
@@ -115,16 +194,13 @@ def render_payload(state: dict, player_count: int) -> dict:
         "message": state["message"],
         "allowed_bets": ALLOWED_BETS,
         "max_raises": MAX_RAISES,
+        "max_discards": MAX_DISCARDS,
         "ante_per_player": ANTE_PER_PLAYER,
         "ante_payer": ANTE_PAYER,
         "winners": state.get("winners", []),
         "hand_ranks": state.get("hand_ranks", []),
         "available_actions": available_actions(state, player_count),
-        "advice": (
-            _trainee_advice(state, player_count)
-            if state["phase"] == "betting" and state["current_actor"] == trainee_index
-            else None
-        ),
+        "advice": _current_advice(state, player_count) if _advice_due(state) else None,
     }
 
 
@@ -143,16 +219,26 @@ def _next_pending_player(state: dict, start_index: int) -> int | None:
     return None
 
 
+def _first_to_act(state: dict) -> int:
+    start = state["start_index"]
+    if not state["folded"][start]:
+        return start
+    next_actor = _next_pending_player(state, start)
+    return next_actor if next_actor is not None else start
+
+
 def available_actions(state: dict, player_count: int) -> list[str]:
     if state["phase"] == "showdown":
         return ["next_hand"]
-    if state["phase"] != "betting":
+    if state["phase"] not in ("betting", "draw"):
         return []
     if state["current_actor"] != state["trainee_index"]:
         return []
     actor = state["current_actor"]
     if state["folded"][actor]:
         return []
+    if state["phase"] == "draw":
+        return ["draw"]
 
     actions = ["fold"]
     if state["current_bet"] == 0:
@@ -167,24 +253,278 @@ def available_actions(state: dict, player_count: int) -> list[str]:
 
 
 def apply_action(state: dict, action: dict, player_count: int) -> dict:
+    if "drill" in state:
+        return _apply_drill_action(state, action, player_count)
     if state["phase"] == "showdown" and action.get("action") == "next_hand":
-        dealer = (state["dealer_index"] + 1) % player_count
-        new_state = _deal_new_hand(
-            player_count,
-            round_number=state["round_number"] + 1,
-            dealer_index=dealer,
-            trainee_index=state["trainee_index"],
-        )
-        return _auto_play_until_trainee(new_state, player_count)
-    if state["phase"] != "betting":
+        prepared = state.pop("next_hand", None)
+        # Only a finished preparation is used. One still queued or running
+        # may sit behind a BATCH deadline far longer than dealing here
+        # takes; it is cancelled, or left to finish unread.
+        if prepared is not None and prepared.done() and not prepared.cancelled():
+            if prepared.exception() is None:
+                CACHE_HITS.inc(cache="predealt_hand")
+                return prepared.result()
+        elif prepared is not None:
+            prepared.cancel()
+        CACHE_MISSES.inc(cache="predealt_hand")
+        return _play_next_hand(state, player_count)
+    if state["phase"] not in ("betting", "draw"):
         return state
 
     player_index = int(action.get("player_index", -1))
     action_type = action.get("action", "")
     amount = float(action.get("amount", 0.0) or 0.0)
 
-    state = _apply_player_action(state, player_index, action_type, amount, player_count)
-    return _auto_play_until_trainee(state, player_count)
+    if state["phase"] == "draw":
+        if action_type != "draw":
+            state["message"] = "Choose cards to discard, then draw."
+            return state
+        state = _apply_draw(state, player_index, action.get("discards") or [])
+    else:
+        state = _apply_player_action(state, player_index, action_type, amount, player_count)
+    state = _auto_play_until_trainee(state, player_count)
+    if PREDEAL and state["phase"] == "showdown":
+        state["next_hand"] = PREDEAL_POOL.submit(
+            follow_profile(_prepare_next_hand), state, player_count
+        )
+    return state
+
+
+def discard_state(state: dict) -> None:
+    # The session is gone: drop whatever was being prepared for it.
+    prepared = state.pop("next_hand", None)
+    if prepared is not None:
+        prepared.cancel()
+
+
+def init_drill(player_count: int, filters: dict) -> dict | None:
+    # A drill session serves pre-solved spots from DRILL_SPOTS and grades
+    # each answer against the stored solution, so it never samples.
+    # filters: category, position and difficulty, None for any. None when
+    # no stored spot matches.
+    state = {
+        "drill": {key: filters.get(key) for key in ("category", "position", "difficulty")},
+        "round_number": 0,
+        "score": [0, 0],
+    }
+    return _next_drill_spot(state, player_count)
+
+
+def _next_drill_spot(state: dict, player_count: int) -> dict | None:
+    if DRILL_SPOTS is None or not DRILL_SPOTS.matches(ALLOWED_BETS, MAX_RAISES):
+        return None
+    spot = DRILL_SPOTS.sample(player_count, **state["drill"])
+    if spot is None:
+        return None
+    state.update(spot=spot, answer=None, round_number=state["round_number"] + 1)
+    return state
+
+
+def _render_drill(state: dict) -> dict:
+    spot = state["spot"]
+    answer = state["answer"]
+    payload = {**spot["payload"], "round_number": state["round_number"]}
+    payload["drill"] = {
+        "kind": spot["kind"],
+        "category": CATEGORY_LABELS[spot["category"]],
+        "position": spot["position"],
+        "difficulty": spot["difficulty"],
+        "answer": answer,
+        "correct": state["score"][0],
+        "answered": state["score"][1],
+    }
+    if answer is not None:
+        payload.update(phase="review", available_actions=["next_hand"], message=answer["message"])
+    return payload
+
+
+def _apply_drill_action(state: dict, action: dict, player_count: int) -> dict:
+    if state["answer"] is not None:
+        if action.get("action") == "next_hand":
+            # The store always has the current spot's group, so this finds one.
+            return _next_drill_spot(state, player_count) or state
+        return state
+    spot = state["spot"]
+    if action.get("action") not in spot["payload"]["available_actions"]:
+        return state
+    if spot["kind"] == "draw":
+        answer = _grade_draw(spot, action.get("discards") or [])
+    else:
+        answer = _grade_bet(spot, action.get("action"), action.get("amount"))
+    state["answer"] = answer
+    state["score"][0] += answer["correct"]
+    state["score"][1] += 1
+    return state
+
+
+def _grade_bet(spot: dict, action: str, amount: float | None) -> dict:
+    # Right when the choice is the best action or cannot be told apart
+    # from it at the rollouts' 95% confidence.
+    values = spot["solution"]["actions"]
+    best = max(values, key=lambda entry: entry["ev"])
+    chosen = next(
+        (
+            entry
+            for entry in values
+            if entry["action"] == action and (entry["amount"] is None or entry["amount"] == amount)
+        ),
+        None,
+    )
+    if chosen is None:
+        return {"correct": False, "ev_loss": None, "best": best, "message": "Not an option here."}
+    loss = round(best["ev"] - chosen["ev"], 3)
+    correct = chosen is best or chosen["ci95"][1] >= best["ev"]
+    verdict = "Right" if correct else "Wrong"
+    return {
+        "correct": correct,
+        "ev_loss": loss,
+        "best": best,
+        "message": f"{verdict}: {_describe_bet(best)} is worth {best['ev']:+.2f}; "
+        f"{_describe_bet(chosen)} gives up {loss:.2f}.",
+    }
+
+
+def _describe_bet(entry: dict) -> str:
+    if entry["amount"] is None:
+        return entry["action"]
+    return f"{entry['action']} ${entry['amount']:.2f}"
+
+
+def _grade_draw(spot: dict, discards: list[str]) -> dict:
+    # Right when the draw is within DRILL_DRAW_TOLERANCE points of the best.
+    options = spot["solution"]["options"]
+    best = options[0]
+    chosen = next((option for option in options if set(option["discards"]) == set(discards)), None)
+    if chosen is None:
+        return {"correct": False, "ev_loss": None, "best": best, "message": "Not an option here."}
+    loss = round(best["win_pct"] - chosen["win_pct"], 1)
+    correct = loss <= DRILL_DRAW_TOLERANCE
+    verdict = "Right" if correct else "Wrong"
+    best_label = f"discarding {', '.join(best['discards'])}" if best["discards"] else "standing pat"
+    return {
+        "correct": correct,
+        "ev_loss": loss,
+        "best": best,
+        "message": f"{verdict}: {best_label} wins {best['win_pct']}%; your draw gives up {loss} points.",
+    }
+
+
+def _drill_action_values(state: dict) -> dict:
+    spot = state["spot"]
+    if spot["kind"] != "bet":
+        return {"actions": [], "iterations": 0, "message": "No betting decision to evaluate."}
+    solution = spot["solution"]
+    return {
+        "actions": solution["actions"],
+        "best": max(solution["actions"], key=lambda entry: entry["ev"]),
+        "iterations": solution["iterations"],
+        "estimate": "solved",
+    }
+
+
+def _play_next_hand(state: dict, player_count: int) -> dict:
+    new_state = _deal_new_hand(
+        player_count,
+        round_number=state["round_number"] + 1,
+        dealer_index=(state["dealer_index"] + 1) % player_count,
+        trainee_index=state["trainee_index"],
+    )
+    return _auto_play_until_trainee(new_state, player_count)
+
+
+def _prepare_next_hand(state: dict, player_count: int) -> dict:
+    # Runs on PREDEAL_POOL. The showdown state is only read (it no longer
+    # changes); the new state is private to this job until next_hand
+    # takes it whole. Advice is kept only if it is as good as what a
+    # render would compute.
+    new_state = _play_next_hand(state, player_count)
+    if _advice_due(new_state):
+        advice = _trainee_advice(
+            new_state, player_count, priority=BATCH, timeout_ms=PREDEAL_DEADLINE_MS
+        )
+        if advice.get("estimate", "computed") in ("computed", "table"):
+            new_state["prepared_advice"] = (_advice_key(new_state), advice)
+    return new_state
+
+
+def _advice_due(state: dict) -> bool:
+    return state["phase"] in ("betting", "draw") and state["current_actor"] == state["trainee_index"]
+
+
+def _advice_key(state: dict) -> tuple:
+    return (state["round_number"], state["phase"], state["betting_round"], len(state["action_log"]))
+
+
+def _current_advice(state: dict, player_count: int) -> dict:
+    prepared = state.get("prepared_advice")
+    if prepared is not None and prepared[0] == _advice_key(state):
+        return prepared[1]
+    return _trainee_advice(state, player_count)
+
+
+def _draw_cards(state: dict, count: int, rng: random.Random | None = None) -> list[Card]:
+    deck = state["deck"]
+    if len(deck) < count:
+        # Out of cards: reshuffle the muck under the remaining deck.
+        muck = state["muck"]
+        (rng or random).shuffle(muck)
+        deck[:0] = muck
+        state["muck"] = []
+    drawn = [deck.pop() for _ in range(count)]
+    state["deck_count"] = len(deck)
+    return drawn
+
+
+def _start_draw(state: dict) -> None:
+    state["phase"] = "draw"
+    state["pending_players"] = _active_players(state)
+    state["current_actor"] = _first_to_act(state)
+    state["message"] = "Draw: choose cards to discard."
+
+
+def _start_second_betting_round(state: dict) -> None:
+    player_count = len(state["folded"])
+    state["phase"] = "betting"
+    state["betting_round"] = 2
+    state["contrib_this_round"] = [0.0 for _ in range(player_count)]
+    state["current_bet"] = 0.0
+    state["raises_this_round"] = 0
+    state["pending_players"] = _active_players(state)
+    state["current_actor"] = _first_to_act(state)
+    state["message"] = "Second betting round."
+
+
+def _apply_draw(
+    state: dict, player_index: int, discard_codes: list[str], rng: random.Random | None = None
+) -> dict:
+    if player_index != state["current_actor"]:
+        state["message"] = "Not this player's turn."
+        return state
+    hand = state["hands"][player_index]
+    codes = set(discard_codes)
+    if len(codes) > MAX_DISCARDS or not codes <= {card.code for card in hand}:
+        state["message"] = "Invalid discard."
+        return state
+
+    kept = [card for card in hand if card.code not in codes]
+    discarded = [card for card in hand if card.code in codes]
+    state["muck"].extend(discarded)
+    state["hands"][player_index] = kept + _draw_cards(state, len(discarded), rng)
+    if discarded:
+        state["last_action"][player_index] = f"Draw {len(discarded)}"
+        _log_action(state, player_index, f"DRAWS {len(discarded)}", None)
+    else:
+        state["last_action"][player_index] = "Stand pat"
+        _log_action(state, player_index, "STANDS PAT", None)
+
+    if player_index in state["pending_players"]:
+        state["pending_players"].remove(player_index)
+    if not state["pending_players"]:
+        _start_second_betting_round(state)
+        return state
+    next_actor = _next_pending_player(state, player_index)
+    state["current_actor"] = next_actor if next_actor is not None else state["current_actor"]
+    return state
 
 
 def _apply_player_action(
@@ -197,6 +537,11 @@ def _apply_player_action(
         state["message"] = "Player already folded."
         return state
 
+    decision = {
+        "player": player_index,
+        "betting_round": state["betting_round"],
+        **_decision_spot(state, player_index),
+    }
     if action_type == "fold":
         state["folded"][player_index] = True
         state["last_action"][player_index] = "Fold"
@@ -233,6 +578,11 @@ def _apply_player_action(
     else:
         state["message"] = "Invalid action."
         return state
+    if action_type in {"check", "call"}:
+        action_type = "check" if decision["current_bet"] == 0 else "call"
+    decision["action"] = action_type
+    decision["amount"] = amount if action_type in {"bet", "raise"} else None
+    state.setdefault("betting_history", []).append(decision)
 
     active_players = _active_players(state)
     if len(active_players) <= 1:
@@ -245,6 +595,9 @@ def _apply_player_action(
         return state
 
     if not state["pending_players"]:
+        if state["betting_round"] == 1:
+            _start_draw(state)
+            return state
         state["phase"] = "showdown"
         state["message"] = "Betting complete."
         winners, ranks = _determine_winners(state["hands"], state["folded"])
@@ -266,49 +619,214 @@ def _render_hand(hand: list[Card], idx: int, trainee_index: int, reveal: bool) -
     ]
 
 
-def _hand_score(hand: list[Card]) -> tuple[int, list[int]]:
-    category, tiebreakers, _ = _evaluate_hand(hand)
-    return category, tiebreakers
+def _hand_score(hand: list[Card]) -> int:
+    return _hand_class(hand)[0]
 
 
-def _estimate_win_pct(state: dict, trainee_index: int, iterations: int = 1000) -> float:
+def _estimate_win_pct(
+    state: dict,
+    trainee_index: int,
+    iterations: int = 1000,
+    opponent_model: str = "uniform",
+    sampling: str = SAMPLING_MODE,
+    deadline: float | None = None,
+) -> float | None:
+    # Returns None only when the deadline passed before any deal was scored.
     active_players = [i for i in _active_players(state) if i != trainee_index]
     if not active_players:
         return 100.0
-    trainee_hand = state["hands"][trainee_index]
-    deck = _deck()
-    trainee_codes = {f"{card.rank}{card.suit}" for card in trainee_hand}
-    deck = [card for card in deck if f"{card.rank}{card.suit}" not in trainee_codes]
+    if opponent_model == "range":
+        estimate = _range_win_pct(state, trainee_index, deadline=deadline)
+        return None if estimate is None else estimate[0]
+    hand = state["hands"][trainee_index]
+    key = ("five_card_draw", canonical_key(hand), len(active_players), "uniform")
+    if SHARED_EQUITY is not None:
+        entry = SHARED_EQUITY.get(key)
+        if entry is not None and entry[0] >= iterations:
+            CACHE_HITS.inc(cache="shared_equity")
+            return round(entry[2][0] * 100, 1)
+        CACHE_MISSES.inc(cache="shared_equity")
+    stats = _sample_equities([hand], len(active_players), iterations, sampling, deadline=deadline)
+    if not stats.count:
+        return None
+    if SHARED_EQUITY is not None:
+        SHARED_EQUITY.put(key, stats.count, 0, stats.means()[:1])
+    return round(stats.means()[0] * 100, 1)
+
+
+def _heuristic_win_pct(state: dict, trainee_index: int) -> float:
+    # Beating each random opponent independently at the heads-up
+    # percentile; no sampling at all.
+    opponents = len(_active_players(state)) - 1
+    percentile = CLASS_PERCENTILE[_hand_score(state["hands"][trainee_index])]
+    return round(percentile ** max(opponents, 0) * 100, 1)
 
-    wins = 0
-    ties = 0
+
+def _scheduled_win_pct(
+    state: dict,
+    trainee_index: int,
+    priority: int = INTERACTIVE,
+    timeout_ms: float = ADVICE_DEADLINE_MS,
+) -> tuple[float, str]:
+    # The job works on a snapshot, so a job that overruns its deadline
+    # never touches the live state; the range pool is kept only from jobs
+    # that answered in time.
+    hand_key = (
+        state["round_number"],
+        state["betting_round"],
+        tuple(card.code for card in state["hands"][trainee_index]),
+    )
+    snapshot = {
+        **state,
+        "hands": [list(hand) for hand in state["hands"]],
+        "folded": list(state["folded"]),
+        "betting_history": list(state.get("betting_history", [])),
+    }
+
+    def job(deadline: float) -> float | None:
+        return _estimate_win_pct(
+            snapshot,
+            trainee_index,
+            iterations=1000,
+            opponent_model=OPPONENT_MODEL,
+            deadline=deadline,
+        )
+
+    def fallback() -> float:
+        cached = state.get("advice_cache")
+        if cached is not None and cached[0] == hand_key:
+            return cached[1]
+        return _heuristic_win_pct(state, trainee_index)
+
+    win_pct, outcome = SCHEDULER.run(
+        job, fallback=fallback, timeout_ms=timeout_ms, priority=priority
+    )
+    if outcome == "computed":
+        state["advice_cache"] = (hand_key, win_pct)
+        if "range_pool" in snapshot:
+            state["range_pool"] = snapshot["range_pool"]
+    return win_pct, outcome
+
+
+def _sample_equities(
+    candidates: list[list[Card]],
+    opponents: int,
+    iterations: int,
+    sampling: str = SAMPLING_MODE,
+    rng: random.Random | None = None,
+    deadline: float | None = None,
+) -> SampleStats:
+    # Scores every candidate hand against the same opponent deals (common
+    # random numbers), so differences between candidates carry far less
+    # noise than separate runs. Outcomes are each candidate's share (1 for
+    # a win, 0.5 for a tie), then each candidate minus the first.
+    dead = {card.code for hand in candidates for card in hand}
+    deck = [card for card in _deck() if card.code not in dead]
+    scores = [_hand_score(hand) for hand in candidates]
+    stats = SampleStats(sampling, outcomes=2 * len(candidates) - 1)
+    deals = iter_deals(deck, opponents * 5, sampling, rng)
     for _ in range(iterations):
-        random.shuffle(deck)
-        cursor = 0
-        opponent_hands = []
-        for _ in active_players:
-            opponent_hands.append(deck[cursor : cursor + 5])
-            cursor += 5
-        trainee_score = _hand_score(trainee_hand)
-        best = trainee_score
-        best_count = 1
-        for opp_hand in opponent_hands:
-            score = _hand_score(opp_hand)
-            if score > best:
-                best = score
-                best_count = 1
-            elif score == best:
-                best_count += 1
-        if best == trainee_score:
-            if best_count == 1:
-                wins += 1
-            else:
-                ties += 1
-    return round(((wins + ties * 0.5) / iterations) * 100, 1)
-
-
-def _trainee_advice(state: dict, player_count: int) -> dict:
-    win_pct = _estimate_win_pct(state, state["trainee_index"], iterations=1000)
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        cards, group = next(deals)
+        best = max(_hand_score(cards[i : i + 5]) for i in range(0, len(cards), 5))
+        shares = [
+            1.0 if score > best else 0.5 if score == best else 0.0 for score in scores
+        ]
+        stats.add([*shares, *(share - shares[0] for share in shares[1:])], group)
+    return stats
+
+
+def _compare_win_pcts(
+    state: dict,
+    trainee_index: int,
+    candidates: list[list[Card]],
+    iterations: int = 1000,
+    sampling: str = SAMPLING_MODE,
+) -> list[dict]:
+    opponents = len([i for i in _active_players(state) if i != trainee_index])
+    if not opponents:
+        return [{"win_pct": 100.0, "variance_per_iteration": 0.0} for _ in candidates]
+    stats = _sample_equities(candidates, opponents, iterations, sampling)
+    means = stats.means()
+    variances = stats.variance_per_iteration()
+    results = []
+    for i in range(len(candidates)):
+        result = {"win_pct": round(means[i] * 100, 1), "variance_per_iteration": variances[i]}
+        if i:
+            offset = len(candidates) + i - 1
+            result["edge_pct"] = round(means[offset] * 100, 1)
+            result["edge_variance_per_iteration"] = variances[offset]
+        results.append(result)
+    return results
+
+
+def _opponents_have_acted(state: dict, trainee_index: int) -> bool:
+    return any(
+        decision["player"] != trainee_index and decision["betting_round"] == state["betting_round"]
+        for decision in state.get("betting_history", [])
+    )
+
+
+def _preflop_win_pct(state: dict, trainee_index: int) -> float | None:
+    # Before the draw the sampler only sees the trainee's class and the
+    # number of live opponents, so the offline table answers it exactly.
+    entry = None
+    if (
+        PREFLOP_EQUITY is not None
+        and state["betting_round"] == 1
+        and not (OPPONENT_MODEL == "range" and _opponents_have_acted(state, trainee_index))
+    ):
+        opponents = len(_active_players(state)) - 1
+        entry = PREFLOP_EQUITY.lookup(_hand_class(state["hands"][trainee_index])[0], opponents)
+    if entry is None:
+        CACHE_MISSES.inc(cache="preflop_equity")
+        return None
+    CACHE_HITS.inc(cache="preflop_equity")
+    win, tie = entry
+    return round((win + tie * 0.5) * 100, 1)
+
+
+def _draw_advice(state: dict) -> dict:
+    trainee_index = state["trainee_index"]
+    hand = state["hands"][trainee_index]
+    options = draw_options(hand, len(_active_players(state)) - 1)
+    option = options[0]
+    discards = [hand[i].code for i in option.discards]
+    if discards:
+        note = f"Discard {len(discards)} and draw; the best expected hand after the draw."
+    else:
+        note = "Stand pat; drawing only weakens this hand."
+    return {
+        "win_pct": round(option.win_estimate * 100, 1),
+        "recommended_action": "draw",
+        "recommended_discards": discards,
+        "notes": note,
+        "draw_outcomes": option.to_dict(hand)["categories"],
+        "alternatives": [alternative.to_dict(hand) for alternative in options[1:4]],
+    }
+
+
+@timed("five_card_draw", "trainee_advice")
+def _trainee_advice(
+    state: dict,
+    player_count: int,
+    priority: int = INTERACTIVE,
+    timeout_ms: float = ADVICE_DEADLINE_MS,
+) -> dict:
+    if state["phase"] == "draw":
+        return _draw_advice(state)
+    solved = _strategy_advice(state)
+    if solved is not None:
+        return solved
+    win_pct = None
+    if state["betting_round"] == 1:
+        win_pct = _preflop_win_pct(state, state["trainee_index"])
+    estimate = "table"
+    if win_pct is None:
+        win_pct, estimate = _scheduled_win_pct(
+            state, state["trainee_index"], priority=priority, timeout_ms=timeout_ms
+        )
     current_bet = state["current_bet"]
     can_raise = state["raises_this_round"] < MAX_RAISES
     if current_bet == 0:
@@ -328,37 +846,355 @@ def _trainee_advice(state: dict, player_count: int) -> dict:
         else:
             action = "fold"
             note = "Weak position; fold."
-    return {"win_pct": win_pct, "recommended_action": action, "notes": note}
+    return {
+        "win_pct": win_pct,
+        "recommended_action": action,
+        "notes": note,
+        "opponent_model": OPPONENT_MODEL,
+        "estimate": estimate,
+    }
 
 
-def _choose_opponent_action(state: dict, player_index: int) -> tuple[str, float | None]:
-    category, _, _ = _evaluate_hand(state["hands"][player_index])
-    call_amount = max(state["current_bet"] - state["contrib_this_round"][player_index], 0.0)
-    can_raise = state["raises_this_round"] < MAX_RAISES
-    if state["current_bet"] == 0:
+# State keys a rollout never reads: caches and background work.
+_UNFORKED = ("next_hand", "prepared_advice", "advice_cache", "range_pool")
+# Containers the betting and draw code mutates in place.
+_FORKED_LISTS = ("hands", "deck", "muck", "folded", "last_action", "contrib_this_round")
+
+
+def _fork(state: dict) -> dict:
+    # A compact fork: new outer containers for what play mutates, with
+    # cards, hands and scalars shared. Hands are only ever replaced, never
+    # edited, so copying the outer list is enough. The action log starts
+    # empty; rollouts never read it.
+    fork = {key: value for key, value in state.items() if key not in _UNFORKED}
+    for key in _FORKED_LISTS:
+        fork[key] = list(state[key])
+    fork["pending_players"] = list(state["pending_players"])
+    fork["action_log"] = []
+    # The strategy table keys spots by this round's actions.
+    fork["betting_history"] = list(state["betting_history"])
+    return fork
+
+
+def _candidate_actions(state: dict, player_count: int) -> list[tuple[str, float | None]]:
+    candidates: list[tuple[str, float | None]] = []
+    for action in available_actions(state, player_count):
+        if action in ("bet", "raise"):
+            candidates.extend((action, amount) for amount in ALLOWED_BETS)
+        else:
+            candidates.append((action, None))
+    return candidates
+
+
+def _redeal(state: dict, trainee_index: int, rng: random.Random) -> dict:
+    # One guess at the hidden cards: opponents' hands are redealt
+    # uniformly from everything the trainee cannot see.
+    fork = _fork(state)
+    unseen = list(state["deck"])
+    for seat, hand in enumerate(state["hands"]):
+        if seat != trainee_index:
+            unseen.extend(hand)
+    rng.shuffle(unseen)
+    for seat, hand in enumerate(state["hands"]):
+        if seat != trainee_index:
+            fork["hands"][seat] = [unseen.pop() for _ in hand]
+    fork["deck"] = unseen
+    return fork
+
+
+def _rollout(state: dict, trainee_index: int, player_count: int, rng: random.Random) -> float:
+    # Plays the hand out with the bot policy in every seat, the trainee's
+    # included, and returns the trainee's winnings minus what they put in.
+    paid = 0.0
+    for _ in range(player_count * (MAX_RAISES + 2) * 3):
+        if state["phase"] not in ("betting", "draw"):
+            break
+        actor = state["current_actor"]
+        if state["folded"][actor]:
+            next_actor = _next_pending_player(state, actor)
+            if next_actor is None:
+                break
+            state["current_actor"] = next_actor
+            continue
+        if state["phase"] == "draw":
+            hand = state["hands"][actor]
+            discards = [hand[i].code for i in reference_discards(hand)]
+            state = _apply_draw(state, actor, discards, rng)
+            continue
+        action, amount = _choose_opponent_action(state, actor, rng)
+        pot = state["pot_total"]
+        state = _apply_player_action(state, actor, action, amount or 0.0, player_count)
+        if actor == trainee_index:
+            paid += state["pot_total"] - pot
+    winners = state.get("winners", [])
+    if state["phase"] != "showdown" or trainee_index not in winners:
+        return -paid
+    return state["pot_total"] / len(winners) - paid
+
+
+def _action_rollouts(
+    state: dict,
+    player_count: int,
+    candidates: list[tuple[str, float | None]],
+    iterations: int,
+    deadline: float | None = None,
+    rng: random.Random | None = None,
+) -> SampleStats:
+    # Every candidate plays the same redeal with the same bot dice (common
+    # random numbers), so differences between actions are measured far
+    # more tightly than the values themselves.
+    trainee_index = state["trainee_index"]
+    rng = rng or random.Random()
+    stats = SampleStats("plain", len(candidates))
+    for _ in range(iterations):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        deal = _redeal(state, trainee_index, rng)
+        seed = rng.random()
+        values = []
+        for action, amount in candidates:
+            fork = _fork(deal)
+            pot = fork["pot_total"]
+            fork = _apply_player_action(fork, trainee_index, action, amount or 0.0, player_count)
+            paid = fork["pot_total"] - pot
+            values.append(_rollout(fork, trainee_index, player_count, random.Random(seed)) - paid)
+        stats.add(values)
+    return stats
+
+
+def action_values(state: dict, player_count: int, iterations: int | None = None) -> dict:
+    # What-if values for each action open to the trainee: chips won back
+    # minus chips put in from this decision on, so folding is worth 0.
+    if "drill" in state:
+        return _drill_action_values(state)
+    if state["phase"] != "betting" or not _advice_due(state):
+        return {"actions": [], "iterations": 0, "message": "No betting decision to evaluate."}
+    candidates = _candidate_actions(state, player_count)
+    snapshot = _fork(state)
+
+    def job(deadline: float) -> SampleStats | None:
+        stats = _action_rollouts(
+            snapshot, player_count, candidates, iterations or WHAT_IF_ITERATIONS, deadline
+        )
+        return stats if stats.count else None
+
+    stats, outcome = SCHEDULER.run(job, fallback=lambda: None, timeout_ms=WHAT_IF_DEADLINE_MS)
+    if stats is None:
+        return {"actions": [], "iterations": 0, "estimate": outcome, "message": "Too busy; try again."}
+    means = stats.means()
+    variances = stats.variance_per_iteration()
+    actions = []
+    for (action, amount), mean, variance in zip(candidates, means, variances):
+        half_width = 1.96 * math.sqrt(variance / stats.count)
+        actions.append(
+            {
+                "action": action,
+                "amount": amount,
+                "ev": round(mean, 3),
+                "ci95": [round(mean - half_width, 3), round(mean + half_width, 3)],
+            }
+        )
+    return {
+        "actions": actions,
+        "best": max(actions, key=lambda entry: entry["ev"]),
+        "iterations": stats.count,
+        "estimate": outcome,
+    }
+
+
+def _strategy_advice(state: dict) -> dict | None:
+    # Advice straight from the strategy table: no sampling at all.
+    trainee_index = state["trainee_index"]
+    spot = _decision_spot(state, trainee_index)
+    if spot["spot"] is None:
+        return None
+    category = _evaluate_hand(state["hands"][trainee_index])[0]
+    strategy = STRATEGY.lookup(spot["spot"], category)
+    if strategy is None:
+        return None
+    choices = sorted(
+        ((decode_action(code, ALLOWED_BETS), prob) for code, prob in strategy.items()),
+        key=lambda item: -item[1],
+    )
+    (action, amount), prob = choices[0]
+    # The preflop table only covers the first betting round.
+    win_pct = None
+    if state["betting_round"] == 1:
+        win_pct = _preflop_win_pct(state, trainee_index)
+    if win_pct is None:
+        win_pct = _heuristic_win_pct(state, trainee_index)
+    label = f"{action} ${amount:.2f}" if amount is not None else action
+    return {
+        "win_pct": win_pct,
+        "recommended_action": action,
+        "recommended_amount": amount,
+        "notes": f"The solved strategy plays {label} {prob:.0%} of the time here.",
+        "strategy": [
+            {"action": choice, "amount": size, "prob": round(weight, 3)}
+            for (choice, size), weight in choices
+        ],
+        "opponent_model": OPPONENT_MODEL,
+        "estimate": "strategy",
+    }
+
+
+def _opponent_action_probs(
+    category: int, current_bet: float, call_amount: float, can_raise: bool
+) -> dict[tuple[str, float | None], float]:
+    # The heuristic bot policy, used where the strategy table has no entry.
+    if current_bet == 0:
         if category >= 4 and can_raise:
-            return "bet", ALLOWED_BETS[-1]
-        if category >= 2 and can_raise and random.random() < 0.35:
-            return "bet", ALLOWED_BETS[0]
-        return "check", None
+            return {("bet", ALLOWED_BETS[-1]): 1.0}
+        if category >= 2 and can_raise:
+            return {("bet", ALLOWED_BETS[0]): 0.35, ("check", None): 0.65}
+        return {("check", None): 1.0}
 
     if category >= 4 and can_raise:
-        return "raise", ALLOWED_BETS[-1]
+        return {("raise", ALLOWED_BETS[-1]): 1.0}
     if category >= 2:
-        if can_raise and random.random() < 0.2:
-            return "raise", ALLOWED_BETS[0]
-        return "call", None
-    if call_amount <= 0.1 and random.random() < 0.7:
-        return "call", None
-    return "fold", None
+        if can_raise:
+            return {("raise", ALLOWED_BETS[0]): 0.2, ("call", None): 0.8}
+        return {("call", None): 1.0}
+    if call_amount <= 0.1:
+        return {("call", None): 0.7, ("fold", None): 0.3}
+    return {("fold", None): 1.0}
+
 
+def _strategy_spot(state: dict) -> str | None:
+    # The solver's node for whoever acts now: seats in at the start of the
+    # betting round and the actions taken in it so far.
+    if STRATEGY is None or not STRATEGY.matches(ALLOWED_BETS, MAX_RAISES):
+        return None
+    this_round = [
+        decision
+        for decision in state.get("betting_history", [])
+        if decision["betting_round"] == state["betting_round"]
+    ]
+    players = len(_active_players(state)) + sum(d["action"] == "fold" for d in this_round)
+    try:
+        history = [action_code(d["action"], d["amount"], ALLOWED_BETS) for d in this_round]
+    except (KeyError, ValueError):
+        return None
+    return node_key(players, state["betting_round"], history)
 
-def _auto_play_until_trainee(state: dict, player_count: int) -> dict:
+
+def _decision_spot(state: dict, player_index: int) -> dict:
+    # Everything the bot policy conditions on besides the hand; kept with
+    # each decision so ranges can be read back later.
+    return {
+        "current_bet": state["current_bet"],
+        "call_amount": max(state["current_bet"] - state["contrib_this_round"][player_index], 0.0),
+        "can_raise": state["raises_this_round"] < MAX_RAISES,
+        "spot": _strategy_spot(state),
+    }
+
+
+def _policy_probs(spot: dict, category: int) -> dict[tuple[str, float | None], float]:
+    # The bot policy; also the likelihood used to read opponents' ranges.
+    if spot.get("spot") is not None:
+        strategy = STRATEGY.lookup(spot["spot"], category)
+        if strategy is not None:
+            return {decode_action(code, ALLOWED_BETS): prob for code, prob in strategy.items()}
+    return _opponent_action_probs(
+        category, spot["current_bet"], spot["call_amount"], spot["can_raise"]
+    )
+
+
+def _choose_opponent_action(
+    state: dict, player_index: int, rng: random.Random | None = None
+) -> tuple[str, float | None]:
+    category, _, _ = _evaluate_hand(state["hands"][player_index])
+    probs = _policy_probs(_decision_spot(state, player_index), category)
+    roll = (rng or random).random()
+    for choice, prob in probs.items():
+        roll -= prob
+        if roll < 0:
+            return choice
+    return choice
+
+
+def _seat_category_weights(state: dict, seat: int) -> CategoryWeights:
+    weights = list(UNIFORM)
+    for decision in state.get("betting_history", []):
+        if decision["player"] != seat or decision["betting_round"] != state["betting_round"]:
+            continue
+        observed = (decision["action"], decision["amount"])
+        for category in range(len(weights)):
+            if weights[category]:
+                weights[category] *= _policy_probs(decision, category).get(observed, 0.0)
+    # An action the policy cannot produce carries no usable information.
+    return tuple(weights) if any(weights) else UNIFORM
+
+
+def _range_win_pct(
+    state: dict, trainee_index: int, deadline: float | None = None
+) -> tuple[float, float] | None:
+    # Opponents' hands are weighted by how likely the bot policy was to
+    # take their actions this betting round. Deals are pooled per hand and
+    # betting round, reweighted on later decisions, and redrawn only when
+    # too few effective samples remain. After the draw only second-round
+    # actions are used. Only dealing the pool watches the deadline:
+    # scoring is a pass over at most POOL_SAMPLES deals. A pool cut short
+    # answers only if it still holds MIN_EFFECTIVE_SAMPLES; otherwise this
+    # returns None. Results are shared through SHARED_EQUITY under the
+    # hand's suit class, the betting round and every seat's weights.
+    hand = state["hands"][trainee_index]
+    key = (state["round_number"], state["betting_round"], tuple(card.code for card in hand))
+    seats = tuple(i for i in range(len(state["hands"])) if i != trainee_index)
+    current = {seat: _seat_category_weights(state, seat) for seat in seats}
+    active = [i for i in _active_players(state) if i != trainee_index]
+    hero_rank = _hand_score(hand)
+
+    # Folded seats still hold cards, so they are part of the key too.
+    conditioning = tuple(
+        sorted((seat in active, tuple(round(w, 6) for w in current[seat])) for seat in seats)
+    )
+    shared_key = ("five_card_draw", canonical_key(hand), state["betting_round"], conditioning, "range")
+    if SHARED_EQUITY is not None:
+        entry = SHARED_EQUITY.get(shared_key)
+        if entry is not None and entry[0] >= MIN_EFFECTIVE_SAMPLES:
+            CACHE_HITS.inc(cache="shared_equity")
+            return round(entry[2][0] * 100, 1), float(entry[0])
+        CACHE_MISSES.inc(cache="shared_equity")
+
+    pool = state.get("range_pool")
+    if pool is not None and pool.key == key:
+        equity, effective = weighted_equity(pool, hero_rank, current, active)
+        if effective >= MIN_EFFECTIVE_SAMPLES:
+            CACHE_HITS.inc(cache="range_pool")
+            return round(equity * 100, 1), effective
+    CACHE_MISSES.inc(cache="range_pool")
+    pool = build_pool(
+        key,
+        seats,
+        [current[seat] for seat in seats],
+        dead=[(card.rank, card.suit) for card in hand],
+        deadline=deadline,
+    )
+    equity, effective = weighted_equity(pool, hero_rank, current, active)
+    if deadline is not None and effective < MIN_EFFECTIVE_SAMPLES:
+        return None
+    state["range_pool"] = pool
+    if SHARED_EQUITY is not None:
+        SHARED_EQUITY.put(shared_key, int(effective), 0, [equity])
+    return round(equity * 100, 1), effective
+
+
+def _choose_opponent_discards(state: dict, player_index: int) -> list[str]:
+    hand = state["hands"][player_index]
+    option = best_draw(hand, len(_active_players(state)) - 1)
+    return [hand[i].code for i in option.discards]
+
+
+@timed("five_card_draw", "auto_play_until_trainee")
+def _auto_play_until_trainee(
+    state: dict, player_count: int, rng: random.Random | None = None
+) -> dict:
     safety = 0
     while (
-        state["phase"] == "betting"
+        state["phase"] in ("betting", "draw")
         and state["current_actor"] != state["trainee_index"]
-        and safety < player_count * 4
+        and safety < player_count * (MAX_RAISES + 2) * 3
     ):
         safety += 1
         actor = state["current_actor"]
@@ -368,7 +1204,10 @@ def _auto_play_until_trainee(state: dict, player_count: int) -> dict:
                 break
             state["current_actor"] = next_actor
             continue
-        action, amount = _choose_opponent_action(state, actor)
+        if state["phase"] == "draw":
+            state = _apply_draw(state, actor, _choose_opponent_discards(state, actor), rng)
+            continue
+        action, amount = _choose_opponent_action(state, actor, rng)
         amount_value = amount if amount is not None else 0.0
         state = _apply_player_action(state, actor, action, amount_value, player_count)
     return state
@@ -382,50 +1221,19 @@ def _log_action(state: dict, player_index: int, action: str, amount: float | Non
     state["action_log"].append(label)
 
 
-def _rank_value(rank: str) -> int:
-    return RANK_VALUES[rank]
+def _hand_class(hand: list[Card]) -> HandClass:
+    key = 1
+    for card in hand:
+        key *= RANK_PRIMES[card.rank]
+    suit = hand[0].suit
+    if all(card.suit == suit for card in hand):
+        return FLUSH_CLASSES[key]
+    return PLAIN_CLASSES[key]
 
 
 def _evaluate_hand(hand: list[Card]) -> tuple[int, list[int], str]:
-    ranks = [_rank_value(card.rank) for card in hand]
-    ranks_sorted = sorted(ranks, reverse=True)
-    counts: dict[int, int] = {}
-    for r in ranks:
-        counts[r] = counts.get(r, 0) + 1
-    count_list = sorted(counts.items(), key=lambda x: (-x[1], -x[0]))
-    count_values = [c for _, c in count_list]
-    unique_ranks = [r for r, _ in count_list]
-
-    is_flush = len({card.suit for card in hand}) == 1
-    unique_sorted = sorted(set(ranks))
-    is_straight = len(unique_sorted) == 5 and unique_sorted[-1] - unique_sorted[0] == 4
-    is_wheel = unique_sorted == [2, 3, 4, 5, 14]
-    if is_wheel:
-        is_straight = True
-        straight_high = 5
-    else:
-        straight_high = unique_sorted[-1] if is_straight else 0
-
-    if is_straight and is_flush:
-        return (8, [straight_high], "Straight Flush")
-    if count_values[0] == 4:
-        return (7, [unique_ranks[0], unique_ranks[1]], "Four of a Kind")
-    if count_values[0] == 3 and count_values[1] == 2:
-        return (6, [unique_ranks[0], unique_ranks[1]], "Full House")
-    if is_flush:
-        return (5, ranks_sorted, "Flush")
-    if is_straight:
-        return (4, [straight_high], "Straight")
-    if count_values[0] == 3:
-        kickers = sorted(unique_ranks[1:], reverse=True)
-        return (3, [unique_ranks[0], *kickers], "Three of a Kind")
-    if count_values[0] == 2 and count_values[1] == 2:
-        pair_ranks = sorted(unique_ranks[:2], reverse=True)
-        return (2, [pair_ranks[0], pair_ranks[1], unique_ranks[2]], "Two Pair")
-    if count_values[0] == 2:
-        kickers = sorted(unique_ranks[1:], reverse=True)
-        return (1, [unique_ranks[0], *kickers], "One Pair")
-    return (0, ranks_sorted, "High Card")
+    _, category, tiebreakers, label, _ = _hand_class(hand)
+    return category, tiebreakers, label
 
 
 def _evaluate_all_hands(hands: list[list[Card]], folded: list[bool]) -> list[dict]:
@@ -437,15 +1245,14 @@ def _evaluate_all_hands(hands: list[list[Card]], folded: list[bool]) -> list[dic
 
 
 def _determine_winners(hands: list[list[Card]], folded: list[bool]) -> tuple[list[int], list[dict]]:
-    best: tuple[int, list[int]] | None = None
+    best: int | None = None
     winners: list[int] = []
     results: list[dict] = []
     for idx, hand in enumerate(hands):
-        category, tiebreakers, label = _evaluate_hand(hand)
+        score, category, tiebreakers, label, _ = _hand_class(hand)
         results.append({"player": idx, "rank": [category, tiebreakers], "label": label})
         if folded[idx]:
             continue
-        score = (category, tiebreakers)
         if best is None or score > best:
             best = score
             winners = [idx]
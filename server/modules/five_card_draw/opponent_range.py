@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import random
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import Iterable, Sequence
+
+from .hand_table import (
+    CATEGORY_LABELS,
+    CLASS_CATEGORY,
+    CLASS_COUNT,
+    FLUSH_CLASSES,
+    PLAIN_CLASSES,
+    RANK_PRIMES,
+    RANKS,
+    lookup,
+)
+
+SUITS = ["S", "H", "D", "C"]
+DECK = [(rank, suit) for suit in SUITS for rank in RANKS]
+CATEGORIES = range(len(CATEGORY_LABELS))
+POOL_SAMPLES = 800
+MIN_EFFECTIVE_SAMPLES = 200
+MAX_PLACEMENT_ATTEMPTS = 200
+MAX_DEAL_ATTEMPTS = 4
+UNIFORM = tuple(1.0 for _ in CATEGORIES)
+
+# Per-category weights for one seat: the likelihood of everything that
+# seat did this betting round, given it holds a hand of that category.
+CategoryWeights = tuple[float, ...]
+CardPair = tuple[str, str]
+
+
+def _class_shapes() -> tuple[list[tuple[str, ...]], list[bool], list[int]]:
+    ranks: list[tuple[str, ...]] = [()] * CLASS_COUNT
+    flush = [False] * CLASS_COUNT
+    combos = [0] * CLASS_COUNT
+    for classes, is_flush in ((PLAIN_CLASSES, False), (FLUSH_CLASSES, True)):
+        for key, (class_rank, _, _, _, class_combos) in classes.items():
+            values = []
+            for rank in RANKS:
+                while key % RANK_PRIMES[rank] == 0:
+                    values.append(rank)
+                    key //= RANK_PRIMES[rank]
+            ranks[class_rank] = tuple(values)
+            flush[class_rank] = is_flush
+            combos[class_rank] = class_combos
+    return ranks, flush, combos
+
+
+CLASS_RANKS, CLASS_IS_FLUSH, CLASS_COMBOS = _class_shapes()
+CATEGORY_CLASSES = [
+    [rank for rank in range(CLASS_COUNT) if CLASS_CATEGORY[rank] == category]
+    for category in CATEGORIES
+]
+CATEGORY_CUMULATIVE = [
+    list(accumulate(CLASS_COMBOS[rank] for rank in classes)) for classes in CATEGORY_CLASSES
+]
+CATEGORY_COMBOS = [cumulative[-1] for cumulative in CATEGORY_CUMULATIVE]
+
+
+@dataclass
+class RangePool:
+    # Opponent deals drawn from `proposal`, stored as class ranks per seat.
+    # Later decisions reweight them instead of dealing again.
+    key: tuple
+    seats: tuple[int, ...]
+    proposal: tuple[CategoryWeights, ...]
+    samples: list[tuple[int, ...]]
+
+
+def _concrete_hand(class_rank: int, rng: random.Random) -> list[CardPair]:
+    ranks = CLASS_RANKS[class_rank]
+    if CLASS_IS_FLUSH[class_rank]:
+        suit = rng.choice(SUITS)
+        return [(rank, suit) for rank in ranks]
+    if len(set(ranks)) == len(ranks):
+        while True:
+            suits = [rng.choice(SUITS) for _ in ranks]
+            if len(set(suits)) > 1:
+                return list(zip(ranks, suits))
+    hand: list[CardPair] = []
+    for rank in dict.fromkeys(ranks):
+        hand.extend((rank, suit) for suit in rng.sample(SUITS, ranks.count(rank)))
+    return hand
+
+
+def _sample_class(cumulative: list[float], rng: random.Random) -> int:
+    category = rng.choices(CATEGORIES, cum_weights=cumulative)[0]
+    classes = CATEGORY_CUMULATIVE[category]
+    index = bisect_right(classes, rng.random() * classes[-1])
+    return CATEGORY_CLASSES[category][min(index, len(classes) - 1)]
+
+
+def _place_hand(
+    weights: CategoryWeights,
+    cumulative: list[float],
+    used: set[CardPair],
+    live: list[CardPair],
+    rng: random.Random,
+) -> tuple[int, list[CardPair]] | None:
+    # Two exact samplers for one target, taking turns: any hand clear of
+    # `used`, with probability proportional to its category's weight.
+    # Drawing by class suits narrow ranges, but once most of the deck is
+    # out nearly every class draw collides; dealing from the cards left
+    # and accepting by weight suits wide ranges however full the table.
+    deck = [card for card in live if card not in used]
+    top = max(weights)
+    for _ in range(MAX_PLACEMENT_ATTEMPTS):
+        class_rank = _sample_class(cumulative, rng)
+        hand = _concrete_hand(class_rank, rng)
+        if used.isdisjoint(hand):
+            return class_rank, hand
+        hand = rng.sample(deck, 5)
+        class_rank = lookup(hand)[0]
+        if rng.random() * top < weights[CLASS_CATEGORY[class_rank]]:
+            return class_rank, hand
+    return None
+
+
+def build_pool(
+    key: tuple,
+    seats: Sequence[int],
+    proposal: Sequence[CategoryWeights],
+    dead: Iterable[CardPair],
+    samples: int = POOL_SAMPLES,
+    rng: random.Random | None = None,
+    deadline: float | None = None,
+) -> RangePool:
+    # Seats with a narrowed range are placed first, while the deck is
+    # fullest, by _place_hand. A seat that cannot be placed throws the
+    # whole deal away, so no deal ever holds a card twice; after
+    # MAX_DEAL_ATTEMPTS x samples tries, or at the perf_counter deadline,
+    # the pool keeps what it has. The remaining seats are dealt uniformly
+    # from what is left.
+    rng = rng or random.Random()
+    dead_cards = set(dead)
+    live = [card for card in DECK if card not in dead_cards]
+    narrowed = [
+        (
+            position,
+            tuple(weights),
+            list(accumulate(weight * CATEGORY_COMBOS[category] for category, weight in enumerate(weights))),
+        )
+        for position, weights in enumerate(proposal)
+        if tuple(weights) != UNIFORM
+    ]
+    uniform = [position for position, weights in enumerate(proposal) if tuple(weights) == UNIFORM]
+    deals: list[tuple[int, ...]] = []
+    for _ in range(samples * MAX_DEAL_ATTEMPTS):
+        if len(deals) >= samples or (deadline is not None and time.perf_counter() >= deadline):
+            break
+        used = set(dead_cards)
+        deal = [0] * len(proposal)
+        for position, weights, cumulative in narrowed:
+            placed = _place_hand(weights, cumulative, used, live, rng)
+            if placed is None:
+                break
+            deal[position], hand = placed
+            used.update(hand)
+        else:
+            if uniform:
+                deck = [card for card in live if card not in used] if narrowed else live
+                cards = rng.sample(deck, 5 * len(uniform))
+                for index, position in enumerate(uniform):
+                    deal[position] = lookup(cards[index * 5 : index * 5 + 5])[0]
+            deals.append(tuple(deal))
+    return RangePool(key, tuple(seats), tuple(proposal), deals)
+
+
+def weighted_equity(
+    pool: RangePool,
+    hero_rank: int,
+    current: dict[int, CategoryWeights],
+    active: Iterable[int],
+) -> tuple[float, float]:
+    # Importance weights are current / proposal per active seat; a seat's
+    # weights only shrink as actions accumulate, so the ratio is defined
+    # wherever the current weight is non-zero.
+    positions = {seat: index for index, seat in enumerate(pool.seats)}
+    ratios = []
+    for seat in active:
+        proposal = pool.proposal[positions[seat]]
+        weights = current.get(seat, UNIFORM)
+        ratios.append(
+            (
+                positions[seat],
+                [weights[c] / proposal[c] if proposal[c] else 0.0 for c in CATEGORIES],
+            )
+        )
+    total = total_sq = share = 0.0
+    for deal in pool.samples:
+        weight = 1.0
+        best = -1
+        for position, ratio in ratios:
+            class_rank = deal[position]
+            weight *= ratio[CLASS_CATEGORY[class_rank]]
+            if not weight:
+                break
+            if class_rank > best:
+                best = class_rank
+        if not weight:
+            continue
+        total += weight
+        total_sq += weight * weight
+        if best < hero_rank:
+            share += weight
+        elif best == hero_rank:
+            share += weight * 0.5
+    if not total:
+        return 0.0, 0.0
+    return share / total, total * total / total_sq
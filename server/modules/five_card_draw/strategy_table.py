@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from typing import Sequence
+
+from .hand_table import CATEGORY_LABELS
+
+TABLE_MAGIC = b"CFRS"
+TABLE_VERSION = 1
+BUCKET_COUNT = len(CATEGORY_LABELS)
+# Strategies are stored as bytes; each row is renormalised on lookup.
+QUANTUM = 255
+# magic, version, bucket_count, node_count, index length in bytes
+HEADER = struct.Struct("<4sIIII")
+TABLE_PATH = os.getenv(
+    "DRAW_STRATEGY_TABLE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "strategy.bin"),
+)
+
+
+def action_code(action: str, amount: float | None, bets: Sequence[float]) -> str:
+    # One betting action as it appears in a node key: k(check), c(call),
+    # f(fold), or b/r plus the index of the amount in the allowed bets.
+    if action in ("bet", "raise"):
+        return f"{action[0]}{list(bets).index(amount)}"
+    return {"check": "k", "call": "c", "fold": "f"}[action]
+
+
+def decode_action(code: str, bets: Sequence[float]) -> tuple[str, float | None]:
+    if code[0] in "br":
+        return ("bet" if code[0] == "b" else "raise"), bets[int(code[1:])]
+    return {"k": "check", "c": "call", "f": "fold"}[code], None
+
+
+def node_key(players: int, betting_round: int, history: Sequence[str]) -> str:
+    # players: seats still in when the betting round opened.
+    return f"{players}/{betting_round}/{'.'.join(history)}"
+
+
+class StrategyTable:
+    # Average CFR strategies per decision node and hand-category bucket,
+    # read in place from a memory-mapped file so every worker process
+    # shares the pages. Only the node index is parsed at load.
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, buckets, node_count, index_size = HEADER.unpack_from(self._map)
+            if magic != TABLE_MAGIC or version != TABLE_VERSION or buckets != BUCKET_COUNT:
+                raise ValueError(f"{path} is not a compatible strategy table")
+            index = json.loads(self._map[HEADER.size : HEADER.size + index_size])
+        except (ValueError, struct.error):
+            self._map.close()
+            raise
+        self.path = path
+        self.bets = tuple(index["bets"])
+        self.max_raises = index["max_raises"]
+        self.iterations = index["iterations"]
+        self._nodes: dict[str, tuple[int, tuple[str, ...]]] = {}
+        offset = HEADER.size + index_size
+        for key, actions in index["nodes"]:
+            self._nodes[key] = (offset, tuple(actions))
+            offset += buckets * len(actions)
+        if len(self._nodes) != node_count or offset != len(self._map):
+            self._map.close()
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def matches(self, bets: Sequence[float], max_raises: int) -> bool:
+        return self.bets == tuple(bets) and self.max_raises == max_raises
+
+    def lookup(self, key: str, bucket: int) -> dict[str, float] | None:
+        # Action code -> probability, or None for a node the solver never saw.
+        node = self._nodes.get(key)
+        if node is None:
+            return None
+        offset, actions = node
+        row = self._map[offset + bucket * len(actions) : offset + (bucket + 1) * len(actions)]
+        total = sum(row)
+        if not total:
+            return {code: 1 / len(actions) for code in actions}
+        return {code: weight / total for code, weight in zip(actions, row)}
+
+
+def load_strategy_table(path: str = TABLE_PATH) -> StrategyTable | None:
+    try:
+        return StrategyTable(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+
+def write_strategy_table(
+    path: str,
+    nodes: Sequence[tuple[str, Sequence[str], Sequence[Sequence[float]]]],
+    bets: Sequence[float],
+    max_raises: int,
+    iterations: int,
+) -> None:
+    # nodes: (key, action codes, per-bucket probabilities).
+    index = json.dumps(
+        {
+            "bets": list(bets),
+            "max_raises": max_raises,
+            "iterations": iterations,
+            "nodes": [[key, list(actions)] for key, actions, _ in nodes],
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    data = bytearray()
+    for _, actions, rows in nodes:
+        for probs in rows:
+            data.extend(_quantize(probs))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(TABLE_MAGIC, TABLE_VERSION, BUCKET_COUNT, len(nodes), len(index)))
+        f.write(index)
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _quantize(probs: Sequence[float]) -> bytes:
+    # Largest remainder, so every row sums to exactly QUANTUM.
+    if sum(probs) <= 0:
+        probs = [1 / len(probs)] * len(probs)
+    scaled = [p * QUANTUM for p in probs]
+    values = [int(value) for value in scaled]
+    order = sorted(range(len(probs)), key=lambda i: values[i] - scaled[i])
+    for i in order[: QUANTUM - sum(values)]:
+        values[i] += 1
+    return bytes(values)
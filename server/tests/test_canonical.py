@@ -0,0 +1,61 @@
+import random
+from itertools import combinations
+
+from server.core.canonical import RANKS, SUITS, WILD_SUIT, canonicalize
+from server.main import MODULE_REGISTRY
+
+DECK = [(rank, suit) for suit in SUITS for rank in RANKS]
+
+
+def test_multiplicity_counts_every_suit_relabelling():
+    classes: dict[tuple, list[int]] = {}
+    for cards in combinations(DECK, 3):
+        canonical = canonicalize([cards])
+        entry = classes.setdefault(canonical.groups, [0, canonical.multiplicity])
+        entry[0] += 1
+    assert len(classes) == 1755
+    assert all(seen == multiplicity for seen, multiplicity in classes.values())
+    assert sum(multiplicity for _, multiplicity in classes.values()) == 22100
+
+
+def test_key_is_invariant_under_suit_permutation_with_wilds():
+    rng = random.Random(4)
+    for _ in range(500):
+        cards = rng.sample(DECK, 7)
+        wild = {rng.choice(RANKS)}
+        perm = dict(zip(SUITS, rng.sample(SUITS, 4)))
+        relabelled = [(rank, perm[suit]) for rank, suit in cards]
+        first = canonicalize([cards[:5], cards[5:]], wild)
+        second = canonicalize([relabelled[:5], relabelled[5:]], wild)
+        assert first.groups == second.groups
+
+
+def test_other_suit_labels_canonicalize_the_same_way():
+    symbols = ("♠", "♥", "♦", "♣")
+    to_symbol = dict(zip(SUITS, symbols))
+    rng = random.Random(5)
+    for _ in range(200):
+        cards = rng.sample(DECK, 7)
+        plain = canonicalize([cards[:5], cards[5:]], {"Q"})
+        relabelled = [(rank, to_symbol[suit]) for rank, suit in cards]
+        other = canonicalize([relabelled[:5], relabelled[5:]], {"Q"}, suits=symbols)
+        assert other.multiplicity == plain.multiplicity
+        mapped = [{(rank, to_symbol.get(suit, suit)) for rank, suit in group} for group in plain.groups]
+        assert [set(group) for group in other.groups] == mapped
+
+
+def test_wild_suits_do_not_break_flush_classes():
+    suited = [("2", "H"), ("7", "H"), ("9", "H"), ("K", "H"), ("Q", "S")]
+    made = [("2", "D"), ("7", "D"), ("9", "D"), ("K", "D"), ("Q", "D")]
+    first = canonicalize([suited], {"Q"})
+    assert first.groups == canonicalize([made], {"Q"}).groups
+    assert len({suit for _, suit in first.groups[0] if suit != WILD_SUIT}) == 1
+    assert canonicalize([suited]).groups != canonicalize([made]).groups
+
+
+def test_draw_options_map_discards_back_to_hand_order():
+    draw = MODULE_REGISTRY["five_card_draw"].module
+    hand = [draw.Card(code[:-1], code[-1]) for code in ("4S", "KH", "2H", "9H", "7H")]
+    swapped = [draw.Card(card.rank, {"H": "C", "S": "D"}[card.suit]) for card in hand]
+    assert draw.best_draw(hand, 2).discards == (0,)
+    assert draw.best_draw(swapped, 2).discards == (0,)
@@ -0,0 +1,69 @@
+import random
+
+from fastapi.testclient import TestClient
+
+from server import main
+from server.modules.five_card_draw import build_drill_spots
+from server.modules.five_card_draw.drill_store import load_spot_store, write_spot_store
+
+client = TestClient(main.app)
+draw = main.MODULE_REGISTRY["five_card_draw"].module
+
+
+def _best_answer(session: dict) -> dict:
+    spot = main.SESSIONS.get(session["id"]).state["spot"]
+    answer = {"player_index": session["payload"]["trainee_index"]}
+    if spot["kind"] == "draw":
+        return {**answer, "action": "draw", "discards": spot["solution"]["options"][0]["discards"]}
+    best = max(spot["solution"]["actions"], key=lambda entry: entry["ev"])
+    return {**answer, "action": best["action"], "amount": best["amount"]}
+
+
+def test_drill_sessions_serve_and_grade_stored_spots(tmp_path, monkeypatch):
+    dice = random.getstate()
+    spots = build_drill_spots.build_part(2, 6, 40, seed=3)
+    # Spots come from their own seeded generator, never the shared one.
+    assert random.getstate() == dice
+    again = build_drill_spots.build_part(2, 6, 40, seed=3)
+    assert [spot["solution"] for spot in again] == [spot["solution"] for spot in spots]
+    path = str(tmp_path / "drill_spots.bin")
+    assert write_spot_store(path, spots, draw.ALLOWED_BETS, draw.MAX_RAISES) == 6
+    store = load_spot_store(path)
+    monkeypatch.setattr(draw, "DRILL_SPOTS", store)
+    # Serving never samples: any rollout or equity estimate would raise.
+    for name in ("_action_rollouts", "_estimate_win_pct", "_trainee_advice"):
+        monkeypatch.setattr(draw, name, None)
+
+    body = {"module_id": "five_card_draw", "player_count": 2, "mode": "drill"}
+    session = client.post("/sessions", json=body).json()
+    assert session["payload"]["drill"]["answered"] == 0
+    assert session["payload"]["advice"] is not None
+
+    for answered in range(1, 4):
+        session = client.post(f"/sessions/{session['id']}/action", json=_best_answer(session)).json()
+        drill = session["payload"]["drill"]
+        assert session["payload"]["phase"] == "review"
+        assert drill["answer"]["correct"] and drill["answered"] == drill["correct"] == answered
+        session = client.post(
+            f"/sessions/{session['id']}/action", json={"player_index": 0, "action": "next_hand"}
+        ).json()
+        assert session["payload"]["phase"] in ("betting", "draw")
+
+    category = spots[0]["category"]
+    filtered = client.post("/sessions", json={**body, "drill": {"category": category}}).json()
+    assert filtered["payload"]["drill"]["category"] == draw.CATEGORY_LABELS[category]
+    missing = {**body, "player_count": 3}
+    assert client.post("/sessions", json=missing).status_code == 404
+
+
+def test_spot_store_filters_by_group(tmp_path):
+    spot = {"players": 3, "category": 1, "position": 2, "difficulty": "hard", "payload": {}}
+    path = str(tmp_path / "spots.bin")
+    write_spot_store(path, [spot, {**spot, "difficulty": "easy"}], [0.05], 2)
+    store = load_spot_store(path)
+    assert store.counts(3) == {"3/1/2/hard": 1, "3/1/2/easy": 1}
+    assert store.sample(3, difficulty="easy")["difficulty"] == "easy"
+    assert store.sample(3, position=0) is None
+    assert store.sample(2) is None
+    assert not store.matches([0.1], 2)
+    assert load_spot_store(str(tmp_path / "missing.bin")) is None
@@ -0,0 +1,237 @@
+import itertools
+import random
+import sys
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from server.main import MODULE_REGISTRY
+from server.modules.five_card_draw.opponent_range import CLASS_RANKS
+
+draw = MODULE_REGISTRY["five_card_draw"].module
+
+
+def _hand(*codes: str) -> list:
+    return [draw.Card(code[:-1], code[-1]) for code in codes]
+
+
+def test_hand_table_covers_every_class():
+    classes = [*draw.PLAIN_CLASSES.values(), *draw.FLUSH_CLASSES.values()]
+    assert len(classes) == 7462
+    assert sum(entry[4] for entry in classes) == 2598960
+    assert sorted(entry[0] for entry in classes) == list(range(7462))
+
+
+def test_evaluate_hand_uses_class_order():
+    wheel = _hand("AS", "2H", "3D", "4C", "5S")
+    six_high = _hand("2S", "3H", "4D", "5C", "6S")
+    royal = _hand("10H", "JH", "QH", "KH", "AH")
+    assert draw._evaluate_hand(wheel) == (4, [5], "Straight")
+    assert draw._evaluate_hand(royal) == (8, [14], "Straight Flush")
+    assert draw._hand_score(wheel) < draw._hand_score(six_high) < draw._hand_score(royal)
+
+
+def test_draw_engine_counts_flush_draws_exactly():
+    hand = _hand("2H", "7H", "9H", "KH", "4S")
+    options = draw.draw_options(hand, opponents=2)
+    assert len(options) == 32
+    four_flush = next(o for o in options if o.discards == (4,))
+    flush_or_better = sum(four_flush.category_probs[5:])
+    assert abs(flush_or_better - 9 / 47) < 1e-12
+    assert all(abs(sum(o.category_probs) - 1) < 1e-9 for o in options)
+
+
+def test_draw_phase_replaces_cards_and_starts_second_round():
+    state = draw._deal_new_hand(8, round_number=1, dealer_index=0, trainee_index=0)
+    draw._start_draw(state)
+    # Force a reshuffle of the muck by emptying most of the deck.
+    state["muck"].extend(state["deck"][:-2])
+    del state["deck"][:-2]
+    while state["phase"] == "draw":
+        actor = state["current_actor"]
+        discards = [card.code for card in state["hands"][actor]]
+        draw._apply_draw(state, actor, discards)
+
+    assert state["phase"] == "betting"
+    assert state["betting_round"] == 2
+    assert state["contrib_this_round"] == [0.0] * 8
+    cards = [card.code for hand in state["hands"] for card in hand]
+    cards += [card.code for card in state["deck"] + state["muck"]]
+    assert len(cards) == len(set(cards)) == 52
+
+
+def test_preflop_equity_table_answers_opening_advice(tmp_path, monkeypatch):
+    from server.modules.five_card_draw.build_equity_table import class_equity
+    from server.modules.five_card_draw.equity_table import write_equity_table
+
+    royal_rank = draw._hand_score(_hand("10H", "JH", "QH", "KH", "AH"))
+    rows = [[(0.25, 0.5)] * 7 for _ in range(7462)]
+    rows[royal_rank] = class_equity(royal_rank, iterations=50, seed=0)
+    path = str(tmp_path / "preflop_equity.bin")
+    write_equity_table(path, rows, iterations=50)
+
+    table = draw.load_equity_table(7462, path)
+    assert table is not None and table.iterations == 50
+    assert table.lookup(royal_rank, 7) == (1.0, 0.0)
+    assert table.lookup(0, 8) is None
+
+    monkeypatch.setattr(draw, "PREFLOP_EQUITY", table)
+    state = draw._deal_new_hand(4, round_number=1, dealer_index=0, trainee_index=0)
+    state["hands"][0] = _hand("2S", "3H", "4D", "5C", "7S")
+    assert draw._trainee_advice(state, 4)["win_pct"] == 50.0
+
+    # After the draw the table is not consulted at all.
+    state["betting_round"] = 2
+    strategy = SimpleNamespace(matches=lambda *args: True, lookup=lambda *args: {"k": 1.0})
+    monkeypatch.setattr(draw, "STRATEGY", strategy)
+    misses = draw.CACHE_MISSES.value(cache="preflop_equity")
+    advice = draw._strategy_advice(state)
+    assert advice["win_pct"] == draw._heuristic_win_pct(state, 0)
+    assert draw.CACHE_MISSES.value(cache="preflop_equity") == misses
+
+
+def test_range_model_reads_opponent_bets():
+    state = draw._deal_new_hand(3, round_number=1, dealer_index=0, trainee_index=0)
+    state["hands"][0] = _hand("KS", "KH", "7D", "4C", "2S")
+    draw._apply_player_action(state, 1, "bet", draw.ALLOWED_BETS[-1], 3)
+
+    weights = draw._seat_category_weights(state, 1)
+    assert not any(weights[:4]) and all(weights[4:])
+    assert draw._seat_category_weights(state, 2) == draw.UNIFORM
+
+    win_pct, effective = draw._range_win_pct(state, 0)
+    pool = state["range_pool"]
+    assert effective >= draw.MIN_EFFECTIVE_SAMPLES
+    assert win_pct < 5.0 < draw._estimate_win_pct(state, 0, opponent_model="uniform")
+
+    draw._apply_player_action(state, 2, "fold", None, 3)
+    draw._range_win_pct(state, 0)
+    assert state["range_pool"] is pool
+
+
+def test_range_pool_never_deals_a_card_twice():
+    # One spade of every rank but K and A is dead, so only KKKK and AAAA
+    # are left for seats holding nothing but quads.
+    dead = [(rank, "S") for rank in draw.RANKS[:-2]]
+    quads = tuple(1.0 if category == 7 else 0.0 for category in range(9))
+    pool = draw.build_pool("k", (1, 2), [quads, quads], dead, samples=20)
+    assert len(pool.samples) == 20
+    for deal in pool.samples:
+        quad_ranks = {max(CLASS_RANKS[rank], key=CLASS_RANKS[rank].count) for rank in deal}
+        assert quad_ranks == {"K", "A"}
+    # A third such seat cannot be seated without repeating a card.
+    assert not draw.build_pool("k", (1, 2, 3), [quads] * 3, dead, samples=20).samples
+
+
+def test_range_advice_at_a_full_table_keeps_its_deadline(monkeypatch):
+    assert draw.OPPONENT_MODEL == "range"
+    monkeypatch.setattr(draw, "SHARED_EQUITY", None)
+    # A fake clock that ticks once per deal: the pool stops at the deadline
+    # with too few deals to answer, whatever the machine's speed.
+    ticks = itertools.count()
+    pools = sys.modules[draw.build_pool.__module__]
+    monkeypatch.setattr(pools, "time", SimpleNamespace(perf_counter=lambda: next(ticks)))
+    random.seed(0)
+    state = draw._deal_new_hand(8, round_number=1, dealer_index=0, trainee_index=0)
+    # The dealer acts last: seven narrowed ranges to deal around.
+    state = draw._auto_play_until_trainee(state, 8)
+    forked = draw._fork(state)
+    assert draw._range_win_pct(forked, 0, deadline=50) is None
+    assert forked.get("range_pool") is state.get("range_pool")
+
+    # A job that runs out of time falls back to the heuristic, and the live
+    # state keeps nothing from it.
+    monkeypatch.setattr(draw, "_range_win_pct", lambda *args, **kwargs: None)
+    win_pct, outcome = draw._scheduled_win_pct(state, 0)
+    assert outcome != "computed"
+    assert win_pct == draw._heuristic_win_pct(state, 0)
+    assert "advice_cache" not in state
+
+
+def test_next_hand_is_prepared_during_the_showdown(monkeypatch):
+    state = draw.init_state(4)
+    while state["phase"] != "showdown":
+        state = draw.apply_action(
+            state, {"player_index": state["trainee_index"], "action": "fold"}, 4
+        )
+    prepared = state["next_hand"].result(10)
+
+    # A preparation still running is not waited for: the hand is dealt here.
+    running = Future()
+    running.set_running_or_notify_cancel()
+    misses = draw.CACHE_MISSES.value(cache="predealt_hand")
+    next_hand = {"player_index": 0, "action": "next_hand"}
+    inline = draw.apply_action({**state, "next_hand": running}, next_hand, 4)
+    assert inline["round_number"] == state["round_number"] + 1
+    assert draw.CACHE_MISSES.value(cache="predealt_hand") == misses + 1
+
+    def no_sampling(*args, **kwargs):
+        raise AssertionError("advice should have been prepared")
+
+    monkeypatch.setattr(draw, "_scheduled_win_pct", no_sampling)
+    hits = draw.CACHE_HITS.value(cache="predealt_hand")
+    next_state = draw.apply_action(state, next_hand, 4)
+    assert next_state is prepared
+    assert next_state["round_number"] == state["round_number"] + 1
+    assert draw.CACHE_HITS.value(cache="predealt_hand") == hits + 1
+    assert draw._advice_due(next_state)
+    assert draw.render_payload(next_state, 4)["advice"] is not None
+
+    # Ending the session drops a preparation that has not run yet.
+    pending = Future()
+    showdown = {**state, "next_hand": pending}
+    draw.discard_state(showdown)
+    assert pending.cancelled() and "next_hand" not in showdown
+
+
+def test_what_if_values_roll_out_forks_without_touching_the_state():
+    state = draw._deal_new_hand(3, round_number=1, dealer_index=2, trainee_index=0)
+    state["hands"][0] = _hand("9S", "9H", "9D", "9C", "2S")
+    assert draw._advice_due(state)
+    before = repr(state)
+
+    values = draw.action_values(state, 3, iterations=300)
+    assert repr(state) == before
+    by_action = {(entry["action"], entry["amount"]): entry for entry in values["actions"]}
+    assert set(by_action) == set(draw._candidate_actions(state, 3))
+    assert by_action[("fold", None)]["ev"] == 0.0
+    # Quads win every pot they stay in.
+    for entry in values["actions"][1:]:
+        assert 0 < entry["ci95"][0] <= entry["ev"] <= entry["ci95"][1]
+    assert values["best"]["action"] != "fold"
+
+
+def test_cfr_strategy_table_drives_bots_advice_and_ranges(tmp_path, monkeypatch):
+    from server.modules.five_card_draw import build_strategy_table as solver
+    from server.modules.five_card_draw.strategy_table import write_strategy_table
+
+    bets = tuple(draw.ALLOWED_BETS)
+    equity = tuple(tuple(0.5 for _ in range(9)) for _ in range(9))
+    game = solver.Game(2, 2, bets, draw.MAX_RAISES, 0.1, (1 / 9,) * 9, equity)
+    checkpoints = str(tmp_path / "cfr")
+    rows = solver.solve([game], iterations=40, workers=1, seed=0, directory=checkpoints, every=20)
+    assert solver.solve_part(game, 40, 0, 0, checkpoints, 20)[1] == 40
+    assert len(rows) == sum(node.actor is not None for node in solver.build_tree(2, 2, bets, 3))
+    assert all(abs(sum(probs) - 1) < 1e-9 for _, _, buckets in rows for probs in buckets)
+
+    # High cards check, everything else bets the most at a fresh 3-way pot.
+    bet_big = [0.0, 0.0, 0.0, 1.0]
+    root = ("3/1/", ("k", "b0", "b1", "b2"), [[1.0, 0, 0, 0]] + [bet_big] * 8)
+    path = str(tmp_path / "strategy.bin")
+    write_strategy_table(path, [*rows, root], bets, draw.MAX_RAISES, iterations=40)
+    table = draw.load_strategy_table(path)
+    assert table is not None and len(table) == len(rows) + 1
+    monkeypatch.setattr(draw, "STRATEGY", table)
+
+    state = draw._deal_new_hand(3, round_number=1, dealer_index=2, trainee_index=0)
+    state["hands"][0] = _hand("9S", "9H", "4D", "5C", "2S")
+    advice = draw._trainee_advice(state, 3)
+    assert advice["estimate"] == "strategy"
+    assert (advice["recommended_action"], advice["recommended_amount"]) == ("bet", bets[-1])
+
+    state["hands"][0] = _hand("KS", "9H", "4D", "5C", "2S")
+    assert draw._choose_opponent_action(state, 0) == ("check", None)
+    draw._apply_player_action(state, 0, "bet", bets[-1], 3)
+    assert state["betting_history"][0]["spot"] == "3/1/"
+    # Under the table only a made hand bets big here.
+    assert draw._seat_category_weights(state, 0)[0] == 0.0
+    assert draw._strategy_spot(state) == "3/1/b2"
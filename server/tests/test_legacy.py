@@ -0,0 +1,249 @@
+import asyncio
+import os
+import random
+import sys
+from collections import Counter
+from itertools import combinations, product
+
+import pytest
+
+LEGACY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "legacy")
+if LEGACY_DIR not in sys.path:
+    sys.path.insert(0, LEGACY_DIR)
+
+import aio_server  # noqa: E402
+import app as legacy  # noqa: E402
+import engine  # noqa: E402
+import sim  # noqa: E402
+
+DECK = engine.create_deck()
+
+
+def test_profiled_simulations_include_the_scheduler_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(legacy.PROFILES, "directory", str(tmp_path))
+    assert legacy.dispatch_post("/new_game", {})[1] == 200
+    payload, status, headers = legacy.dispatch_post("/simulate?profile=1", {})
+    assert status == 200 and payload["odds"]["scheduler"] == "computed"
+    folded = legacy.dispatch_get(f"/profiles/{headers['X-Profile-Id']}")[2].decode()
+    equity = [line for line in folded.splitlines() if "simulate_odds" in line]
+    assert equity and all(line.startswith("thread equity-worker;") for line in equity)
+
+
+def _baseline_high(cards, wild_ranks):
+    # The evaluator as first written: every ordered wild assignment scored
+    # in full. The cached multiset search must agree with it.
+    base = [engine.rank_value(card.rank) for card in cards if card.rank not in wild_ranks]
+    flush = engine.is_flush_possible(cards, wild_ranks)
+    best = None
+    for assignment in product(engine.WILD_HIGH_VALUES, repeat=len(cards) - len(base)):
+        ranks = base + list(assignment)
+        counts = sorted(Counter(ranks).items(), key=lambda entry: (-entry[1], -entry[0]))
+        shape = [count for _, count in counts]
+        unique = [rank for rank, _ in counts]
+        straight = engine.get_straight_high(ranks)
+        if shape[0] == 5:
+            score = [9, unique[0]]
+        elif straight and flush:
+            score = [8, straight]
+        elif shape[0] == 4:
+            score = [7, unique[0], unique[1]]
+        elif shape[:2] == [3, 2]:
+            score = [6, unique[0], unique[1]]
+        elif flush:
+            score = [5, *sorted(ranks, reverse=True)]
+        elif straight:
+            score = [4, straight]
+        elif shape[0] == 3:
+            score = [3, unique[0], *sorted(unique[1:], reverse=True)]
+        elif shape[:2] == [2, 2]:
+            score = [2, *sorted(unique[:2], reverse=True), unique[2]]
+        elif shape[0] == 2:
+            score = [1, unique[0], *sorted(unique[1:], reverse=True)]
+        else:
+            score = [0, *sorted(ranks, reverse=True)]
+        if best is None or engine.compare_high(score, best) > 0:
+            best = score
+    return best
+
+
+def _baseline_low(cards, wild_ranks, natural_low_enabled):
+    if natural_low_enabled:
+        return sorted(engine.rank_value_low(card.rank) for card in cards)
+    base = [engine.rank_value_low(card.rank) for card in cards if card.rank not in wild_ranks]
+    best = None
+    for assignment in product(engine.WILD_LOW_VALUES, repeat=len(cards) - len(base)):
+        ranks = sorted(base + list(assignment))
+        if best is None or engine.compare_low(ranks, best) > 0:
+            best = ranks
+    return best
+
+
+def _baseline_best_hand(hand, community, wild_ranks, natural_low_enabled):
+    best_high = best_low = None
+    for hand_idxs in engine.HAND_COMBOS:
+        for comm_idxs in engine.COMM_COMBOS:
+            cards = [hand[i] for i in hand_idxs] + [community[i] for i in comm_idxs]
+            high = _baseline_high(cards, wild_ranks)
+            low = _baseline_low(cards, wild_ranks, natural_low_enabled)
+            if best_high is None or engine.compare_high(high, best_high) > 0:
+                best_high = high
+            if best_low is None or engine.compare_low(low, best_low) > 0:
+                best_low = low
+    return {"best_high": best_high, "best_low": best_low}
+
+
+def test_five_card_scores_match_the_baseline_evaluator():
+    rng = random.Random(7)
+    for _ in range(400):
+        cards = rng.sample(DECK, 5)
+        wild = set(rng.sample(engine.RANKS, rng.randrange(3)))
+        assert engine.evaluate_high_five(cards, wild) == _baseline_high(cards, wild)
+        for natural in (False, True):
+            assert engine.evaluate_low_five(cards, wild, natural) == _baseline_low(cards, wild, natural)
+
+
+def test_board_evaluation_matches_the_baseline_on_plain_and_wild_boards():
+    rng = random.Random(11)
+    queens = [card for card in DECK if card.rank == "Q"]
+    for deal in range(12):
+        cards = rng.sample(DECK, 15)
+        hand, community = cards[:5], cards[5:]
+        if deal % 2:
+            # A face-up Queen makes the next card's rank, and itself, wild.
+            queen = next(card for card in queens if card not in cards)
+            community[2] = queen
+        pairs = [community[i : i + 2] for i in range(0, 10, 2)]
+        wild = engine.build_wild_ranks(pairs, 5)
+        assert wild or not deal % 2
+        natural = deal % 4 == 3
+        board = engine.prepare_board(community, wild, natural)
+        expected = _baseline_best_hand(hand, community, wild, natural)
+        assert engine.best_hand_on_board(hand, board) == expected
+
+
+def test_odds_keys_ignore_suit_names_and_unrevealed_cards():
+    rng = random.Random(3)
+    symbols = list(engine.SUITS)
+    for _ in range(50):
+        cards = rng.sample(DECK, 15)
+        hero, pairs = cards[:5], [cards[5 + i : 7 + i] for i in range(0, 10, 2)]
+        spot = {"player_count": 4, "revealed_pairs": 3, "high_low_enabled": True, "natural_low_enabled": False}
+        relabel = dict(zip(symbols, rng.sample(symbols, 4)))
+
+        def swap(card):
+            suit = relabel[card.suit]
+            return engine.Card(card.rank, suit, f"{card.rank}{suit}")
+
+        key = sim._odds_key(hero_hand=hero, community_pairs=pairs, **spot)
+        swapped = sim._odds_key(
+            hero_hand=[swap(card) for card in hero],
+            community_pairs=[[swap(card) for card in pair] for pair in pairs],
+            **spot,
+        )
+        reshuffled = pairs[:3] + [pairs[4], pairs[3]]
+        assert key == swapped == sim._odds_key(hero_hand=hero, community_pairs=reshuffled, **spot)
+        assert key != sim._odds_key(hero_hand=hero, community_pairs=pairs, **{**spot, "player_count": 5})
+
+
+def test_odds_keys_track_wild_ranks_and_a_trailing_queen():
+    by_code = {card.code: card for card in DECK}
+    hero = [by_code[code] for code in ("A♠", "K♠", "7♥", "4♦", "2♣")]
+    spot = {"player_count": 3, "revealed_pairs": 2, "high_low_enabled": False, "natural_low_enabled": False}
+
+    def key(*codes):
+        cards = [by_code[code] for code in codes]
+        return sim._odds_key(hero_hand=hero, community_pairs=[cards[0:2], cards[2:4]], **spot)
+
+    wild = key("Q♥", "9♣", "5♠", "3♦")
+    assert wild[2] == ("9",) and not wild[3]
+    # Any nine is wild, so its suit no longer matters.
+    assert wild == key("Q♥", "9♦", "5♠", "3♦")
+    assert key("3♦", "5♠", "9♣", "Q♥")[3]
+    assert key("9♣", "Q♥", "5♠", "3♦")[2] == ("5",)
+
+
+def test_low_pair_distribution_matches_enumeration():
+    # A small deck of low values 1..5 with uneven counts, enumerated outright.
+    counts = (0, 2, 1, 3, 0, 2) + (0,) * 8
+    cards = [value for value, count in enumerate(counts) for _ in range(count)]
+    for draw_count in (2, 3, 5):
+        seen = Counter()
+        hands = list(combinations(range(len(cards)), draw_count))
+        for hand in hands:
+            lowest = sorted(cards[i] for i in hand)[:2]
+            seen[tuple(lowest)] += 1
+        distribution = sim._low_pair_distribution(counts, draw_count)
+        assert set(distribution) == set(seen)
+        for pair, ways in seen.items():
+            assert abs(distribution[pair] - ways / len(hands)) < 1e-12
+        assert abs(sum(distribution.values()) - 1) < 1e-12
+    assert sim._low_pair_distribution(counts, len(cards) + 1) == {}
+
+
+def test_street_odds_are_probabilities_consistent_with_each_seat():
+    rng = random.Random(9)
+    for revealed_pairs in range(6):
+        for high_low_enabled in (False, True):
+            cards = rng.sample(DECK, 30)
+            hands = {seat: cards[seat * 5 : seat * 5 + 5] for seat in range(4)}
+            pairs = [cards[20 + i : 22 + i] for i in range(0, 10, 2)]
+            spot = {
+                "player_count": 4,
+                "community_pairs": pairs,
+                "revealed_pairs": revealed_pairs,
+                "high_low_enabled": high_low_enabled,
+                "natural_low_enabled": False,
+            }
+            street = sim.estimate_street_odds(hands=hands, **spot)
+            assert set(street) == set(hands)
+            for seat, hand in hands.items():
+                assert 0.0 <= street[seat] <= 1.0
+                assert street[seat] == sim.estimate_player_odds(hero_hand=hand, **spot)
+                odds = sim._heuristic_odds(hero_hand=hand, **spot)
+                assert all(0.0 <= odds[name] <= 1.0 for name in sim.OUTCOMES)
+                assert odds["scoop"] <= min(odds["high"], odds["low"]) or not high_low_enabled
+                assert odds["any"] == max(odds["high"], odds["low"])
+
+
+def test_board_enumeration_only_reports_whole_passes():
+    assert sim.simulation_method(4, 300) == ("sampled", 0)
+    assert sim.simulation_method(4, 20000) == ("exact_board", 39 * 38)
+    assert sim.simulation_method(5, 300) == ("exact_board", 1)
+
+    rng = random.Random(2)
+    cards = rng.sample(DECK, 15)
+    spot = {
+        "player_count": 2,
+        "hero_hand": cards[:5],
+        "community_pairs": [cards[5 + i : 7 + i] for i in range(0, 10, 2)],
+        "revealed_pairs": 4,
+        "high_low_enabled": True,
+        "natural_low_enabled": False,
+    }
+    *_, odds = sim.iter_simulation(**spot, max_time_ms=60000, max_iterations=2000)
+    assert odds["method"] == "exact_board" and odds["iterations_run"] == 39 * 38
+    # Cut short by the clock, a partial pass is only a sample of runouts.
+    *_, odds = sim.iter_simulation(**spot, max_time_ms=20, max_iterations=2000)
+    assert odds["time_capped"] and odds["method"] == "sampled"
+
+
+def test_asyncio_server_times_out_slow_requests_and_frames_http_10(monkeypatch):
+    monkeypatch.setattr(aio_server, "REQUEST_TIMEOUT_S", 0.05)
+
+    async def read(*chunks):
+        reader = asyncio.StreamReader()
+        for chunk in chunks:
+            reader.feed_data(chunk)
+        return await aio_server._read_request(reader)
+
+    request = asyncio.run(read(b"GET / HTTP/1.1\r\nHost: x\r\n\r\n"))
+    assert request[:3] == ("GET", "/", "HTTP/1.1") and request[3] == {"host": "x"}
+    # Headers that never finish no longer hold the connection.
+    with pytest.raises(aio_server.RequestTimeout):
+        asyncio.run(read(b"POST / HTTP/1.1\r\nContent-Length: 5\r\n\r\nab"))
+
+    head = aio_server._encode_response(
+        200, b"", "text/event-stream", False, framing="close", version="HTTP/1.0"
+    )
+    assert head.startswith(b"HTTP/1.0 200 OK\r\n")
+    assert b"Content-Length" not in head and b"Transfer-Encoding" not in head
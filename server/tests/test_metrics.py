@@ -0,0 +1,68 @@
+from fastapi.testclient import TestClient
+
+from server.core.metrics import MetricsRegistry
+from server.main import MODULE_REGISTRY, app
+
+
+def test_metrics_endpoint_reports_hooks_and_sessions():
+    client = TestClient(app)
+    resp = client.post("/sessions", json={"module_id": "five_card_draw", "player_count": 3})
+    assert resp.status_code == 200
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    body = resp.text
+    assert 'trainer_sessions_created_total{module="five_card_draw"}' in body
+    assert 'trainer_hook_seconds_count{hook="init_state",module="five_card_draw"}' in body
+    assert 'trainer_request_seconds_count{method="POST",route="/sessions",status="200"}' in body
+    assert "trainer_sessions_active" in body
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    hist = registry.histogram("demo_seconds", "Demo.", buckets=(0.1, 1.0))
+    hist.observe(0.05, hook="a")
+    hist.observe(0.5, hook="a")
+    hist.observe(5.0, hook="a")
+    text = registry.render()
+    assert 'demo_seconds_bucket{hook="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{hook="a",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{hook="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{hook="a"} 3' in text
+
+
+def test_profiled_request_stores_folded_stacks():
+    client = TestClient(app)
+    resp = client.post(
+        "/sessions?profile=1", json={"module_id": "five_card_draw", "player_count": 6}
+    )
+    assert resp.status_code == 200
+    profile_id = resp.headers["x-profile-id"]
+
+    resp = client.get(f"/profiles/{profile_id}")
+    assert resp.status_code == 200
+    for line in resp.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+
+    assert client.get("/profiles/not-an-id").status_code == 404
+
+
+def test_profiles_follow_equity_jobs_onto_scheduler_threads(monkeypatch):
+    draw = MODULE_REGISTRY["five_card_draw"].module
+
+    def dealer_seat(player_count: int) -> dict:
+        # The dealer acts last, so the advice deals seven narrowed ranges.
+        state = draw._deal_new_hand(player_count, round_number=1, dealer_index=0, trainee_index=0)
+        return draw._auto_play_until_trainee(state, player_count)
+
+    monkeypatch.setattr(draw, "init_state", dealer_seat)
+    monkeypatch.setattr(draw, "STRATEGY", None)
+    client = TestClient(app)
+    resp = client.post(
+        "/sessions?profile=1", json={"module_id": "five_card_draw", "player_count": 8}
+    )
+    folded = client.get(f"/profiles/{resp.headers['x-profile-id']}").text
+    equity = [line for line in folded.splitlines() if "build_pool" in line]
+    assert equity and all(line.startswith("thread equity-worker;") for line in equity)
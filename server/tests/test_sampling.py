@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from server.core.canonical import RANKS, SUITS
+from server.core.sampling import SampleStats, iter_deals
+from server.main import MODULE_REGISTRY
+
+DECK = [(rank, suit) for suit in SUITS for rank in RANKS]
+draw = MODULE_REGISTRY["five_card_draw"].module
+
+
+def test_stratified_deals_lead_with_every_card_once_per_pass():
+    deals = iter_deals(DECK, 5, "stratified", random.Random(1))
+    for _ in range(3):
+        leads = []
+        for _ in range(len(DECK)):
+            cards, group = next(deals)
+            assert len(set(cards)) == 5 and group == cards[0][0]
+            leads.append(cards[0])
+        assert sorted(leads) == sorted(DECK)
+
+
+def test_plain_deals_measure_the_bernoulli_variance():
+    stats = SampleStats("plain")
+    for value in [1.0, 0.0] * 50:
+        stats.add([value])
+    assert stats.means() == [0.5]
+    assert stats.variance_per_iteration()[0] == pytest.approx(0.2525, abs=1e-4)
+    assert stats.effective_count() == pytest.approx(99, abs=0.1)
+
+
+def test_common_deals_shrink_the_variance_of_hand_comparisons():
+    state = draw._deal_new_hand(4, round_number=1, dealer_index=0, trainee_index=0)
+    pair = [draw.Card(code[:-1], code[-1]) for code in ("KS", "KH", "7D", "4C", "2S")]
+    trips = [draw.Card(code[:-1], code[-1]) for code in ("KS", "KH", "KD", "4C", "2S")]
+    first, second = draw._compare_win_pcts(state, 0, [pair, trips], iterations=2000)
+    assert second["win_pct"] > first["win_pct"]
+    assert second["edge_pct"] == pytest.approx(second["win_pct"] - first["win_pct"], abs=0.2)
+    independent = first["variance_per_iteration"] + second["variance_per_iteration"]
+    assert second["edge_variance_per_iteration"] < independent
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from server.core.scheduler import BATCH, INTERACTIVE, EquityScheduler
+
+
+def _blocker(scheduler: EquityScheduler, release: threading.Event) -> threading.Thread:
+    started = threading.Event()
+
+    def job(deadline: float) -> str:
+        started.set()
+        release.wait(5)
+        return "blocker"
+
+    thread = threading.Thread(
+        target=scheduler.run, args=(job,), kwargs={"fallback": lambda: None, "timeout_ms": 5000}
+    )
+    thread.start()
+    started.wait(5)
+    return thread
+
+
+def test_interactive_jobs_run_before_queued_batch_jobs():
+    scheduler = EquityScheduler(workers=1)
+    release = threading.Event()
+    blocker = _blocker(scheduler, release)
+    order: list[str] = []
+
+    def submit(name: str, priority: int) -> threading.Thread:
+        thread = threading.Thread(
+            target=scheduler.run,
+            args=(lambda deadline: order.append(name) or name,),
+            kwargs={"fallback": lambda: None, "timeout_ms": 5000, "priority": priority},
+        )
+        thread.start()
+        return thread
+
+    threads = [submit("batch", BATCH)]
+    while scheduler.queue_depth() < 1:
+        time.sleep(0.001)
+    threads.append(submit("interactive", INTERACTIVE))
+    while scheduler.queue_depth() < 2:
+        time.sleep(0.001)
+    release.set()
+    for thread in [blocker, *threads]:
+        thread.join(5)
+    assert order == ["interactive", "batch"]
+    assert scheduler.counts[("interactive", "computed")] == 2
+
+
+def test_full_queue_and_missed_deadlines_fall_back():
+    scheduler = EquityScheduler(workers=1, max_queue=1, grace_ms=0)
+    release = threading.Event()
+    blocker = _blocker(scheduler, release)
+
+    waiting = threading.Thread(
+        target=scheduler.run,
+        args=(lambda deadline: "late",),
+        kwargs={"fallback": lambda: "batch fallback", "timeout_ms": 5000, "priority": BATCH},
+    )
+    waiting.start()
+    while scheduler.queue_depth() < 1:
+        time.sleep(0.001)
+    # The queue is full: a second batch job is shed on arrival, then an
+    # interactive job evicts the queued batch job and expires behind the
+    # busy worker.
+    shed = scheduler.run(
+        lambda deadline: "never", fallback=lambda: "shed", timeout_ms=5000, priority=BATCH
+    )
+    assert shed == ("shed", "shed")
+    started = time.perf_counter()
+    result = scheduler.run(lambda deadline: "slow", fallback=lambda: "heuristic", timeout_ms=50)
+    assert result == ("heuristic", "expired")
+    assert time.perf_counter() - started < 1
+    release.set()
+    blocker.join(5)
+    waiting.join(5)
+    assert scheduler.counts[("batch", "shed")] == 2
+    assert 0 < scheduler.shed_rate() < 1
@@ -0,0 +1,81 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from server import main
+from server.core.types import ActionRequest
+
+client = TestClient(main.app)
+draw = main.MODULE_REGISTRY["five_card_draw"].module
+
+
+def _new_session() -> dict:
+    resp = client.post("/sessions", json={"module_id": "five_card_draw", "player_count": 4})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def _fold(session: dict, version: int | None) -> dict:
+    return {
+        "player_index": session["payload"]["current_actor"],
+        "action": "fold",
+        "expected_version": version,
+    }
+
+
+def test_stale_versions_get_409_and_leave_the_state_alone():
+    session = _new_session()
+    assert session["version"] == 0
+    resp = client.post(f"/sessions/{session['id']}/action", json=_fold(session, 0))
+    assert resp.status_code == 200
+    assert resp.json()["version"] == 1
+
+    before = client.get(f"/sessions/{session['id']}").json()
+    resp = client.post(f"/sessions/{session['id']}/action", json=_fold(session, 0))
+    assert resp.status_code == 409
+    assert client.get(f"/sessions/{session['id']}").json() == before
+    # Clients that send no version are never refused.
+    resp = client.post(f"/sessions/{session['id']}/action", json=_fold(session, None))
+    assert resp.status_code == 200
+
+    values = client.post(f"/sessions/{session['id']}/what_if", json={"iterations": 20}).json()
+    assert values["version"] == 2 and "actions" in values
+
+    assert client.delete(f"/sessions/{session['id']}").status_code == 200
+    assert client.get(f"/sessions/{session['id']}").status_code == 404
+
+
+def test_double_submits_apply_once_without_blocking_other_sessions(monkeypatch):
+    first, other = _new_session(), _new_session()
+    first_state = main.SESSIONS.get(first["id"]).state
+    real_apply = draw.apply_action
+    calls: list[int] = []
+    entered, release = threading.Event(), threading.Event()
+
+    def held_apply(state, action, player_count):
+        calls.append(action["player_index"])
+        if state is first_state:
+            entered.set()
+            release.wait(5)
+        return real_apply(state, action, player_count)
+
+    monkeypatch.setattr(draw, "apply_action", held_apply)
+
+    def submit(session: dict) -> int:
+        try:
+            main._apply_action(session["id"], ActionRequest(**_fold(session, 0)))
+        except HTTPException as exc:
+            return exc.status_code
+        return 200
+
+    with ThreadPoolExecutor(2) as pool:
+        double = [pool.submit(submit, first) for _ in range(2)]
+        entered.wait(5)
+        # The other session goes ahead while the first one is mid-action.
+        assert submit(other) == 200
+        assert not any(future.done() for future in double)
+        release.set()
+        assert sorted(future.result() for future in double) == [200, 409]
+    assert len(calls) == 2
@@ -0,0 +1,68 @@
+import multiprocessing
+
+from server.core.shared_cache import open_shared_cache
+from server.main import MODULE_REGISTRY
+
+draw = MODULE_REGISTRY["five_card_draw"].module
+
+
+def _write_from_child(path: str) -> None:
+    cache = open_shared_cache(path, 64)
+    cache.put(("child", 1), 500, 3, [0.25, 0.5])
+
+
+def test_entries_are_shared_across_processes_and_keep_the_best_estimate(tmp_path):
+    path = str(tmp_path / "equity.bin")
+    cache = open_shared_cache(path, 64)
+    child = multiprocessing.get_context("fork").Process(target=_write_from_child, args=(path,))
+    child.start()
+    child.join(10)
+    assert cache.get(("child", 1)) == (500, 3, (0.25, 0.5, 0.0, 0.0))
+
+    assert not cache.put(("child", 1), 100, 3, [0.9])
+    assert cache.put(("child", 1), 1000, 3, [0.3])
+    assert cache.get(("child", 1))[0] == 1000
+
+    # A full probe window evicts the oldest write instead of growing.
+    for index in range(200):
+        cache.put(("filler", index), 10, 0, [index])
+    assert cache.get(("filler", 199)) == (10, 0, (199.0, 0.0, 0.0, 0.0))
+    assert sum(cache.get(("filler", index)) is not None for index in range(200)) <= 64
+
+
+def test_uniform_estimates_read_through_the_shared_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(draw, "SHARED_EQUITY", open_shared_cache(str(tmp_path / "equity.bin"), 256))
+    state = draw._deal_new_hand(3, round_number=1, dealer_index=0, trainee_index=0)
+    state["hands"][0] = [draw.Card(code[:-1], code[-1]) for code in ("QS", "QH", "8D", "5C", "3S")]
+    first = draw._estimate_win_pct(state, 0, iterations=300)
+
+    # Same hand up to suits, so the same canonical key and no sampling.
+    state["hands"][0] = [draw.Card(code[:-1], code[-1]) for code in ("QD", "QC", "8H", "5S", "3D")]
+    hits = draw.CACHE_HITS.value(cache="shared_equity")
+    assert draw._estimate_win_pct(state, 0, iterations=300) == first
+    assert draw.CACHE_HITS.value(cache="shared_equity") == hits + 1
+    # Asking for more samples than were stored samples again.
+    draw._estimate_win_pct(state, 0, iterations=600)
+    assert draw.CACHE_HITS.value(cache="shared_equity") == hits + 1
+
+
+def test_range_estimates_are_shared_under_their_conditioning(tmp_path, monkeypatch):
+    monkeypatch.setattr(draw, "SHARED_EQUITY", open_shared_cache(str(tmp_path / "equity.bin"), 256))
+    state = draw._deal_new_hand(3, round_number=1, dealer_index=0, trainee_index=0)
+    state["hands"][0] = [draw.Card(code[:-1], code[-1]) for code in ("KS", "KH", "7D", "4C", "2S")]
+    draw._apply_player_action(state, 1, "bet", draw.ALLOWED_BETS[-1], 3)
+    first = draw._range_win_pct(state, 0)
+
+    # Another session with the same hand up to suits and the same betting.
+    other = draw._deal_new_hand(3, round_number=4, dealer_index=0, trainee_index=0)
+    other["hands"][0] = [draw.Card(code[:-1], code[-1]) for code in ("KD", "KC", "7H", "4S", "2D")]
+    draw._apply_player_action(other, 1, "bet", draw.ALLOWED_BETS[-1], 3)
+    hits = draw.CACHE_HITS.value(cache="shared_equity")
+    assert draw._range_win_pct(other, 0)[0] == first[0]
+    assert draw.CACHE_HITS.value(cache="shared_equity") == hits + 1
+    assert "range_pool" not in other
+
+    # Different betting is a different range, so a different entry.
+    draw._apply_player_action(other, 2, "raise", draw.ALLOWED_BETS[-1], 3)
+    draw._range_win_pct(other, 0)
+    assert draw.CACHE_HITS.value(cache="shared_equity") == hits + 1
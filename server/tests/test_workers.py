@@ -0,0 +1,91 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server.core.metrics import HOOK_SECONDS, METRICS, MODULE_WORKER_RESTARTS
+from server.core.module_loader import LoadedModule
+from server.core.profiling import profiling
+from server.core.workers import ModuleSessionLost, ModuleWorkerPool
+from server.main import MODULE_REGISTRY, MODULES_ROOT, SESSIONS, app
+
+config = MODULE_REGISTRY["five_card_draw"].config.model_dump()
+
+
+@pytest.fixture
+def pool():
+    pool = ModuleWorkerPool(os.path.join(MODULES_ROOT, "five_card_draw"), "five_card_draw", config, 2)
+    yield pool
+    pool.close()
+
+
+def test_sessions_are_pinned_to_workers_that_keep_their_state(pool):
+    first, second = pool.init_state(4), pool.init_state(4)
+    assert {first.worker, second.worker} == {0, 1}
+    assert pool._workers[0].process.pid != pool._workers[1].process.pid
+
+    payload = pool.render_payload(first, 4)
+    actor = payload["current_actor"]
+    assert pool.apply_action(first, {"player_index": actor, "action": "fold"}, 4) == first
+    assert pool.render_payload(first, 4) != payload
+    assert pool.render_payload(second, 4)["hands"]
+
+
+def test_a_dead_worker_loses_its_sessions_and_is_restarted(pool):
+    state = pool.init_state(4)
+    restarts = MODULE_WORKER_RESTARTS.value(module="five_card_draw")
+    pool._workers[state.worker].process.kill()
+    pool._workers[state.worker].process.join(5)
+    with pytest.raises(ModuleSessionLost):
+        pool.render_payload(state, 4)
+    assert MODULE_WORKER_RESTARTS.value(module="five_card_draw") == restarts + 1
+
+    # Its state went with it, but the worker serves new sessions again.
+    with pytest.raises(ModuleSessionLost):
+        pool.render_payload(state, 4)
+    assert pool.render_payload(pool.init_state(4), 4)["hands"]
+
+
+def test_a_lost_session_is_dropped_so_the_client_starts_over(pool, monkeypatch):
+    draw = MODULE_REGISTRY["five_card_draw"]
+    monkeypatch.setitem(MODULE_REGISTRY, "five_card_draw", LoadedModule(draw.config, pool))
+    client = TestClient(app)
+    body = {"module_id": "five_card_draw", "player_count": 4}
+    session = client.post("/sessions", json=body).json()
+    worker = pool._workers[SESSIONS.get(session["id"]).state.worker]
+    worker.process.kill()
+    worker.process.join(5)
+
+    assert client.get(f"/sessions/{session['id']}").status_code == 410
+    assert SESSIONS.get(session["id"]) is None
+    assert client.get(f"/sessions/{session['id']}").status_code == 404
+    assert client.post("/sessions", json=body).status_code == 200
+
+
+def test_pools_only_offer_the_hooks_their_module_has(tmp_path):
+    (tmp_path / "module.py").write_text(
+        "def init_state(player_count):\n    return {}\n\n\n"
+        "def apply_action(state, action, player_count):\n    return state\n\n\n"
+        "def render_payload(state, player_count):\n    return {}\n"
+    )
+    bare = ModuleWorkerPool(str(tmp_path), "bare", {}, 1)
+    assert not any(hasattr(bare, hook) for hook in ("init_drill", "action_values", "discard_state"))
+    assert hasattr(bare, "release_state")
+    draw = ModuleWorkerPool(os.path.join(MODULES_ROOT, "five_card_draw"), "five_card_draw", config, 1)
+    assert all(hasattr(draw, hook) for hook in ("init_drill", "action_values", "discard_state"))
+
+
+def test_worker_metrics_and_profiles_reach_the_parent(pool):
+    hook = {"module": "five_card_draw", "hook": "auto_play_until_trainee"}
+    before = HOOK_SECONDS.count(**hook)
+    state = pool.init_state(4)
+    while pool.render_payload(state, 4)["phase"] != "betting":
+        state = pool.init_state(4)
+    assert HOOK_SECONDS.count(**hook) > before
+    worker = f"five_card_draw/{state.worker}"
+    assert f'trainer_equity_queue_depth{{worker="{worker}"}}' in METRICS.render()
+
+    with profiling() as profiler:
+        pool.action_values(state, 4, 2000)
+    root = f"process five_card_draw-worker-{state.worker};"
+    assert any(stack.startswith(root) and "_action_rollouts" in stack for stack in profiler.stacks)
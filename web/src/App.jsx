@@ -6,8 +6,9 @@ const fetchJson = async (path, options) => {
   const res = await fetch(`${API_BASE}${path}`, options);
   const data = await res.json();
   if (!res.ok) {
-    const message = data?.detail || "Request failed";
-    throw new Error(message);
+    const error = new Error(data?.detail || "Request failed");
+    error.status = res.status;
+    throw error;
   }
   return data;
 };
@@ -53,6 +54,9 @@ const Hand = ({
   isWinner,
   isFolded,
   lastAction,
+  selectable = false,
+  selected = [],
+  onToggleCard,
 }) => (
   <div className="hand">
     <div className="hand-title">
@@ -66,9 +70,12 @@ const Hand = ({
     <div className="card-row">
       {hand.map((card) => (
         <div
-          className={`card${card.hidden ? " back" : ""}`}
+          className={`card${card.hidden ? " back" : ""}${selectable ? " selectable" : ""}${
+            selected.includes(card.code) ? " selected" : ""
+          }`}
           key={card.code}
           data-suit={card.suit}
+          onClick={selectable ? () => onToggleCard(card.code) : undefined}
         >
           {!card.hidden && (
             <>
@@ -101,6 +108,8 @@ export default function App() {
   const [modules, setModules] = useState([]);
   const [moduleId, setModuleId] = useState("");
   const [playerCount, setPlayerCount] = useState(4);
+  const [mode, setMode] = useState("play");
+  const [drillDifficulty, setDrillDifficulty] = useState("");
   const [session, setSession] = useState(null);
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(false);
@@ -109,6 +118,7 @@ export default function App() {
   const [showMetaGroup, setShowMetaGroup] = useState(true);
   const [collapseActionLog, setCollapseActionLog] = useState(true);
   const [showAdvice, setShowAdvice] = useState(false);
+  const [selectedDiscards, setSelectedDiscards] = useState([]);
 
   useEffect(() => {
     fetchJson("/modules")
@@ -135,8 +145,14 @@ export default function App() {
         body: JSON.stringify({
           module_id: moduleId,
           player_count: Number(playerCount),
+          mode,
+          drill: { difficulty: drillDifficulty || null },
         }),
       });
+      if (session) {
+        // Let the server drop the old table and anything it was preparing.
+        fetch(`${API_BASE}/sessions/${session.id}`, { method: "DELETE" }).catch(() => {});
+      }
       setSession(data);
       setShowNewSession(false);
       setShowMetaGroup(false);
@@ -147,7 +163,13 @@ export default function App() {
     }
   };
 
-  const sendAction = async (action, amount = null) => {
+  const toggleDiscard = (code) => {
+    setSelectedDiscards((prev) =>
+      prev.includes(code) ? prev.filter((entry) => entry !== code) : [...prev, code]
+    );
+  };
+
+  const sendAction = async (action, amount = null, extra = {}) => {
     if (!session) return;
     setActing(true);
     setError("");
@@ -159,11 +181,25 @@ export default function App() {
           player_index: session.payload.current_actor,
           action,
           amount,
+          ...extra,
+          expected_version: session.version,
         }),
       });
       setSession(data);
+      setSelectedDiscards([]);
     } catch (err) {
-      setError(err.message);
+      if (err.status === 409) {
+        // Another tab or a retried request moved the hand on; show where it is now.
+        try {
+          setSession(await fetchJson(`/sessions/${session.id}`));
+          setSelectedDiscards([]);
+          setError("The table changed before your action arrived. Please act again.");
+        } catch (reloadErr) {
+          setError(reloadErr.message);
+        }
+      } else {
+        setError(err.message);
+      }
     } finally {
       setActing(false);
     }
@@ -186,6 +222,17 @@ export default function App() {
                 </button>
               ));
             }
+            if (action === "draw") {
+              return (
+                <button
+                  key={action}
+                  onClick={() => sendAction(action, null, { discards: selectedDiscards })}
+                  disabled={acting || showAdvice}
+                >
+                  {selectedDiscards.length ? `DRAW ${selectedDiscards.length}` : "STAND PAT"}
+                </button>
+              );
+            }
             return (
               <button
                 key={action}
@@ -256,6 +303,14 @@ export default function App() {
             <div className="advice-row">
               Recommended: {session.payload.advice.recommended_action.toUpperCase()}
             </div>
+            {session.payload.advice.recommended_discards && (
+              <div className="advice-row">
+                Discard:{" "}
+                {session.payload.advice.recommended_discards.length
+                  ? session.payload.advice.recommended_discards.join(", ")
+                  : "none"}
+              </div>
+            )}
             <div className="advice-note">{session.payload.advice.notes}</div>
           </div>
         )}
@@ -295,6 +350,13 @@ export default function App() {
                       : ""
                   }
                   isWinner={session.payload.winners?.includes(index)}
+                  selectable={
+                    session.payload.phase === "draw" &&
+                    index === session.payload.trainee_index &&
+                    session.payload.current_actor === index
+                  }
+                  selected={selectedDiscards}
+                  onToggleCard={toggleDiscard}
                 />
               </div>
             ))}
@@ -343,6 +405,27 @@ export default function App() {
                     onChange={(event) => setPlayerCount(event.target.value)}
                   />
                 </label>
+                <label>
+                  Mode
+                  <select value={mode} onChange={(event) => setMode(event.target.value)}>
+                    <option value="play">Play hands</option>
+                    <option value="drill">Drill spots</option>
+                  </select>
+                </label>
+                {mode === "drill" && (
+                  <label>
+                    Difficulty
+                    <select
+                      value={drillDifficulty}
+                      onChange={(event) => setDrillDifficulty(event.target.value)}
+                    >
+                      <option value="">Any</option>
+                      <option value="easy">Easy</option>
+                      <option value="medium">Medium</option>
+                      <option value="hard">Hard</option>
+                    </select>
+                  </label>
+                )}
                 <button onClick={createSession} disabled={loading || !moduleId}>
                   {loading ? "Creating..." : "Create Session"}
                 </button>
@@ -391,6 +474,12 @@ export default function App() {
                 <div className="meta-box">Round: {session.payload.round_number}</div>
                 <div className="meta-box">Bet: ${session.payload.current_bet.toFixed(2)}</div>
                 <div className="meta-box">Raises: {session.payload.raises_this_round} / {session.payload.max_raises}</div>
+                {session.payload.drill && (
+                  <div className="meta-box">
+                    Drill: {session.payload.drill.difficulty} {session.payload.drill.category},{" "}
+                    {session.payload.drill.correct} / {session.payload.drill.answered} right
+                  </div>
+                )}
                 {session.payload.message && (
                   <div className="meta-box full">Message: {session.payload.message}</div>
                 )}